@@ -0,0 +1,109 @@
+"""Служебные команды бэкенда
+
+Запуск из каталога backend:
+    python -m app.cli recompute-ratings
+    python -m app.cli import-users users.csv
+    python -m app.cli run-scheduler
+"""
+import argparse
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.database import Base, SessionLocal, engine
+
+# Импортируем все модели, чтобы связи между ними были настроены
+from app.models.user import User
+from app.models.profile import SportsmanProfile, SponsorProfile, RegionProfile
+from app.models.event import Event, Tag
+from app.models.stats import EventCounter, TagStat
+from app.models.rating import EventResult, EventResultsUpload
+from app.models.contest import ContestProblem, Submission, ScoreboardSnapshot
+from app.models.admission import RegistrationTicket
+from app.models.changes import EventChange
+from app.models.sequence import SequenceCounter
+
+
+def recompute_ratings(args: argparse.Namespace) -> None:
+    from app.services.profile_cache import profiles_cache
+    from app.services.rating import recompute_all_ratings
+
+    db = SessionLocal()
+    try:
+        count = recompute_all_ratings(db)
+        db.commit()
+    finally:
+        db.close()
+    # Действует на общий кэш (CACHE_URL); кэш в памяти воркеров истечёт по TTL
+    profiles_cache.clear()
+    print(f"Рейтинг пересчитан для {count} спортсменов")
+
+
+def import_users_file(args: argparse.Namespace) -> None:
+    from app.services.user import IMPORT_CHUNK_SIZE, import_users, read_users_csv
+    from app.utils.hashing import get_password_hash
+
+    workers = args.workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def hash_passwords(passwords):
+            # bcrypt нагружает процессор, поэтому пачка делится между процессами
+            return list(pool.map(get_password_hash, passwords, chunksize=max(len(passwords) // (workers * 4), 1)))
+
+        db = SessionLocal()
+        try:
+            with open(args.path, encoding="utf-8-sig", newline="") as stream:
+                summary = import_users(db, read_users_csv(stream), hash_passwords, args.chunk_size or IMPORT_CHUNK_SIZE)
+        finally:
+            db.close()
+
+    for error in summary["errors"]:
+        print(error)
+    print(
+        f"Прочитано строк: {summary['read']}, создано пользователей: {summary['created']}, "
+        f"пропущено существующих: {summary['skipped']}, с ошибками: {len(summary['errors'])}"
+    )
+
+
+def run_scheduler(args: argparse.Namespace) -> None:
+    from app.services.lifecycle import lifecycle_scheduler_loop
+
+    print("Планировщик жизненного цикла мероприятий запущен")
+    try:
+        asyncio.run(lifecycle_scheduler_loop())
+    except KeyboardInterrupt:
+        pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser(
+        "recompute-ratings",
+        help="Полностью пересчитать рейтинг спортсменов по результатам мероприятий"
+    ).set_defaults(handler=recompute_ratings)
+
+    import_parser = commands.add_parser(
+        "import-users",
+        help="Зарегистрировать пользователей из CSV с колонками full_name, email, password, role"
+    )
+    import_parser.add_argument("path", help="Путь к CSV-файлу")
+    import_parser.add_argument("--workers", type=int, default=None, help="Число процессов для хеширования паролей")
+    import_parser.add_argument("--chunk-size", type=int, default=None, help="Сколько строк записывать за одну транзакцию")
+    import_parser.set_defaults(handler=import_users_file)
+
+    commands.add_parser(
+        "run-scheduler",
+        help="Запустить планировщик статусов мероприятий отдельным процессом"
+    ).set_defaults(handler=run_scheduler)
+
+    args = parser.parse_args()
+    from app.services.schema import upgrade_schema
+
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,88 @@ class Settings(BaseSettings):
 
     DATABASE_URL: Optional[str] = None
 
+    # Сколько синхронных обращений к БД может выполняться одновременно
+    DB_THREADPOOL_SIZE: int = 20
+
+    # Пул соединений для серверных СУБД (PostgreSQL)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Прагмы SQLite
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 268435456  # 256 МБ
+    SQLITE_CACHE_SIZE: int = -65536  # в КиБ при отрицательном значении, т.е. 64 МБ
+
+    # Кэш ответов: в памяти процесса или общий в Redis (redis://...)
+    CACHE_URL: Optional[str] = None
+    EVENTS_CACHE_MAXSIZE: int = 1024
+    EVENTS_CACHE_TTL: int = 30
+    PROFILES_CACHE_MAXSIZE: int = 10000
+    PROFILES_CACHE_TTL: int = 60
+
+    # Сколько профилей можно запросить одним пакетным запросом
+    PROFILES_BATCH_MAX_SIZE: int = 200
+
+    # Пул для bcrypt: "thread" или "process"
+    HASHING_EXECUTOR: str = "thread"
+    HASHING_POOL_SIZE: int = 4
+
+    # Кэш проверенных токенов для get_current_user
+    AUTH_CACHE_MAXSIZE: int = 10000
+    AUTH_CACHE_TTL: int = 60
+
+    # Рейтинг Эло: стартовое значение и коэффициент K
+    RATING_INITIAL: int = 1500
+    RATING_K: int = 32
+    # Период перестроения рейтинговой таблицы в памяти, в секундах
+    LEADERBOARD_REBUILD_INTERVAL: int = 300
+
+    # Таблицы результатов соревнований: как часто догонять посылки других
+    # воркеров, сохранять снимки и проверять неиспользуемые таблицы и когда
+    # их выгружать (секунды)
+    SCOREBOARD_SYNC_INTERVAL: float = 2.0
+    SCOREBOARD_PERSIST_INTERVAL: int = 30
+    SCOREBOARD_IDLE_TTL: int = 3600
+
+    # Живые обновления мероприятий: не чаще одной рассылки за интервал
+    # на мероприятие и комментарий-пинг при простое, в секундах
+    LIVE_PUSH_INTERVAL: float = 0.25
+    LIVE_KEEPALIVE: int = 15
+
+    # Очередь допуска: размер пачки, пауза между пачками и время, после
+    # которого заявки упавшего воркера возвращаются в очередь (секунды)
+    ADMISSION_BATCH_SIZE: int = 200
+    ADMISSION_INTERVAL: float = 0.5
+    ADMISSION_CLAIM_TIMEOUT: int = 60
+
+    # Сколько записей листа ожидания переводится в участники за одну транзакцию
+    WAITLIST_BATCH_SIZE: int = 200
+
+    # Сколько участников можно зарегистрировать одной заявкой от региона
+    ROSTER_MAX_SIZE: int = 1000
+
+    # Жизненный цикл мероприятий: сколько часов мероприятие идёт после своей
+    # даты, как часто заново читать сроки из базы (секунды) и запускать ли
+    # планировщик в процессе приложения (иначе — python -m app.cli run-scheduler)
+    EVENT_DURATION_HOURS: int = 24
+    LIFECYCLE_RESCAN_INTERVAL: int = 60
+    LIFECYCLE_SCHEDULER_ENABLED: bool = True
+    # Как часто приложение читает журнал изменений, когда планировщик вынесен
+    # в отдельный процесс, чтобы сбросить свои кэши и разослать обновления (секунды)
+    CHANGES_FOLLOW_INTERVAL: float = 1.0
+    # На СУБД с параллельными писателями номера журнала выдаются при вставке,
+    # а фиксируются транзакции в другом порядке. Читатели не заходят дальше
+    # записей моложе этой задержки, пока их транзакции могли не зафиксироваться (секунды)
+    CHANGES_SETTLE_DELAY: float = 2.0
+
+    # Период полной сверки предрасчитанной статистики, в секундах
+    STATS_RECONCILE_INTERVAL: int = 600
+
     class Config:
         env_file = ".env"
 
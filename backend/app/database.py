@@ -1,14 +1,77 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 
+from app.config import settings
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
 
+DEFAULT_DATABASE_URL = "sqlite:///./app.db"
+SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL or DEFAULT_DATABASE_URL
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Настроить каждое новое соединение SQLite
+
+    WAL позволяет читателям работать параллельно с единственным писателем,
+    busy_timeout заставляет писателей ждать блокировку, а не падать сразу.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.close()
+
+
+def _is_sqlite_memory(url) -> bool:
+    """База SQLite в памяти: sqlite://, :memory: или file:...?mode=memory"""
+    database = url.database or ""
+    return database in ("", ":memory:") or "mode=memory" in database or url.query.get("mode") == "memory"
+
+
+def create_db_engine(url: str = SQLALCHEMY_DATABASE_URL) -> Engine:
+    """Создать движок с профилем настроек под конкретную СУБД"""
+    parsed_url = make_url(url)
+    if parsed_url.get_backend_name() == "sqlite":
+        if _is_sqlite_memory(parsed_url):
+            # Каждое соединение с базой в памяти видело бы свою пустую базу,
+            # поэтому все потоки делят одно соединение
+            db_engine = create_engine(
+                url,
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool
+            )
+            event.listen(db_engine, "connect", _set_sqlite_pragmas)
+            return db_engine
+
+        # Соединение SQLite — это дескриптор локального файла. Запросы не
+        # держат соединение между вызовами run_sync, поэтому пул, вмещающий
+        # DB_THREADPOOL_SIZE соединений, не заставляет потоки ждать друг друга
+        db_engine = create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=max(settings.DB_MAX_OVERFLOW, settings.DB_THREADPOOL_SIZE - settings.DB_POOL_SIZE),
+            pool_timeout=settings.DB_POOL_TIMEOUT
+        )
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+        return db_engine
+
+    # Серверные СУБД (PostgreSQL и др.): пул соединений настраивается из конфигурации
+    return create_engine(
+        url,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+engine = create_db_engine()
 
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -19,4 +82,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,18 +1,69 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from app.config import settings
 from app.database import Base, engine
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 import os
-from app.routers import auth, ratings, profiles, events
+from app.routers import auth, ratings, profiles, events, contest
+from app.services.schema import upgrade_schema
+from app.services.search import ensure_search_index
+from app.services.event_cache import events_cache
+from app.services.profile_cache import profiles_cache
+from app.services.admission import admission_worker_loop
+from app.services.auth_cache import auth_cache
+from app.services.changes import backfill_event_changes, event_changes_follower_loop
+from app.services.contest import persist_scoreboards, scoreboard_persist_loop
+from app.services.lifecycle import lifecycle_scheduler_loop
+from app.services.live import live_updates
+from app.services.leaderboard import leaderboard_rebuild_loop, run_leaderboard_rebuild
+from app.services.stats import run_stats_reconciliation, stats_reconciliation_loop
+from app.utils.concurrency import run_sync
+from app.utils.hashing import hashing_stats
+from app.utils.query_counter import install_query_counter, count_queries
 
 # Импортируем все модели для создания таблиц
 from app.models.user import User
 from app.models.profile import SportsmanProfile, SponsorProfile, RegionProfile
 from app.models.event import Event, Tag, event_participants, event_tags
+from app.models.stats import EventCounter, TagStat
+from app.models.rating import EventResult, EventResultsUpload
+from app.models.contest import ContestProblem, Submission, ScoreboardSnapshot
+from app.models.admission import RegistrationTicket
+from app.models.changes import EventChange
+from app.models.sequence import SequenceCounter
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Мероприятия, созданные до появления журнала изменений, попадают в него один раз
+    await run_sync(backfill_event_changes)
+    # Сверяем предрасчитанную статистику при старте и затем периодически
+    await run_sync(run_stats_reconciliation)
+    # Рейтинговая таблица строится в памяти процесса и периодически сверяется с базой
+    await run_sync(run_leaderboard_rebuild)
+    background_tasks = [
+        asyncio.create_task(stats_reconciliation_loop()),
+        asyncio.create_task(leaderboard_rebuild_loop()),
+        asyncio.create_task(scoreboard_persist_loop()),
+        asyncio.create_task(admission_worker_loop()),
+    ]
+    # Переходы статусов по срокам; можно вынести в отдельный процесс, тогда
+    # его изменения доходят до кэшей и подписчиков этого процесса через журнал
+    if settings.LIFECYCLE_SCHEDULER_ENABLED:
+        background_tasks.append(asyncio.create_task(lifecycle_scheduler_loop()))
+    else:
+        background_tasks.append(asyncio.create_task(event_changes_follower_loop()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # Снимки таблиц сохраняются при остановке, чтобы следующий запуск не перечитывал посылки
+    await run_sync(persist_scoreboards)
+
 
 # Создаём один раз!
-app = FastAPI(title="Федерация спортивного программирования - API")
+app = FastAPI(title="Федерация спортивного программирования - API", lifespan=lifespan)
 
 # Добавляем CORS
 app.add_middleware(
@@ -21,13 +72,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Query-Count"],
 )
 
+
+# Считаем SQL-запросы каждого HTTP-запроса и отдаём их число в заголовке
+install_query_counter(engine)
+
+
+@app.middleware("http")
+async def query_count_middleware(request: Request, call_next):
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers["X-Query-Count"] = str(counter.count)
+    return response
+
 # Подключаем роутеры
 app.include_router(auth.router, tags=["Аутентификация"])
 app.include_router(ratings.router, tags=["Рейтинг"])
 app.include_router(profiles.router, tags=["Профили"])
 app.include_router(events.router, tags=["События"])
+app.include_router(contest.router, tags=["Соревнования"])
 
 # Создаём директорию для загрузок, если ещё не создана
 uploads_dir = Path("uploads")
@@ -41,6 +106,8 @@ app.mount("/api/uploads", StaticFiles(directory="uploads"), name="uploads")
 # Создаём таблицы
 print("Создание таблиц в базе данных...")
 Base.metadata.create_all(bind=engine)
+upgrade_schema(engine)
+ensure_search_index(engine)
 print("Таблицы успешно созданы")
 
 
@@ -49,6 +116,18 @@ async def root():
     return {"message": "API федерации спортивного программирования работает"}
 
 
+@app.get("/api/metrics", tags=["Служебное"])
+async def metrics():
+    """Счётчики кэшей и очередей процесса"""
+    return {
+        "events_cache": events_cache.stats(),
+        "profiles_cache": profiles_cache.stats(),
+        "auth_cache": auth_cache.stats(),
+        "hashing": hashing_stats(),
+        "live": live_updates.stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Enum, Index
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class TicketStatus(str, enum.Enum):
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    REGISTERED = "registered"
+    REJECTED = "rejected"
+    WAITLISTED = "waitlisted"
+
+
+# Заявка на регистрацию в очереди мероприятия с контролем допуска.
+# Автоинкрементный id задаёт порядок обработки и позицию в очереди
+class RegistrationTicket(Base):
+    __tablename__ = "registration_tickets"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(String, ForeignKey("events.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(Enum(TicketStatus), nullable=False, default=TicketStatus.QUEUED)
+    detail = Column(String, nullable=True)
+    # Метка воркера, забравшего заявку в обработку, и время захвата
+    claim = Column(String, nullable=True, index=True)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_registration_tickets_event_status_id", "event_id", "status", "id"),
+    )
+
+    def __repr__(self):
+        return f"<RegistrationTicket {self.id} event_id={self.event_id}, status={self.status}>"
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, DateTime, Enum
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class ChangeOperation(str, enum.Enum):
+    INSERT = "insert"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+# Журнал изменений мероприятий, только дополняется. Номер seq выдаёт сама база
+# (rowid в SQLite, последовательность в PostgreSQL), по нему клиенты забирают
+# изменения инкрементально, читая журнал через visible_changes. Изменения тегов и участников
+# записываются как изменения их мероприятия. Ссылки на events нет, чтобы
+# запись об удалении пережила само мероприятие
+class EventChange(Base):
+    __tablename__ = "event_changes"
+
+    seq = Column(Integer, primary_key=True)
+    event_id = Column(String, nullable=False, index=True)
+    operation = Column(Enum(ChangeOperation), nullable=False)
+    fields = Column(String, nullable=True)  # изменённые поля через запятую
+    changed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<EventChange {self.seq} event_id={self.event_id}, operation={self.operation}>"
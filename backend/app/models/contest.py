@@ -0,0 +1,67 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Enum, Index, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+import enum
+from app.database import Base
+
+
+class Verdict(str, enum.Enum):
+    ACCEPTED = "accepted"
+    REJECTED = "rejected"
+    COMPILATION_ERROR = "compilation_error"  # не штрафуется, как в правилах ICPC
+
+
+# Задача соревнования, обозначается буквой (A, B, C...)
+class ContestProblem(Base):
+    __tablename__ = "contest_problems"
+
+    id = Column(String, primary_key=True, index=True)
+    event_id = Column(String, ForeignKey("events.id"), nullable=False, index=True)
+    label = Column(String, nullable=False)
+    title = Column(String, nullable=True)
+    position = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("event_id", "label", name="uq_contest_problems_event_label"),
+    )
+
+    def __repr__(self):
+        return f"<ContestProblem {self.label} event_id={self.event_id}>"
+
+
+# Посылка участника. Номер seq внутри соревнования выдаётся счётчиком
+# sequence_counters и растёт в порядке фиксации транзакций, по нему воркеры
+# догоняют посылки, принятые другими процессами
+class Submission(Base):
+    __tablename__ = "contest_submissions"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    event_id = Column(String, ForeignKey("events.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    problem_id = Column(String, ForeignKey("contest_problems.id"), nullable=False)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    verdict = Column(Enum(Verdict), nullable=False)
+    submitted_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index("ix_contest_submissions_event_id_seq", "event_id", "seq", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<Submission {self.id} user_id={self.user_id}, verdict={self.verdict}>"
+
+
+# Снимок таблицы результатов и её заморозка, общие для всех воркеров. Процесс
+# восстанавливает таблицу из снимка и догоняет посылки с номерами после last_seq
+class ScoreboardSnapshot(Base):
+    __tablename__ = "scoreboard_snapshots"
+
+    event_id = Column(String, ForeignKey("events.id"), primary_key=True)
+    # Посылки, сделанные после этого момента, в публичной таблице не раскрываются
+    frozen_at = Column(DateTime(timezone=True), nullable=True)
+    # Посылки участников по задачам (Scoreboard.dump) и номер последней из них
+    state = Column(JSON, nullable=True)
+    last_seq = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<ScoreboardSnapshot event_id={self.event_id}, frozen_at={self.frozen_at}>"
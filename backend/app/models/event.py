@@ -1,21 +1,10 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DateTime, Text, Table, Float, Enum
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, DateTime, Text, Table, Float, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from app.database import Base
 
-# In your Event model
-@property
-def organizer_dict(self):
-    if not self.organizer:
-        return None
-    return {
-        "id": self.organizer.id,
-        "full_name": self.organizer.full_name,
-        "email": self.organizer.email,
-        "organization_name": getattr(self.organizer, 'organization_name', None)
-    }
-
 # Таблица связи для участников мероприятия
 event_participants = Table(
     "event_participants",
@@ -26,6 +15,18 @@ event_participants = Table(
     Column("status", String, default="registered"),  # registered, confirmed, cancelled
 )
 
+# Лист ожидания: порядок очереди задаёт автоинкрементный id
+event_waitlist = Table(
+    "event_waitlist",
+    Base.metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("event_id", String, ForeignKey("events.id"), nullable=False),
+    Column("user_id", String, ForeignKey("users.id"), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+    UniqueConstraint("event_id", "user_id", name="uq_event_waitlist_event_user"),
+    Index("ix_event_waitlist_event_id_id", "event_id", "id"),
+)
+
 # Таблица связи для тегов мероприятия
 event_tags = Table(
     "event_tags",
@@ -69,7 +70,13 @@ class Event(Base):
     # Даты
     date = Column(DateTime(timezone=True), nullable=False)
     registration_deadline = Column(DateTime(timezone=True), nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Время создания проставляется на стороне приложения, чтобы значение в БД
+    # совпадало с тем, что попадает в курсор пагинации
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Мета-информация
@@ -84,6 +91,8 @@ class Event(Base):
     status = Column(Enum(EventStatus), default=EventStatus.REGISTRATION)
     event_type = Column(Enum(EventType), default=EventType.COMPETITION)
     difficulty_level = Column(Enum(DifficultyLevel), default=DifficultyLevel.MEDIUM)
+    # Регистрация через очередь допуска для мероприятий с ажиотажным спросом
+    admission_control = Column(Boolean, default=False, nullable=False)
 
     # Связи с другими моделями
     organizer_id = Column(String, ForeignKey("users.id"), nullable=False)
@@ -91,6 +100,29 @@ class Event(Base):
     participants = relationship("User", secondary=event_participants, back_populates="participated_events")
     tags = relationship("Tag", secondary=event_tags, back_populates="events")
 
+    # Название организации организатора, подгружается вместе с мероприятием
+    # в get_event_detail и не хранится в таблице events
+    organizer_organization_name = None
+
+    # Составные индексы для keyset-пагинации по (created_at, id) и (date, id)
+    # и для выборки сроков открытых мероприятий планировщиком
+    __table_args__ = (
+        Index("ix_events_created_at_id", "created_at", "id"),
+        Index("ix_events_date_id", "date", "id"),
+        Index("ix_events_status_date", "status", "date"),
+    )
+
+    @property
+    def organizer_dict(self):
+        if not self.organizer:
+            return None
+        return {
+            "id": self.organizer.id,
+            "full_name": self.organizer.full_name,
+            "email": self.organizer.email,
+            "organization_name": self.organizer_organization_name
+        }
+
     def __repr__(self):
         return f"<Event {self.name}, status={self.status}, organizer_id={self.organizer_id}>"
 
@@ -100,6 +132,8 @@ class Tag(Base):
 
     id = Column(String, primary_key=True, index=True)
     name = Column(String, index=True, nullable=False, unique=True)
+    # Нормализованное имя (нижний регистр, «ё» -> «е», одиночные пробелы) для поиска без учёта регистра
+    key = Column(String, index=True, nullable=False, unique=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     events = relationship("Event", secondary=event_tags, back_populates="tags")
 
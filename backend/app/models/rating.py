@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Float, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+# Итоговое место участника на мероприятии — вход для расчёта рейтинга
+class EventResult(Base):
+    __tablename__ = "event_results"
+
+    id = Column(String, primary_key=True, index=True)
+    event_id = Column(String, ForeignKey("events.id"), nullable=False, index=True)
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    place = Column(Integer, nullable=False)
+    score = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("event_id", "user_id", name="uq_event_results_event_user"),
+    )
+
+    def __repr__(self):
+        return f"<EventResult event_id={self.event_id}, user_id={self.user_id}, place={self.place}>"
+
+
+# Отметка о загрузке результатов мероприятия. Первичный ключ по event_id не даёт
+# двум параллельным загрузкам записать результаты одного мероприятия дважды
+class EventResultsUpload(Base):
+    __tablename__ = "event_results_uploads"
+
+    event_id = Column(String, ForeignKey("events.id"), primary_key=True)
+    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<EventResultsUpload event_id={self.event_id}>"
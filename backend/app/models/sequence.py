@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, Integer
+from app.database import Base
+
+
+# Именованные счётчики для номеров, которые должны расти в порядке фиксации
+# транзакций. Строка счётчика блокируется UPDATE до конца транзакции, поэтому
+# писатели одного счётчика получают номера по очереди, и читатель не увидит
+# номер, если меньший номер ещё не зафиксирован
+class SequenceCounter(Base):
+    __tablename__ = "sequence_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<SequenceCounter {self.name}={self.value}>"
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, ForeignKey
+from app.database import Base
+
+
+# Счётчики мероприятий (total, active, upcoming), поддерживаются сервисом событий
+class EventCounter(Base):
+    __tablename__ = "event_counters"
+
+    name = Column(String, primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<EventCounter {self.name}={self.value}>"
+
+
+# Количество мероприятий по тегам для виджета популярных тегов
+class TagStat(Base):
+    __tablename__ = "tag_stats"
+
+    tag_id = Column(String, ForeignKey("tags.id"), primary_key=True)
+    name = Column(String, nullable=False)
+    event_count = Column(Integer, nullable=False, default=0, index=True)
+
+    def __repr__(self):
+        return f"<TagStat {self.name}={self.event_count}>"
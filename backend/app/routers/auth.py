@@ -2,20 +2,22 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 from sqlalchemy.orm import Session
-from app.schemas.user import UserRegistration, Token
-from app.services.user import register_new_user, get_user_by_email
+from app.schemas.user import UserRegistration, UserUpdate, Token, CurrentUser
+from app.services.user import deactivate_user, register_new_user, get_user_by_email, update_user
 from app.utils.auth import create_access_token, get_current_user
-from app.utils.hashing import verify_password  # Импорт из нового модуля
+from app.utils.hashing import get_password_hash_async, verify_password_async
+from app.utils.concurrency import run_sync
 from app.config import settings
 from app.database import get_db
-from app.models.user import User
 
 router = APIRouter(prefix="/api")
 
 
 @router.post("/register", response_model=dict)
 async def register_user(user_data: UserRegistration, db: Session = Depends(get_db)):
-    user = register_new_user(db, user_data)
+    # Хеш считается в пуле хеширования, чтобы bcrypt не блокировал цикл событий
+    hashed_password = await get_password_hash_async(user_data.password)
+    user = await run_sync(register_new_user, db, user_data, hashed_password)
 
     # После успешной регистрации сразу создаем токен для пользователя
     access_token = create_access_token(
@@ -37,13 +39,19 @@ async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_sync(get_user_by_email, db, form_data.username)
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверный email или пароль",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Учётная запись деактивирована",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     access_token = create_access_token(
         data={"sub": user.id, "role": user.role.value},
@@ -52,11 +60,35 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/users/me", response_model=dict)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: CurrentUser = Depends(get_current_user)):
     return {
         "id": current_user.id,
         "email": current_user.email,
         "full_name": current_user.full_name,
         "role": current_user.role.value,
         "is_active": current_user.is_active
-    }
\ No newline at end of file
+    }
+
+
+@router.put("/users/me", response_model=dict)
+async def update_users_me(
+    user_data: UserUpdate,
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    user = await run_sync(update_user, db, current_user.id, user_data)
+    return {
+        "id": user.id,
+        "email": user.email,
+        "full_name": user.full_name,
+        "role": user.role.value,
+        "is_active": user.is_active
+    }
+
+@router.delete("/users/me", response_model=dict)
+async def deactivate_users_me(
+    db: Session = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    await run_sync(deactivate_user, db, current_user.id)
+    return {"success": True, "message": "Учётная запись деактивирована"}
@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.database import get_db
+from app.models.user import UserRole
+from app.schemas.contest import (
+    ContestProblemResponse, ContestProblemsUpdate, FreezeRequest, SubmissionsAccepted, SubmissionsBatch
+)
+from app.schemas.user import CurrentUser
+from app.services import contest
+from app.services.scoreboard import FULL, PUBLIC, Scoreboard
+from app.utils.auth import get_current_user
+from app.utils.concurrency import run_sync
+
+router = APIRouter(
+    prefix="/api/contests",
+    tags=["Соревнования"]
+)
+
+
+def _require_organizer(current_user: CurrentUser) -> None:
+    if current_user.role != UserRole.SPONSOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только организаторы могут управлять соревнованием"
+        )
+
+
+def _standings_response(request: Request, board: Scoreboard, view: str) -> Response:
+    """Готовый JSON таблицы с ETag; при совпадении версии отдаётся 304"""
+    etag = board.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=board.render(view), media_type="application/json", headers=headers)
+
+
+@router.get("/{event_id}/problems", response_model=List[ContestProblemResponse])
+async def get_problems(event_id: str, db: Session = Depends(get_db)):
+    """Задачи соревнования"""
+    return await run_sync(contest.get_problems, db, event_id)
+
+
+@router.put("/{event_id}/problems", response_model=List[ContestProblemResponse])
+async def set_problems(
+        event_id: str,
+        data: ContestProblemsUpdate,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Задать задачи соревнования (только для организатора, до первой посылки)"""
+    _require_organizer(current_user)
+    return await run_sync(contest.set_problems, db, event_id, current_user.id, data.problems)
+
+
+@router.post("/{event_id}/submissions", response_model=SubmissionsAccepted)
+async def submit(
+        event_id: str,
+        batch: SubmissionsBatch,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Приём посылок от проверяющей системы (токен организатора)"""
+    _require_organizer(current_user)
+    return await run_sync(contest.submit, db, event_id, current_user.id, batch.submissions)
+
+
+@router.get("/{event_id}/standings")
+async def get_standings(event_id: str, request: Request, db: Session = Depends(get_db)):
+    """Публичная таблица результатов с учётом заморозки"""
+    board = await run_sync(contest.get_scoreboard, db, event_id)
+    return _standings_response(request, board, PUBLIC)
+
+
+@router.get("/{event_id}/standings/full")
+async def get_full_standings(
+        event_id: str,
+        request: Request,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Полная таблица без заморозки (только для организатора)"""
+    _require_organizer(current_user)
+    board = await run_sync(contest.get_organizer_scoreboard, db, event_id, current_user.id)
+    return _standings_response(request, board, FULL)
+
+
+@router.post("/{event_id}/freeze")
+async def freeze_standings(
+        event_id: str,
+        data: FreezeRequest,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Заморозить публичную таблицу (только для организатора)"""
+    _require_organizer(current_user)
+    board = await run_sync(contest.set_freeze, db, event_id, current_user.id, data.frozen_at or datetime.now(timezone.utc))
+    return {"frozen_at": board.frozen_at, "version": board.version}
+
+
+@router.delete("/{event_id}/freeze")
+async def unfreeze_standings(
+        event_id: str,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Раскрыть замороженную таблицу (только для организатора)"""
+    _require_organizer(current_user)
+    board = await run_sync(contest.set_freeze, db, event_id, current_user.id, None)
+    return {"frozen_at": None, "version": board.version}
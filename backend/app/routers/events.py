@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
+from fastapi.responses import StreamingResponse
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
+import asyncio
+import json
 import shutil
 import os
 import uuid
@@ -8,51 +11,100 @@ from pathlib import Path
 
 from app.database import get_db
 from app.models.event import EventStatus, EventType, DifficultyLevel
-from app.models.user import User, UserRole
+from app.models.user import UserRole
+from app.schemas.user import CurrentUser
 from app.schemas.event import (
     EventCreate,
     EventUpdate,
     EventResponse,
     EventDetailResponse,
-    EventStats
+    EventStats,
+    RegistrationTicketResponse,
+    RosterRegistration,
+    RosterRegistrationResult,
+    EventChangesResponse
 )
 from app.services.event import (
     create_event,
     get_event,
+    get_event_detail,
     update_event,
     delete_event,
     get_events,
-    register_for_event,
     unregister_from_event,
     get_event_participants,
+    export_event_participants,
     get_user_events,
-    get_events_stats
+    get_waitlist_position,
+    get_events_stats,
+    get_event_changes,
+    register_roster
 )
+from app.services.admission import get_ticket, request_registration
+from app.services.event_cache import events_cache, list_key, detail_key, stats_key
+from app.services.live import live_updates, load_live_state
 from app.utils.auth import get_current_user
+from app.utils.concurrency import run_sync
+from app.utils.dates import to_utc
+from app.utils.pagination import next_cursor
+from app.config import settings
 
 router = APIRouter(
     prefix="/api/events",
     tags=["События"]
 )
 
+# Заголовок, в котором возвращается курсор следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 # Создаем директорию для загруженных изображений
 UPLOAD_DIR = Path("uploads/events")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
+# Публичные ответы кэшируются уже сериализованными, поэтому загрузка и
+# сериализация выполняются вместе в пуле потоков. Поколение кэша берётся до
+# загрузки: ответ, прочитанный до параллельной записи, не попадёт в кэш
+def _load_events_page(db: Session, filters: Dict[str, Any]) -> Dict[str, Any]:
+    events = get_events(db, **filters)
+    return {
+        "items": [EventResponse.model_validate(event, from_attributes=True).model_dump(mode="json") for event in events],
+        "next_cursor": None if filters["search"] else next_cursor(events, filters["limit"], "created_at"),
+    }
+
+
+def _load_event_detail(db: Session, event_id: str) -> Dict[str, Any]:
+    return EventDetailResponse.model_validate(get_event_detail(db, event_id), from_attributes=True).model_dump(mode="json")
+
+
+def _load_events_stats(db: Session) -> Dict[str, Any]:
+    return EventStats.model_validate(get_events_stats(db), from_attributes=True).model_dump(mode="json")
+
+
+def _load_event_changes(db: Session, since: int, limit: int) -> Dict[str, Any]:
+    return EventChangesResponse.model_validate(get_event_changes(db, since, limit), from_attributes=True).model_dump(mode="json")
+
+
+def _save_upload(upload: UploadFile, path: Path) -> None:
+    with open(path, "wb") as buffer:
+        shutil.copyfileobj(upload.file, buffer)
+
+
 @router.post("", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_event(
         name: str = Form(...),
         description: Optional[str] = Form(None),
         date: str = Form(...),
+        registration_deadline: Optional[str] = Form(None),
         location: Optional[str] = Form(None),
         is_online: bool = Form(False),
         max_participants: int = Form(100),
         difficulty_level: DifficultyLevel = Form(DifficultyLevel.MEDIUM),
         event_type: EventType = Form(EventType.COMPETITION),
+        admission_control: bool = Form(False),
         image: Optional[UploadFile] = File(None),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Создание нового мероприятия (только для организаторов)"""
     if current_user.role != UserRole.SPONSOR:
@@ -64,13 +116,21 @@ async def create_new_event(
     # Конвертируем дату из строки в datetime
     from datetime import datetime
     try:
-        event_date = datetime.fromisoformat(date.replace('Z', '+00:00'))
+        # Даты хранятся в UTC без часового пояса
+        event_date = to_utc(datetime.fromisoformat(date.replace('Z', '+00:00')))
+        deadline = to_utc(datetime.fromisoformat(registration_deadline.replace('Z', '+00:00'))) if registration_deadline else None
     except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Неверный формат даты. Используйте формат ISO (YYYY-MM-DD)"
         )
 
+    if deadline and deadline > event_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Дедлайн регистрации должен быть раньше даты мероприятия"
+        )
+
     # Обрабатываем загрузку изображения
     image_filename = None
     image_url = None
@@ -81,8 +141,7 @@ async def create_new_event(
         image_path = UPLOAD_DIR / filename
 
         # Сохраняем файл
-        with open(image_path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
+        await run_sync(_save_upload, image, image_path)
 
         # Формируем URL для изображения
         image_filename = filename
@@ -93,24 +152,28 @@ async def create_new_event(
         name=name,
         description=description,
         date=event_date,
+        registration_deadline=deadline,
         location=location,
         is_online=is_online,
         max_participants=max_participants,
         difficulty_level=difficulty_level,
         event_type=event_type,
+        admission_control=admission_control,
         tags=[]  # Теги добавим отдельным запросом
     )
 
     # Вызываем сервис для создания события с дополнительными параметрами
-    event = create_event(db, event_data, current_user.id, image_filename, image_url)
+    event = await run_sync(create_event, db, event_data, current_user.id, image_filename, image_url)
 
     return event
 
 
 @router.get("", response_model=List[EventResponse])
 async def read_events(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
         status: Optional[EventStatus] = None,
         event_type: Optional[EventType] = None,
         difficulty_level: Optional[DifficultyLevel] = None,
@@ -118,17 +181,31 @@ async def read_events(
         organizer_id: Optional[str] = None,
         db: Session = Depends(get_db)
 ):
-    """Получение списка мероприятий с фильтрацией"""
-    return get_events(
-        db,
-        skip=skip,
-        limit=limit,
-        status=status,
-        event_type=event_type,
-        difficulty_level=difficulty_level,
-        search=search,
-        organizer_id=organizer_id
-    )
+    """Получение списка мероприятий с фильтрацией
+
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor.
+    Поисковая выдача сортируется по релевантности и листается через skip.
+    """
+    filters = {
+        "skip": skip,
+        "limit": limit,
+        "cursor": cursor,
+        "status": status,
+        "event_type": event_type,
+        "difficulty_level": difficulty_level,
+        "search": search,
+        "organizer_id": organizer_id,
+    }
+
+    key = list_key(**filters)
+    page = events_cache.get(key)
+    if page is None:
+        page = await run_sync(_load_events_page, db, filters)
+        events_cache.set(key, page)
+
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return page["items"]
 
 
 @router.get("/stats", response_model=EventStats)
@@ -136,28 +213,58 @@ async def read_events_stats(
         db: Session = Depends(get_db)
 ):
     """Получение статистики по мероприятиям"""
-    return get_events_stats(db)
+    key = stats_key()
+    stats = events_cache.get(key)
+    if stats is None:
+        stats = await run_sync(_load_events_stats, db)
+        events_cache.set(key, stats)
+    return stats
 
 
 @router.get("/my", response_model=List[EventResponse])
 async def read_my_events(
+        response: Response,
         skip: int = Query(0, ge=0),
         limit: int = Query(20, ge=1, le=100),
+        cursor: Optional[str] = None,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получение мероприятий текущего пользователя"""
     if current_user.role == UserRole.SPONSOR:
         # Для организаторов показываем созданные мероприятия
-        return get_events(
+        events = await run_sync(
+            get_events,
             db,
             skip=skip,
             limit=limit,
-            organizer_id=current_user.id
+            organizer_id=current_user.id,
+            cursor=cursor
         )
+        cursor_value = next_cursor(events, limit, "created_at")
     else:
         # Для спортсменов показываем мероприятия, на которые они зарегистрированы
-        return get_user_events(db, current_user.id, skip, limit)
+        events = await run_sync(get_user_events, db, current_user.id, skip, limit, cursor)
+        cursor_value = next_cursor(events, limit, "date")
+
+    if cursor_value:
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    return events
+
+
+@router.get("/changes", response_model=EventChangesResponse)
+async def read_event_changes(
+        since: int = Query(0, ge=0),
+        limit: int = Query(500, ge=1, le=1000),
+        db: Session = Depends(get_db)
+):
+    """Изменения каталога мероприятий после номера since
+
+    Клиент начинает с since=0 и дальше передаёт next_since из ответа,
+    пока has_more истинно. Объявлен до /{event_id}, чтобы путь не
+    перехватывался карточкой мероприятия.
+    """
+    return await run_sync(_load_event_changes, db, since, limit)
 
 
 @router.get("/{event_id}", response_model=EventDetailResponse)
@@ -166,7 +273,56 @@ async def read_event(
         db: Session = Depends(get_db)
 ):
     """Получение информации о мероприятии по ID"""
-    return get_event(db, event_id)
+    key = detail_key(event_id)
+    event = events_cache.get(key)
+    if event is None:
+        event = await run_sync(_load_event_detail, db, event_id)
+        events_cache.set(key, event)
+    return event
+
+
+def _sse(state: Dict[str, Any]) -> str:
+    return f"event: state\ndata: {json.dumps(state, ensure_ascii=False)}\n\n"
+
+
+@router.get("/{event_id}/live")
+async def stream_event_updates(event_id: str):
+    """Живые обновления мероприятия (Server-Sent Events)
+
+    Сразу после подключения приходит текущее состояние, затем — новое
+    состояние после регистраций, отмен и правок, не чаще LIVE_PUSH_INTERVAL.
+    """
+    if await run_sync(load_live_state, event_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Мероприятие не найдено"
+        )
+
+    async def stream():
+        # Сначала подписка, потом снимок: изменение между ними придёт
+        # обновлением, а не потеряется
+        async with live_updates.subscribe(event_id) as updates:
+            state = await run_sync(load_live_state, event_id)
+            if state is None:
+                yield _sse({"event_id": event_id, "deleted": True, "changed": []})
+                return
+            yield _sse(state)
+            while True:
+                try:
+                    update = await asyncio.wait_for(updates.get(), timeout=settings.LIVE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Комментарий не даёт прокси закрыть простаивающее соединение
+                    yield ": keepalive\n\n"
+                    continue
+                yield _sse(update)
+                if update.get("deleted"):
+                    return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.put("/{event_id}", response_model=EventResponse)
@@ -174,10 +330,10 @@ async def update_event_details(
         event_id: str,
         event_data: EventUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновление информации о мероприятии (только для организатора)"""
-    event = get_event(db, event_id)
+    event = await run_sync(get_event, db, event_id)
 
     if event.organizer_id != current_user.id:
         raise HTTPException(
@@ -185,17 +341,17 @@ async def update_event_details(
             detail="Только организатор может редактировать мероприятие"
         )
 
-    return update_event(db, event_id, event_data, current_user.id)
+    return await run_sync(update_event, db, event_id, event_data, current_user.id)
 
 
 @router.delete("/{event_id}", response_model=Dict[str, Any])
 async def delete_event_by_id(
         event_id: str,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Удаление мероприятия (только для организатора)"""
-    event = get_event(db, event_id)
+    event = await run_sync(get_event, db, event_id)
 
     if event.organizer_id != current_user.id:
         raise HTTPException(
@@ -203,7 +359,7 @@ async def delete_event_by_id(
             detail="Только организатор может удалить мероприятие"
         )
 
-    delete_event(db, event_id, current_user.id)
+    await run_sync(delete_event, db, event_id, current_user.id)
 
     return {
         "success": True,
@@ -215,27 +371,82 @@ async def delete_event_by_id(
 @router.post("/{event_id}/register", response_model=Dict[str, Any])
 async def register_user_for_event(
         event_id: str,
+        response: Response,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Регистрация пользователя на мероприятие"""
+    """Регистрация пользователя на мероприятие
+
+    Для мероприятий с очередью допуска возвращается 202 и заявка,
+    статус которой можно запрашивать по ticket_id. Если мест нет,
+    пользователь встаёт в лист ожидания (тоже 202) и будет зарегистрирован
+    автоматически, когда место освободится.
+    """
     if current_user.role != UserRole.SPORTSMAN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Только спортсмены могут регистрироваться на мероприятия"
         )
 
-    return register_for_event(db, event_id, current_user.id)
+    result = await run_sync(request_registration, db, event_id, current_user.id)
+    if "ticket_id" in result:
+        response.status_code = status.HTTP_202_ACCEPTED
+        result = RegistrationTicketResponse(**result).model_dump(mode="json")
+    elif result.get("waitlisted"):
+        response.status_code = status.HTTP_202_ACCEPTED
+    return result
+
+
+@router.post("/{event_id}/register/roster", response_model=RosterRegistrationResult)
+async def register_roster_for_event(
+        event_id: str,
+        roster: RosterRegistration,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Регистрация команды региона списком id или email участников
+
+    Возвращает итог по каждому участнику: зарегистрирован, добавлен в
+    лист ожидания или отклонён с причиной.
+    """
+    if current_user.role != UserRole.REGION:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Регистрировать команды могут только представители регионов"
+        )
+
+    return await run_sync(register_roster, db, event_id, roster.user_ids, roster.emails)
+
+
+@router.get("/{event_id}/waitlist/me", response_model=Dict[str, Any])
+async def read_my_waitlist_position(
+        event_id: str,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Место текущего пользователя в листе ожидания мероприятия"""
+    return await run_sync(get_waitlist_position, db, event_id, current_user.id)
+
+
+@router.get("/{event_id}/register/tickets/{ticket_id}", response_model=RegistrationTicketResponse)
+async def read_registration_ticket(
+        event_id: str,
+        ticket_id: int,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Статус заявки на регистрацию в очереди мероприятия"""
+    return await run_sync(get_ticket, db, event_id, ticket_id, current_user.id)
 
 
 @router.delete("/{event_id}/register", response_model=Dict[str, Any])
 async def unregister_user_from_event(
         event_id: str,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Отмена регистрации пользователя на мероприятие"""
-    return unregister_from_event(db, event_id, current_user.id)
+    return await run_sync(unregister_from_event, db, event_id, current_user.id)
 
 
 @router.get("/{event_id}/participants", response_model=List[Dict[str, Any]])
@@ -244,10 +455,10 @@ async def read_event_participants(
         skip: int = Query(0, ge=0),
         limit: int = Query(50, ge=1, le=200),
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получение списка участников мероприятия"""
-    event = get_event(db, event_id)
+    event = await run_sync(get_event, db, event_id)
 
     # Для публичных мероприятий показываем только количество
     is_organizer = event.organizer_id == current_user.id
@@ -258,7 +469,7 @@ async def read_event_participants(
             detail="Нет доступа к черновику мероприятия"
         )
 
-    participants = get_event_participants(db, event_id, skip, limit)
+    participants = await run_sync(get_event_participants, db, event_id, skip, limit)
 
     # Для организатора показываем полную информацию
     if is_organizer:
@@ -279,4 +490,32 @@ async def read_event_participants(
             "full_name": participant.full_name
         }
         for participant in participants
-    ]
\ No newline at end of file
+    ]
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+
+@router.get("/{event_id}/participants/export")
+async def export_participants(
+        event_id: str,
+        export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Выгрузка всех участников мероприятия одним потоком (только для организатора)"""
+    event = await run_sync(get_event, db, event_id)
+
+    if event.organizer_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только организатор может выгружать участников"
+        )
+
+    return StreamingResponse(
+        export_event_participants(event_id, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="participants-{event_id}.{export_format}"'}
+    )
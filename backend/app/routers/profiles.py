@@ -6,44 +6,75 @@ from app.database import get_db
 from app.schemas.profile import (
     SportsmanProfileUpdate, SponsorProfileUpdate, RegionProfileUpdate,
     SportsmanProfileResponse, SponsorProfileResponse, RegionProfileResponse,
-    UserProfileResponse
+    UserProfileResponse, ProfilesBatchRequest
 )
 from app.services.profile import (
     get_sportsman_profile, update_sportsman_profile,
     get_sponsor_profile, update_sponsor_profile,
     get_region_profile, update_region_profile,
-    get_user_profile
+    get_user_profile, get_user_profiles, profile_for_viewer
 )
+from app.services.profile_cache import profiles_cache, profile_key
 from app.utils.auth import get_current_user
-from app.models.user import User, UserRole
+from app.utils.concurrency import run_sync
+from app.models.user import UserRole
+from app.schemas.user import CurrentUser
 
 router = APIRouter(prefix="/api/profiles", tags=["Профили"])
 
 
+async def _read_profile(db: Session, user_id: str) -> Dict[str, Any]:
+    """Профиль из кэша; при промахе загружается в пуле потоков"""
+    key = profile_key(user_id)
+    profile = profiles_cache.get(key)
+    if profile is None:
+        generation = profiles_cache.generation()
+        profile = await run_sync(get_user_profile, db, user_id)
+        profiles_cache.set(key, profile, generation=generation)
+    return profile
+
+
 @router.get("/me", response_model=Dict[str, Any])
 async def get_my_profile(
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Получение профиля текущего пользователя"""
-    return get_user_profile(db, current_user.id)
+    return await _read_profile(db, current_user.id)
+
+
+@router.post("/batch", response_model=List[Dict[str, Any]])
+async def get_profiles_batch(
+        request: ProfilesBatchRequest,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Профили нескольких пользователей одним запросом
+
+    Email и контакты возвращаются только в профиле самого пользователя,
+    неизвестные id пропускаются.
+    """
+    return await run_sync(get_user_profiles, db, request.user_ids, current_user.id)
 
 
 @router.get("/{user_id}", response_model=Dict[str, Any])
 async def get_profile(
         user_id: str,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
-    """Получение профиля пользователя по ID"""
-    return get_user_profile(db, user_id)
+    """Получение профиля пользователя по ID
+
+    Email и контакты возвращаются только в профиле самого пользователя.
+    """
+    return profile_for_viewer(await _read_profile(db, user_id), current_user.id)
 
 
 @router.put("/sportsman", response_model=SportsmanProfileResponse)
 async def update_my_sportsman_profile(
         profile_data: SportsmanProfileUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновление профиля спортсмена для текущего пользователя"""
     if current_user.role != UserRole.SPORTSMAN:
@@ -52,14 +83,14 @@ async def update_my_sportsman_profile(
             detail="Доступ запрещен. Профиль только для спортсмена."
         )
 
-    return update_sportsman_profile(db, current_user.id, profile_data)
+    return await run_sync(update_sportsman_profile, db, current_user.id, profile_data)
 
 
 @router.put("/sponsor", response_model=SponsorProfileResponse)
 async def update_my_sponsor_profile(
         profile_data: SponsorProfileUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновление профиля организатора для текущего пользователя"""
     if current_user.role != UserRole.SPONSOR:
@@ -68,14 +99,14 @@ async def update_my_sponsor_profile(
             detail="Доступ запрещен. Профиль только для организатора."
         )
 
-    return update_sponsor_profile(db, current_user.id, profile_data)
+    return await run_sync(update_sponsor_profile, db, current_user.id, profile_data)
 
 
 @router.put("/region", response_model=RegionProfileResponse)
 async def update_my_region_profile(
         profile_data: RegionProfileUpdate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        current_user: CurrentUser = Depends(get_current_user)
 ):
     """Обновление профиля представителя региона для текущего пользователя"""
     if current_user.role != UserRole.REGION:
@@ -84,4 +115,4 @@ async def update_my_region_profile(
             detail="Доступ запрещен. Профиль только для представителя региона."
         )
 
-    return update_region_profile(db, current_user.id, profile_data)
\ No newline at end of file
+    return await run_sync(update_region_profile, db, current_user.id, profile_data)
\ No newline at end of file
@@ -1,12 +1,101 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from sqlalchemy.orm import Session
+from typing import List
+
 from app.database import get_db
+from app.models.user import UserRole
+from app.schemas.rating import EventResultsSubmit, RatingEntry, RatingsUpdateSummary, ResultsUploadSummary
+from app.schemas.user import CurrentUser
+from app.services.leaderboard import leaderboard
+from app.services.rating import record_event_results, upload_event_results
+from app.utils.auth import get_current_user
+from app.utils.concurrency import run_sync
 
 router = APIRouter(
     prefix="/api/ratings",
     tags=["Рейтинги"]
 )
 
-@router.get("/")
-async def get_ratings(db: Session = Depends(get_db)):
-    return {"message": "Рейтинги работают"}
\ No newline at end of file
+
+def _require_organizer(current_user: CurrentUser) -> None:
+    if current_user.role != UserRole.SPONSOR:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Только организаторы могут загружать результаты"
+        )
+
+
+def _get_entry(user_id: str) -> dict:
+    entry = leaderboard.get(user_id)
+    if entry is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Спортсмен ещё не участвовал в рейтинговых мероприятиях"
+        )
+    return entry
+
+
+@router.get("/", response_model=List[RatingEntry])
+async def get_ratings(
+        skip: int = Query(0, ge=0),
+        limit: int = Query(50, ge=1, le=200)
+):
+    """Рейтинг спортсменов"""
+    return leaderboard.top(skip, limit)
+
+
+@router.get("/me", response_model=RatingEntry)
+async def get_my_rating(current_user: CurrentUser = Depends(get_current_user)):
+    """Место текущего пользователя в рейтинге"""
+    return _get_entry(current_user.id)
+
+
+@router.get("/me/around", response_model=List[RatingEntry])
+async def get_my_neighbours(
+        radius: int = Query(5, ge=0, le=50),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Текущий пользователь и его соседи по рейтингу"""
+    _get_entry(current_user.id)
+    return leaderboard.around(current_user.id, radius)
+
+
+@router.get("/users/{user_id}", response_model=RatingEntry)
+async def get_user_rating(user_id: str):
+    """Место спортсмена в рейтинге"""
+    return _get_entry(user_id)
+
+
+@router.get("/users/{user_id}/around", response_model=List[RatingEntry])
+async def get_user_neighbours(user_id: str, radius: int = Query(5, ge=0, le=50)):
+    """Спортсмен и его соседи по рейтингу"""
+    _get_entry(user_id)
+    return leaderboard.around(user_id, radius)
+
+
+@router.post("/events/{event_id}/results", response_model=RatingsUpdateSummary)
+async def submit_event_results(
+        event_id: str,
+        submission: EventResultsSubmit,
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Загрузка итоговых мест мероприятия и пересчёт рейтинга участников (только для организатора)"""
+    _require_organizer(current_user)
+    return await run_sync(record_event_results, db, event_id, current_user.id, submission.results)
+
+
+@router.post("/events/{event_id}/results/upload", response_model=ResultsUploadSummary)
+async def upload_results_file(
+        event_id: str,
+        file: UploadFile = File(...),
+        db: Session = Depends(get_db),
+        current_user: CurrentUser = Depends(get_current_user)
+):
+    """Загрузка итоговых мест файлом CSV или NDJSON (только для организатора)
+
+    Файл читается построчно и обрабатывается частями, поэтому объём
+    не ограничен памятью сервера.
+    """
+    _require_organizer(current_user)
+    return await run_sync(upload_event_results, db, event_id, current_user.id, file.file, file.filename)
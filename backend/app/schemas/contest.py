@@ -0,0 +1,40 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+from datetime import datetime
+from app.models.contest import Verdict
+
+
+class ContestProblemCreate(BaseModel):
+    label: str = Field(..., min_length=1, max_length=8)
+    title: Optional[str] = None
+
+
+class ContestProblemResponse(ContestProblemCreate):
+    id: str
+    position: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ContestProblemsUpdate(BaseModel):
+    problems: List[ContestProblemCreate] = Field(..., min_length=1)
+
+
+class SubmissionCreate(BaseModel):
+    user_id: str
+    problem: str  # буква задачи
+    verdict: Verdict
+    submitted_at: Optional[datetime] = None  # по умолчанию — время приёма посылки
+
+
+class SubmissionsBatch(BaseModel):
+    submissions: List[SubmissionCreate] = Field(..., min_length=1)
+
+
+class SubmissionsAccepted(BaseModel):
+    accepted: int
+    version: int
+
+
+class FreezeRequest(BaseModel):
+    frozen_at: Optional[datetime] = None  # по умолчанию — текущий момент
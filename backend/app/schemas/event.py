@@ -1,7 +1,10 @@
-from pydantic import BaseModel, Field, validator
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field, field_validator, validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+from app.utils.dates import to_utc
 from app.models.event import EventStatus, EventType, DifficultyLevel
+from app.models.admission import TicketStatus
+from app.models.changes import ChangeOperation
 
 
 # Базовые схемы для тегов
@@ -16,8 +19,7 @@ class TagCreate(TagBase):
 class TagResponse(TagBase):
     id: str
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Базовые схемы для мероприятий
@@ -31,8 +33,15 @@ class EventBase(BaseModel):
     max_participants: int = Field(100, ge=1)
     event_type: EventType = EventType.COMPETITION
     difficulty_level: DifficultyLevel = DifficultyLevel.MEDIUM
+    admission_control: bool = False
     image_url: Optional[str] = None
 
+    @field_validator('date', 'registration_deadline')
+    @classmethod
+    def convert_to_utc(cls, v):
+        # Даты хранятся в UTC без часового пояса
+        return to_utc(v)
+
     @validator('registration_deadline')
     def deadline_must_be_before_date(cls, v, values):
         if v and 'date' in values and v > values['date']:
@@ -54,6 +63,7 @@ class EventUpdate(BaseModel):
     max_participants: Optional[int] = None
     event_type: Optional[EventType] = None
     difficulty_level: Optional[DifficultyLevel] = None
+    admission_control: Optional[bool] = None
     status: Optional[EventStatus] = None
     image_url: Optional[str] = None
     tags: Optional[List[str]] = None
@@ -64,6 +74,12 @@ class EventUpdate(BaseModel):
             raise ValueError('Максимальное количество участников должно быть положительным')
         return v
 
+    @field_validator('date', 'registration_deadline')
+    @classmethod
+    def convert_to_utc(cls, v):
+        # Даты хранятся в UTC без часового пояса
+        return to_utc(v)
+
     @validator('registration_deadline')
     def deadline_must_be_before_date(cls, v, values):
         if v and 'date' in values and values['date'] and v > values['date']:
@@ -80,29 +96,27 @@ class EventResponse(EventBase):
     current_participants: int
     tags: List[TagResponse] = []
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class EventDetailResponse(EventResponse):
-    organizer: Optional[Dict[str, Any]] = None
-
-    class Config:
-        orm_mode = True
-
-        @staticmethod
-        def schema_extra(schema: Dict[str, Any], model) -> None:
-            if "properties" in schema:
-                schema["properties"]["organizer"] = {
-                    "title": "Organizer",
-                    "type": "object",
-                    "properties": {
-                        "id": {"type": "string"},
-                        "full_name": {"type": "string"},
-                        "email": {"type": "string"},
-                        "organization_name": {"type": "string"}
-                    }
+    organizer: Optional[Dict[str, Any]] = Field(None, validation_alias=AliasChoices("organizer_dict", "organizer"))
+
+    @staticmethod
+    def _organizer_schema(schema: Dict[str, Any], model) -> None:
+        if "properties" in schema:
+            schema["properties"]["organizer"] = {
+                "title": "Organizer",
+                "type": "object",
+                "properties": {
+                    "id": {"type": "string"},
+                    "full_name": {"type": "string"},
+                    "email": {"type": "string"},
+                    "organization_name": {"type": "string"}
                 }
+            }
+
+    model_config = ConfigDict(from_attributes=True, json_schema_extra=_organizer_schema)
 
 
 # Схема для регистрации на мероприятие
@@ -118,5 +132,47 @@ class EventStats(BaseModel):
     popular_tags: List[Dict[str, Any]]
     recent_events: List[EventResponse]
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+class RegistrationTicketResponse(BaseModel):
+    ticket_id: int
+    event_id: str
+    status: TicketStatus
+    detail: Optional[str] = None
+    position: Optional[int] = None  # место в очереди, пока заявка не обработана
+
+
+# Регистрация сборной региона одним запросом
+class RosterRegistration(BaseModel):
+    user_ids: List[str] = []
+    emails: List[str] = []
+
+
+class RosterEntryResult(BaseModel):
+    user: str  # идентификатор в том виде, в котором он пришёл в запросе
+    user_id: Optional[str] = None
+    status: TicketStatus
+    detail: Optional[str] = None
+
+
+class RosterRegistrationResult(BaseModel):
+    event_id: str
+    registered: int
+    waitlisted: int
+    rejected: int
+    results: List[RosterEntryResult]
+
+
+# Журнал изменений для инкрементальной синхронизации каталога
+class EventChangeEntry(BaseModel):
+    seq: int
+    event_id: str
+    operation: ChangeOperation
+    fields: List[str] = []  # для обновлений — какие поля изменились
+    event: Optional[EventResponse] = None  # текущее состояние, кроме удалённых
+
+
+class EventChangesResponse(BaseModel):
+    changes: List[EventChangeEntry]
+    next_since: int  # передать как since в следующем запросе
+    has_more: bool
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
 
+from app.config import settings
+
 # Базовые схемы
 class ProfileBase(BaseModel):
     user_id: str
@@ -28,8 +30,7 @@ class SportsmanProfileResponse(ProfileBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Схемы для организатора
 class SponsorProfileCreate(ProfileBase):
@@ -57,8 +58,7 @@ class SponsorProfileResponse(ProfileBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Схемы для представителя региона
 class RegionProfileCreate(ProfileBase):
@@ -87,8 +87,7 @@ class RegionProfileResponse(ProfileBase):
     created_at: datetime
     updated_at: Optional[datetime] = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Общая схема профиля для отправки клиенту
 class UserProfileResponse(BaseModel):
@@ -99,5 +98,8 @@ class UserProfileResponse(BaseModel):
     profile_data: dict
     created_at: datetime
 
-    class Config:
-        orm_mode = True
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# Запрос профилей сразу нескольких пользователей
+class ProfilesBatchRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=settings.PROFILES_BATCH_MAX_SIZE)
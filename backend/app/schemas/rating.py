@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class EventResultCreate(BaseModel):
+    user_id: str
+    place: int = Field(..., ge=1)
+    score: Optional[float] = None
+
+
+class EventResultsSubmit(BaseModel):
+    results: List[EventResultCreate] = Field(..., min_length=2)
+
+
+class RatingEntry(BaseModel):
+    rank: int
+    user_id: str
+    full_name: Optional[str] = None
+    rating: int
+    wins: int
+    completed_events: int
+
+
+class RatingsUpdateSummary(BaseModel):
+    event_id: str
+    participants: int
+    rating_changes: List[dict]
+
+
+class ResultsUploadSummary(BaseModel):
+    event_id: str
+    participants: int
+    winners: int
+    top_gainers: List[dict]
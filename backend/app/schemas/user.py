@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, validator
 from typing import Optional
 from datetime import datetime
 from app.models.user import UserRole
@@ -30,6 +30,11 @@ class UserRegistration(UserBase):
 
 
 
+class UserUpdate(BaseModel):
+    full_name: Optional[str] = Field(None, min_length=2, max_length=100)
+
+
+
 class UserResponse(BaseModel):
     id: str
     full_name: str
@@ -37,8 +42,17 @@ class UserResponse(BaseModel):
     role: UserRole
     created_at: datetime
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+
+# Данные аутентифицированного пользователя, которые кэшируются по токену
+class CurrentUser(BaseModel):
+    id: str
+    full_name: Optional[str] = None
+    email: Optional[str] = None
+    role: UserRole
+    is_active: bool = True
 
 
 
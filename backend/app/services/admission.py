@@ -0,0 +1,193 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.admission import RegistrationTicket, TicketStatus
+from app.services.event import (
+    EVENT_FULL, AdmissionQueueRequired, add_to_waitlist, register_for_event, register_users_batch
+)
+from app.services.event_cache import invalidate_event
+from app.services.live import live_updates
+from app.utils.concurrency import run_sync
+
+ACTIVE_STATUSES = (TicketStatus.QUEUED, TicketStatus.PROCESSING)
+
+
+def _ticket_response(db: Session, ticket: RegistrationTicket) -> Dict[str, Any]:
+    position = None
+    if ticket.status in ACTIVE_STATUSES:
+        position = db.query(func.count(RegistrationTicket.id)).filter(
+            RegistrationTicket.event_id == ticket.event_id,
+            RegistrationTicket.status.in_(ACTIVE_STATUSES),
+            RegistrationTicket.id < ticket.id
+        ).scalar() + 1
+
+    return {
+        "ticket_id": ticket.id,
+        "event_id": ticket.event_id,
+        "status": ticket.status,
+        "detail": ticket.detail,
+        "position": position
+    }
+
+
+def enqueue_registration(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
+    """Поставить заявку в очередь; повторный запрос возвращает уже выданную заявку"""
+    ticket = db.query(RegistrationTicket).filter(
+        RegistrationTicket.event_id == event_id,
+        RegistrationTicket.user_id == user_id,
+        RegistrationTicket.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+    if ticket is None:
+        ticket = RegistrationTicket(event_id=event_id, user_id=user_id, status=TicketStatus.QUEUED)
+        db.add(ticket)
+        db.commit()
+
+    return _ticket_response(db, ticket)
+
+
+def request_registration(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
+    """Зарегистрировать сразу или, если у мероприятия включена очередь, выдать заявку"""
+    try:
+        return register_for_event(db, event_id, user_id)
+    except AdmissionQueueRequired:
+        db.rollback()
+        return enqueue_registration(db, event_id, user_id)
+
+
+def get_ticket(db: Session, event_id: str, ticket_id: int, user_id: str) -> Dict[str, Any]:
+    ticket = db.query(RegistrationTicket).filter(
+        RegistrationTicket.id == ticket_id,
+        RegistrationTicket.event_id == event_id,
+        RegistrationTicket.user_id == user_id
+    ).first()
+
+    if ticket is None:
+        raise HTTPException(status_code=404, detail="Заявка не найдена")
+    return _ticket_response(db, ticket)
+
+
+def _ticket_status(reason) -> TicketStatus:
+    if reason is None:
+        return TicketStatus.REGISTERED
+    if reason == EVENT_FULL:
+        return TicketStatus.WAITLISTED
+    return TicketStatus.REJECTED
+
+
+def _admit_batch(db: Session, event_id: str) -> int:
+    """Обработать следующую пачку заявок мероприятия одной транзакцией"""
+    claim = uuid.uuid4().hex
+    batch = db.query(RegistrationTicket.id).filter(
+        RegistrationTicket.event_id == event_id,
+        RegistrationTicket.status == TicketStatus.QUEUED
+    ).order_by(RegistrationTicket.id).limit(settings.ADMISSION_BATCH_SIZE).scalar_subquery()
+
+    # Захват условным UPDATE: параллельный воркер не заберёт те же заявки
+    db.execute(
+        update(RegistrationTicket).where(
+            RegistrationTicket.id.in_(batch),
+            RegistrationTicket.status == TicketStatus.QUEUED
+        ).values(
+            status=TicketStatus.PROCESSING,
+            claim=claim,
+            claimed_at=datetime.now(timezone.utc)
+        ).execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+    tickets = db.query(RegistrationTicket.id, RegistrationTicket.user_id).filter(
+        RegistrationTicket.claim == claim
+    ).order_by(RegistrationTicket.id).all()
+    if not tickets:
+        return 0
+
+    try:
+        outcome = register_users_batch(db, event_id, [ticket.user_id for ticket in tickets])
+    except HTTPException:
+        db.rollback()
+        db.execute(
+            update(RegistrationTicket).where(RegistrationTicket.claim == claim).values(
+                status=TicketStatus.QUEUED, claim=None, claimed_at=None
+            ).execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return 0
+
+    # Не хватившим мест достаётся очередь в листе ожидания, в порядке заявок
+    add_to_waitlist(db, event_id, [ticket.user_id for ticket in tickets if outcome[ticket.user_id] == EVENT_FULL])
+
+    now = datetime.now(timezone.utc)
+    tickets_table = RegistrationTicket.__table__
+    db.execute(
+        update(tickets_table).where(tickets_table.c.id == bindparam("ticket_id")).values(
+            status=bindparam("new_status"),
+            detail=bindparam("new_detail"),
+            processed_at=now
+        ),
+        [
+            {
+                "ticket_id": ticket.id,
+                "new_status": _ticket_status(outcome[ticket.user_id]),
+                "new_detail": outcome[ticket.user_id] or "Вы успешно зарегистрированы на мероприятие",
+            }
+            for ticket in tickets
+        ]
+    )
+    db.commit()
+
+    invalidate_event(event_id, ("current_participants",))
+    live_updates.publish(event_id, ("current_participants",))
+    return len(tickets)
+
+
+def drain_admission_queue() -> int:
+    """Обработать по одной пачке заявок каждого мероприятия с очередью
+
+    Заявки, захваченные упавшим воркером, возвращаются в очередь по истечении
+    ADMISSION_CLAIM_TIMEOUT. Возвращает число обработанных заявок.
+    """
+    db = SessionLocal()
+    try:
+        stale = datetime.now(timezone.utc) - timedelta(seconds=settings.ADMISSION_CLAIM_TIMEOUT)
+        db.execute(
+            update(RegistrationTicket).where(
+                RegistrationTicket.status == TicketStatus.PROCESSING,
+                RegistrationTicket.claimed_at < stale
+            ).values(
+                status=TicketStatus.QUEUED, claim=None, claimed_at=None
+            ).execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+        event_ids = [
+            row[0] for row in db.query(RegistrationTicket.event_id).filter(
+                RegistrationTicket.status == TicketStatus.QUEUED
+            ).distinct()
+        ]
+        return sum(_admit_batch(db, event_id) for event_id in event_ids)
+    finally:
+        db.close()
+
+
+async def admission_worker_loop() -> None:
+    """Разбор очередей допуска с постоянным темпом
+
+    За ADMISSION_INTERVAL обрабатывается не больше ADMISSION_BATCH_SIZE
+    заявок на мероприятие, поэтому нагрузка на строку мероприятия
+    ограничена независимо от числа желающих.
+    """
+    while True:
+        try:
+            await run_sync(drain_admission_queue)
+        except Exception as e:
+            print(f"Ошибка при обработке очереди регистраций: {e}")
+        await asyncio.sleep(settings.ADMISSION_INTERVAL)
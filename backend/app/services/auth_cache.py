@@ -0,0 +1,16 @@
+from app.config import settings
+from app.utils.cache import MemoryCache
+
+# Кэш проверенных токенов: "<user_id>:<токен>" -> снимок пользователя.
+# Всегда хранится в памяти процесса, чтобы токены не уходили во внешний кэш;
+# другие процессы узнают об изменении пользователя не позже AUTH_CACHE_TTL.
+auth_cache = MemoryCache("auth", settings.AUTH_CACHE_MAXSIZE, settings.AUTH_CACHE_TTL)
+
+
+def auth_key(user_id: str, token: str) -> str:
+    return f"{user_id}:{token}"
+
+
+def invalidate_user_cache(user_id: str) -> None:
+    """Сбросить закэшированные токены пользователя после его изменения или деактивации"""
+    auth_cache.delete_prefix(f"{user_id}:")
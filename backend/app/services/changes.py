@@ -0,0 +1,122 @@
+import asyncio
+from datetime import timedelta
+from typing import Dict, Iterable, Set, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Query, Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.changes import ChangeOperation, EventChange
+from app.models.event import Event
+from app.services.event_cache import invalidate_event
+from app.services.live import live_updates
+from app.utils.concurrency import run_sync
+
+
+def record_event_changes(db: Session, operation: ChangeOperation, event_ids: Iterable[str],
+                         fields: Iterable[str] = ()) -> None:
+    """Записать изменения мероприятий в журнал в рамках текущей транзакции
+
+    Номер seq выдаёт база при вставке, писатели друг друга не ждут.
+    Вызывается последним шагом транзакции перед commit: от вставки до
+    фиксации должно пройти меньше CHANGES_SETTLE_DELAY.
+    """
+    event_ids = list(dict.fromkeys(event_ids))
+    if not event_ids:
+        return
+
+    statement = insert(EventChange.__table__)
+    if db.get_bind().dialect.name != "sqlite":
+        # now() в PostgreSQL — начало транзакции, а задержка отсчитывается от вставки
+        statement = statement.values(changed_at=func.clock_timestamp())
+    fields = ",".join(sorted(fields)) or None
+    db.execute(statement, [
+        {"event_id": event_id, "operation": operation, "fields": fields}
+        for event_id in event_ids
+    ])
+
+
+def visible_changes(db: Session, since: int, *columns) -> Query:
+    """Записи журнала после since, которые уже не пропустят более ранних номеров
+
+    В SQLite писатель один, и номера становятся видны в порядке выдачи. На
+    других СУБД транзакция с меньшим номером может зафиксироваться позже,
+    поэтому чтение останавливается перед первой записью моложе
+    CHANGES_SETTLE_DELAY: всё, что вставлено раньше неё, уже зафиксировано.
+    """
+    query = db.query(*(columns or (EventChange,))).filter(EventChange.seq > since)
+    if db.get_bind().dialect.name != "sqlite":
+        settling = db.query(func.min(EventChange.seq)).filter(
+            EventChange.seq > since,
+            EventChange.changed_at > func.now() - timedelta(seconds=settings.CHANGES_SETTLE_DELAY)
+        ).scalar_subquery()
+        query = query.filter(EventChange.seq < func.coalesce(settling, EventChange.seq + 1))
+    return query.order_by(EventChange.seq)
+
+
+def backfill_event_changes() -> None:
+    """Заполнить пустой журнал записями о создании уже существующих мероприятий
+
+    Выполняется при старте один раз, после появления журнала, чтобы
+    синхронизация с since=0 отдавала весь каталог.
+    """
+    db = SessionLocal()
+    try:
+        if db.query(EventChange.seq).first() is None:
+            event_ids = [row[0] for row in db.query(Event.id).order_by(Event.created_at, Event.id)]
+            record_event_changes(db, ChangeOperation.INSERT, event_ids)
+            db.commit()
+    finally:
+        db.close()
+
+
+def read_changed_events(since: int) -> Tuple[int, Dict[str, Set[str]]]:
+    """Мероприятия, изменённые после since, с их полями и новым since, в отдельной сессии"""
+    db = SessionLocal()
+    try:
+        rows = visible_changes(db, since, EventChange.seq, EventChange.event_id, EventChange.fields).all()
+    finally:
+        db.close()
+
+    changed: Dict[str, Set[str]] = {}
+    for row in rows:
+        changed.setdefault(row.event_id, set()).update(row.fields.split(",") if row.fields else ())
+    return (rows[-1].seq if rows else since), changed
+
+
+def _latest_change_seq() -> int:
+    db = SessionLocal()
+    try:
+        # Начинать с последней видимой записи, а не с последней выданной
+        return visible_changes(db, 0, EventChange.seq).order_by(None).with_entities(
+            func.coalesce(func.max(EventChange.seq), 0)
+        ).scalar()
+    finally:
+        db.close()
+
+
+async def event_changes_follower_loop() -> None:
+    """Сбрасывать кэши процесса и рассылать живые обновления по журналу изменений
+
+    Запускается при старте приложения, когда планировщик работает отдельным
+    процессом (python -m app.cli run-scheduler): его сбросы кэша в памяти и
+    рассылки остаются в его процессе. Раз в CHANGES_FOLLOW_INTERVAL секунд
+    цикл читает новые записи журнала и повторяет их здесь. Число предстоящих
+    мероприятий меняется и без записей в журнале, для него статистика из
+    кэша в памяти отстаёт не больше чем на EVENTS_CACHE_TTL.
+    """
+    since = None
+    while True:
+        try:
+            if since is None:
+                since = await run_sync(_latest_change_seq)
+            else:
+                since, changed = await run_sync(read_changed_events, since)
+                for event_id, fields in changed.items():
+                    invalidate_event(event_id, fields)
+                    live_updates.publish(event_id, fields)
+        except Exception as e:
+            print(f"Ошибка чтения журнала изменений мероприятий: {e}")
+
+        await asyncio.sleep(settings.CHANGES_FOLLOW_INTERVAL)
@@ -0,0 +1,306 @@
+import asyncio
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.contest import ContestProblem, ScoreboardSnapshot, Submission
+from app.models.event import Event, EventType, event_participants
+from app.models.user import User
+from app.schemas.contest import ContestProblemCreate, SubmissionCreate
+from app.services.event import get_event
+from app.services.scoreboard import Scoreboard
+from app.services.sequence import allocate_sequence
+from app.utils.concurrency import run_sync
+from app.utils.dates import to_utc
+from app.utils.sql import insert_ignoring_conflicts
+
+# Таблицы результатов соревнований, загруженные в этот процесс
+_scoreboards: Dict[str, Scoreboard] = {}
+_registry_lock = threading.Lock()
+
+
+def _get_competition(db: Session, event_id: str) -> Event:
+    event = get_event(db, event_id)
+    if event.event_type != EventType.COMPETITION:
+        raise HTTPException(
+            status_code=400,
+            detail="Таблица результатов доступна только для соревнований"
+        )
+    return event
+
+
+def _check_organizer(event: Event, user_id: str) -> None:
+    if event.organizer_id != user_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Только организатор может управлять соревнованием"
+        )
+
+
+def get_problems(db: Session, event_id: str) -> List[ContestProblem]:
+    """Задачи соревнования в порядке их следования"""
+    _get_competition(db, event_id)
+    return db.query(ContestProblem).filter(
+        ContestProblem.event_id == event_id
+    ).order_by(ContestProblem.position).all()
+
+
+def set_problems(db: Session, event_id: str, organizer_id: str,
+                 problems: List[ContestProblemCreate]) -> List[ContestProblem]:
+    """Задать список задач, пока по соревнованию нет посылок"""
+    event = _get_competition(db, event_id)
+    _check_organizer(event, organizer_id)
+
+    labels = [problem.label for problem in problems]
+    if len(set(labels)) != len(labels):
+        raise HTTPException(status_code=400, detail="Буквы задач должны быть уникальными")
+
+    if db.query(Submission.id).filter(Submission.event_id == event_id).first():
+        raise HTTPException(
+            status_code=400,
+            detail="Нельзя менять задачи соревнования, по которому уже есть посылки"
+        )
+
+    db.query(ContestProblem).filter(ContestProblem.event_id == event_id).delete()
+    db.add_all(
+        ContestProblem(
+            id=str(uuid.uuid4()),
+            event_id=event_id,
+            label=problem.label,
+            title=problem.title,
+            position=position
+        )
+        for position, problem in enumerate(problems)
+    )
+    # Снимок ссылается на буквы задач, а посылок ещё нет: строится заново
+    db.execute(update(ScoreboardSnapshot).where(
+        ScoreboardSnapshot.event_id == event_id
+    ).values(state=None, last_seq=0))
+    db.commit()
+
+    drop_scoreboard(event_id)
+    return get_problems(db, event_id)
+
+
+def submissions_sequence(event_id: str) -> str:
+    """Имя счётчика номеров посылок соревнования"""
+    return f"contest_submissions:{event_id}"
+
+
+def _catch_up(db: Session, board: Scoreboard) -> None:
+    """Применить посылки, появившиеся в базе после последней обработанной
+
+    Номера seq становятся видны в порядке фиксации, поэтому посылка с
+    меньшим номером не может появиться после того, как таблица её обогнала.
+    """
+    rows = db.query(
+        Submission.seq,
+        Submission.problem_id,
+        Submission.user_id,
+        Submission.verdict,
+        Submission.submitted_at
+    ).filter(
+        Submission.event_id == board.event_id,
+        Submission.seq > board.last_seq
+    ).order_by(Submission.seq).all()
+
+    newcomers = {row.user_id for row in rows if not board.has_team(row.user_id)}
+    if newcomers:
+        board.add_teams(db.query(User.id, User.full_name).filter(User.id.in_(newcomers)))
+
+    board.apply(rows)
+    board.synced_at = time.monotonic()
+
+
+def _load_scoreboard(db: Session, event: Event) -> Scoreboard:
+    problems = db.query(ContestProblem.id, ContestProblem.label).filter(
+        ContestProblem.event_id == event.id
+    ).order_by(ContestProblem.position).all()
+    snapshot = db.get(ScoreboardSnapshot, event.id)
+
+    board = Scoreboard(event.id, event.date, problems, snapshot.frozen_at if snapshot else None)
+    if snapshot and snapshot.state:
+        board.restore(snapshot.last_seq, snapshot.state)
+    # Участники, зарегистрированные после снимка, появляются в таблице сразу
+    board.add_teams(
+        db.query(User.id, User.full_name).join(
+            event_participants,
+            event_participants.c.user_id == User.id
+        ).filter(event_participants.c.event_id == event.id)
+    )
+    _catch_up(db, board)
+    return board
+
+
+def get_scoreboard(db: Session, event_id: str) -> Scoreboard:
+    """Таблица соревнования из памяти процесса
+
+    При первом обращении таблица восстанавливается из снимка и догоняет
+    посылки после него. Затем не чаще раза в SCOREBOARD_SYNC_INTERVAL секунд
+    она догоняет посылки и заморозку, записанные другими воркерами.
+    """
+    board = _scoreboards.get(event_id)
+    if board is None:
+        board = _load_scoreboard(db, _get_competition(db, event_id))
+        with _registry_lock:
+            board = _scoreboards.setdefault(event_id, board)
+    elif time.monotonic() - board.synced_at > settings.SCOREBOARD_SYNC_INTERVAL:
+        # Мероприятие могли удалить в другом воркере
+        if db.get(Event, event_id) is None:
+            drop_scoreboard(event_id)
+            get_event(db, event_id)
+        snapshot = db.get(ScoreboardSnapshot, event_id)
+        frozen_at = to_utc(snapshot.frozen_at) if snapshot and snapshot.frozen_at else None
+        if frozen_at != board.frozen_at:
+            board.set_freeze(frozen_at)
+        _catch_up(db, board)
+
+    board.accessed_at = time.monotonic()
+    return board
+
+
+def get_organizer_scoreboard(db: Session, event_id: str, organizer_id: str) -> Scoreboard:
+    """Таблица для организатора соревнования, включая полную версию"""
+    _check_organizer(_get_competition(db, event_id), organizer_id)
+    return get_scoreboard(db, event_id)
+
+
+def drop_scoreboard(event_id: str) -> None:
+    with _registry_lock:
+        _scoreboards.pop(event_id, None)
+
+
+def submit(db: Session, event_id: str, organizer_id: str, submissions: List[SubmissionCreate]) -> Dict[str, int]:
+    """Принять пачку посылок от проверяющей системы
+
+    Задачи и участники проверяются двумя запросами на всю пачку, посылки
+    получают номера из счётчика соревнования и вставляются одним
+    executemany, после чего таблица обновляется инкрементально.
+    """
+    event = _get_competition(db, event_id)
+    _check_organizer(event, organizer_id)
+
+    problem_ids = dict(
+        db.query(ContestProblem.label, ContestProblem.id).filter(ContestProblem.event_id == event_id)
+    )
+    unknown_problems = sorted({item.problem for item in submissions} - problem_ids.keys())
+    if unknown_problems:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Неизвестные задачи", "problems": unknown_problems}
+        )
+
+    user_ids = {item.user_id for item in submissions}
+    registered = {
+        row[0] for row in db.query(event_participants.c.user_id).filter(
+            event_participants.c.event_id == event_id,
+            event_participants.c.user_id.in_(user_ids)
+        )
+    }
+    if user_ids - registered:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Пользователи не зарегистрированы на мероприятие",
+                    "user_ids": sorted(user_ids - registered)}
+        )
+
+    now = datetime.now(timezone.utc)
+    first = allocate_sequence(
+        db, submissions_sequence(event_id), len(submissions),
+        select(func.coalesce(func.max(Submission.seq), 0)).where(
+            Submission.event_id == event_id
+        ).scalar_subquery()
+    )
+    db.execute(insert(Submission.__table__), [
+        {
+            "event_id": event_id,
+            "seq": first + i,
+            "problem_id": problem_ids[item.problem],
+            "user_id": item.user_id,
+            "verdict": item.verdict,
+            "submitted_at": to_utc(item.submitted_at or now),
+        }
+        for i, item in enumerate(submissions)
+    ])
+    db.commit()
+
+    board = get_scoreboard(db, event_id)
+    _catch_up(db, board)
+    return {"accepted": len(submissions), "version": board.version}
+
+
+def set_freeze(db: Session, event_id: str, organizer_id: str, frozen_at: Optional[datetime]) -> Scoreboard:
+    """Заморозить публичную таблицу с момента frozen_at или раскрыть её (None)"""
+    event = _get_competition(db, event_id)
+    _check_organizer(event, organizer_id)
+
+    _ensure_snapshot(db, event_id)
+    db.execute(update(ScoreboardSnapshot).where(ScoreboardSnapshot.event_id == event_id).values(
+        frozen_at=to_utc(frozen_at) if frozen_at else None
+    ))
+    db.commit()
+
+    board = get_scoreboard(db, event_id)
+    board.set_freeze(frozen_at)
+    return board
+
+
+def _ensure_snapshot(db: Session, event_id: str) -> None:
+    """Строка снимка соревнования; её могут создавать несколько воркеров сразу"""
+    db.execute(insert_ignoring_conflicts(db, ScoreboardSnapshot.__table__).values(event_id=event_id, last_seq=0))
+
+
+def persist_scoreboard(db: Session, board: Scoreboard) -> None:
+    """Сохранить снимок таблицы, если с прошлого сохранения пришли посылки
+
+    Воркеры сохраняют свои копии таблицы независимо. Условие на last_seq не
+    даёт отставшей копии затереть более свежий снимок.
+    """
+    last_seq, state = board.dump()
+    if last_seq <= board.persisted_seq:
+        return
+    _ensure_snapshot(db, board.event_id)
+    db.execute(update(ScoreboardSnapshot).where(
+        ScoreboardSnapshot.event_id == board.event_id,
+        ScoreboardSnapshot.last_seq < last_seq
+    ).values(state=state, last_seq=last_seq))
+    db.commit()
+    board.persisted_seq = last_seq
+
+
+def persist_scoreboards(evict_idle: bool = False) -> None:
+    """Сохранить снимки загруженных таблиц; с evict_idle — выгрузить давно не читавшиеся"""
+    now = time.monotonic()
+    db = SessionLocal()
+    try:
+        for event_id, board in list(_scoreboards.items()):
+            try:
+                # Мероприятие могли удалить, тогда снимок не нужен
+                if db.get(Event, event_id) is not None:
+                    persist_scoreboard(db, board)
+            except Exception as e:
+                db.rollback()
+                print(f"Ошибка сохранения таблицы результатов {event_id}: {e}")
+                continue
+            if evict_idle and now - board.accessed_at > settings.SCOREBOARD_IDLE_TTL:
+                drop_scoreboard(event_id)
+    finally:
+        db.close()
+
+
+async def scoreboard_persist_loop() -> None:
+    """Периодическое сохранение снимков и выгрузка неиспользуемых таблиц, запускается при старте приложения"""
+    while True:
+        await asyncio.sleep(settings.SCOREBOARD_PERSIST_INTERVAL)
+        try:
+            await run_sync(persist_scoreboards, True)
+        except Exception as e:
+            print(f"Ошибка при сохранении таблиц результатов: {e}")
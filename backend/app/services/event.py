@@ -1,26 +1,73 @@
+import csv
+import io
+import json
 import uuid
-from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from typing import Iterator, List, Optional, Dict, Any
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import desc, func, or_, and_, update
+from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
-from app.models.event import Event, EventStatus, Tag, event_participants
+from app.config import settings
+from app.database import SessionLocal
+from app.models.admission import RegistrationTicket, TicketStatus
+from app.models.changes import ChangeOperation
+from app.models.contest import ContestProblem, ScoreboardSnapshot, Submission
+from app.models.event import Event, EventStatus, Tag, event_participants, event_waitlist
 from app.models.user import User, UserRole
 from app.models.profile import SponsorProfile
+from app.models.rating import EventResult, EventResultsUpload
+from app.models.sequence import SequenceCounter
 from app.schemas.event import EventCreate, EventUpdate, TagCreate
+from app.services.changes import record_event_changes, visible_changes
+from app.services.event_cache import invalidate_event
+from app.services.lifecycle import scheduler
+from app.services.live import live_updates
+from app.services.profile_cache import invalidate_profiles
+from app.services.stats import apply_event_change, read_event_stats, snapshot_event
+from app.services.search import apply_search, index_event, remove_event_from_index
+from app.utils.pagination import decode_cursor
+from app.utils.sql import insert_ignoring_conflicts
+from app.utils.stemmer import normalize
+
+
+# Стратегии загрузки связей: список тянет теги одним дополнительным запросом
+# на страницу, карточка мероприятия — ещё и организатора через JOIN
+LIST_LOAD_OPTIONS = (selectinload(Event.tags),)
+DETAIL_LOAD_OPTIONS = (selectinload(Event.tags), joinedload(Event.organizer))
+
+
+def tag_key(name: str) -> str:
+    """Нормализованный ключ тега"""
+    return " ".join(normalize(name).split())
+
+
+def resolve_tags(db: Session, names: List[str]) -> List[Tag]:
+    """Получить теги по именам, создав недостающие, без фиксации транзакции
+
+    Существующие теги выбираются одним IN-запросом, недостающие вставляются
+    одним многострочным INSERT. Порядок соответствует первому упоминанию.
+    """
+    wanted: Dict[str, str] = {}
+    for name in names:
+        name = name.strip()
+        if name:
+            wanted.setdefault(tag_key(name), name)
+
+    if not wanted:
+        return []
+
+    tags = {tag.key: tag for tag in db.query(Tag).filter(Tag.key.in_(wanted.keys()))}
+
+    missing = [key for key in wanted if key not in tags]
+    if missing:
+        db.execute(
+            insert_ignoring_conflicts(db, Tag.__table__),
+            [{"id": str(uuid.uuid4()), "name": wanted[key], "key": key} for key in missing]
+        )
+        tags.update({tag.key: tag for tag in db.query(Tag).filter(Tag.key.in_(missing))})
 
-
-def get_tag_by_name(db: Session, name: str):
-    """Получить тег по имени или создать новый"""
-    tag = db.query(Tag).filter(func.lower(Tag.name) == name.lower()).first()
-    if not tag:
-        tag_id = str(uuid.uuid4())
-        tag = Tag(id=tag_id, name=name)
-        db.add(tag)
-        db.commit()
-        db.refresh(tag)
-    return tag
+    return [tags[key] for key in wanted if key in tags]
 
 
 def create_event(db: Session, event_data: EventCreate, organizer_id: str, image_filename=None, image_url=None) -> Event:
@@ -49,6 +96,7 @@ def create_event(db: Session, event_data: EventCreate, organizer_id: str, image_
         max_participants=event_data.max_participants,
         event_type=event_data.event_type,
         difficulty_level=event_data.difficulty_level,
+        admission_control=event_data.admission_control,
         organizer_id=organizer_id,
         status=EventStatus.REGISTRATION,
         image_filename=image_filename,
@@ -59,17 +107,27 @@ def create_event(db: Session, event_data: EventCreate, organizer_id: str, image_
 
     # Добавляем теги
     if event_data.tags:
-        for tag_name in event_data.tags:
-            tag = get_tag_by_name(db, tag_name)
-            db_event.tags.append(tag)
+        db_event.tags = resolve_tags(db, event_data.tags)
+
+    # Обновляем счетчик мероприятий в профиле организатора одним UPDATE,
+    # чтобы параллельные создания не теряли приращения
+    db.execute(
+        update(SponsorProfile).where(SponsorProfile.user_id == organizer_id).values(
+            hosted_events_count=SponsorProfile.hosted_events_count + 1
+        ).execution_options(synchronize_session=False)
+    )
 
-    # Обновляем счетчик мероприятий в профиле организатора
-    sponsor_profile = db.query(SponsorProfile).filter(SponsorProfile.user_id == organizer_id).first()
-    if sponsor_profile:
-        sponsor_profile.hosted_events_count += 1
+    index_event(db, db_event)
+    apply_event_change(db, None, snapshot_event(db_event))
+    record_event_changes(db, ChangeOperation.INSERT, [event_id])
 
     db.commit()
+    invalidate_event()
+    invalidate_profiles([organizer_id])
     db.refresh(db_event)
+    # Без планировщика в этом процессе сроки подхватит отдельный процесс при перечитывании
+    if settings.LIFECYCLE_SCHEDULER_ENABLED:
+        scheduler.schedule(db_event.id, db_event.status, db_event.date, db_event.registration_deadline)
     return db_event
 
 
@@ -82,10 +140,24 @@ def get_event(db: Session, event_id: str) -> Event:
             detail="Мероприятие не найдено"
         )
 
-    # Ensure the organizer relationship is loaded
-    if event.organizer is None:
-        db.refresh(event)
+    return event
+
 
+def get_event_detail(db: Session, event_id: str) -> Event:
+    """Получить мероприятие с тегами, организатором и названием его организации"""
+    row = db.query(Event, SponsorProfile.organization_name).outerjoin(
+        SponsorProfile,
+        SponsorProfile.user_id == Event.organizer_id
+    ).options(*DETAIL_LOAD_OPTIONS).filter(Event.id == event_id).first()
+
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail="Мероприятие не найдено"
+        )
+
+    event, organization_name = row
+    event.organizer_organization_name = organization_name
     return event
 
 def update_event(db: Session, event_id: str, event_data: EventUpdate, user_id: str) -> Event:
@@ -99,33 +171,46 @@ def update_event(db: Session, event_id: str, event_data: EventUpdate, user_id: s
             detail="У вас нет прав на редактирование этого мероприятия"
         )
 
+    before = snapshot_event(event)
+
     # Обновляем поля
     update_data = event_data.dict(exclude_unset=True)
+    changed = sorted(update_data)
 
     # Обработка тегов отдельно
     if "tags" in update_data:
         tags = update_data.pop("tags")
 
-        # Очищаем текущие теги
-        event.tags = []
-
-        # Добавляем новые теги
-        if tags:
-            for tag_name in tags:
-                tag = get_tag_by_name(db, tag_name)
-                event.tags.append(tag)
+        # Заменяем теги одним пакетом
+        event.tags = resolve_tags(db, tags or [])
 
     # Обновляем остальные поля
     for key, value in update_data.items():
         setattr(event, key, value)
 
+    index_event(db, event)
+    apply_event_change(db, before, snapshot_event(event))
+    record_event_changes(db, ChangeOperation.UPDATE, [event_id], changed)
+
     db.commit()
+    invalidate_event(event_id, changed)
+    live_updates.publish(event_id, changed)
+
+    # Добавленные места или открытая заново регистрация достаются листу ожидания
+    if "max_participants" in changed or "status" in changed:
+        fill_from_waitlist(db, event_id)
+
     db.refresh(event)
+    if settings.LIFECYCLE_SCHEDULER_ENABLED and {"date", "registration_deadline", "status"} & set(changed):
+        scheduler.schedule(event.id, event.status, event.date, event.registration_deadline)
     return event
 
 
 def delete_event(db: Session, event_id: str, user_id: str) -> bool:
-    """Удалить мероприятие"""
+    """Удалить мероприятие вместе с регистрациями, результатами и данными соревнования"""
+    # Сервис соревнований сам импортирует этот модуль
+    from app.services.contest import drop_scoreboard, submissions_sequence
+
     event = get_event(db, event_id)
 
     # Проверка прав доступа
@@ -148,12 +233,33 @@ def delete_event(db: Session, event_id: str, user_id: str) -> bool:
                 print(f"Ошибка при удалении изображения {event.image_filename}: {e}")
 
     # Обновляем счетчик мероприятий в профиле организатора
-    sponsor_profile = db.query(SponsorProfile).filter(SponsorProfile.user_id == user_id).first()
-    if sponsor_profile and sponsor_profile.hosted_events_count > 0:
-        sponsor_profile.hosted_events_count -= 1
+    db.execute(
+        update(SponsorProfile).where(
+            SponsorProfile.user_id == user_id,
+            SponsorProfile.hosted_events_count > 0
+        ).values(
+            hosted_events_count=SponsorProfile.hosted_events_count - 1
+        ).execution_options(synchronize_session=False)
+    )
 
+    db.execute(event_waitlist.delete().where(event_waitlist.c.event_id == event_id))
+    db.query(RegistrationTicket).filter(RegistrationTicket.event_id == event_id).delete()
+    db.query(EventResult).filter(EventResult.event_id == event_id).delete()
+    db.query(EventResultsUpload).filter(EventResultsUpload.event_id == event_id).delete()
+    db.query(Submission).filter(Submission.event_id == event_id).delete()
+    db.query(ContestProblem).filter(ContestProblem.event_id == event_id).delete()
+    db.query(ScoreboardSnapshot).filter(ScoreboardSnapshot.event_id == event_id).delete()
+    db.query(SequenceCounter).filter(SequenceCounter.name == submissions_sequence(event_id)).delete()
+
+    remove_event_from_index(db, event.id)
+    apply_event_change(db, snapshot_event(event), None)
+    record_event_changes(db, ChangeOperation.DELETE, [event_id])
     db.delete(event)
     db.commit()
+    invalidate_event(event_id)
+    invalidate_profiles([user_id])
+    drop_scoreboard(event_id)
+    live_updates.publish(event_id)
     return True
 
 
@@ -165,10 +271,16 @@ def get_events(
         event_type: Optional[str] = None,
         difficulty_level: Optional[str] = None,
         search: Optional[str] = None,
-        organizer_id: Optional[str] = None
+        organizer_id: Optional[str] = None,
+        cursor: Optional[str] = None
 ) -> List[Event]:
-    """Получить список мероприятий с фильтрами"""
-    query = db.query(Event)
+    """Получить список мероприятий с фильтрами
+
+    Если передан cursor, страница выбирается по ключу (created_at, id)
+    последней записи предыдущей страницы, и skip игнорируется.
+    Результаты поиска сортируются по релевантности и листаются через skip.
+    """
+    query = db.query(Event).options(*LIST_LOAD_OPTIONS)
 
     # Применяем фильтры
     if status:
@@ -181,101 +293,405 @@ def get_events(
         query = query.filter(Event.difficulty_level == difficulty_level)
 
     if search:
-        query = query.filter(Event.name.ilike(f"%{search}%"))
+        query = apply_search(query, db, search)
 
     if organizer_id:
         query = query.filter(Event.organizer_id == organizer_id)
 
-    # Сортируем по дате создания (новые в начале)
-    query = query.order_by(desc(Event.created_at))
+    # Сортируем по дате создания (новые в начале), id разрешает совпадения
+    query = query.order_by(desc(Event.created_at), desc(Event.id))
 
     # Пагинация
-    events = query.offset(skip).limit(limit).all()
+    if cursor and not search:
+        created_at, event_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Event.created_at < created_at,
+            and_(Event.created_at == created_at, Event.id < event_id)
+        ))
+    else:
+        query = query.offset(skip)
+
+    events = query.limit(limit).all()
     return events
 
 
-def register_for_event(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
-    """Регистрация пользователя на мероприятие"""
-    event = get_event(db, event_id)
-    user = db.query(User).filter(User.id == user_id).first()
+ALREADY_REGISTERED = "Вы уже зарегистрированы на это мероприятие"
+EVENT_FULL = "Мероприятие уже заполнено"
 
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
 
-    # Проверки
+class AdmissionQueueRequired(HTTPException):
+    """Мероприятие принимает регистрации только через очередь допуска"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=409,
+            detail="Регистрация на это мероприятие проходит через очередь"
+        )
+
+
+def _raise_registration_rejected(db: Session, event_id: str):
+    """Объяснить, почему условный UPDATE не занял место на мероприятии
+
+    Возвращает управление, только если мест нет и регистрация открыта, —
+    тогда пользователь встаёт в лист ожидания.
+    """
+    event = get_event(db, event_id)
+
     if event.status != EventStatus.REGISTRATION:
         raise HTTPException(
             status_code=400,
             detail="Регистрация на это мероприятие закрыта"
         )
 
-    if event.current_participants >= event.max_participants:
+    if event.admission_control and event.current_participants < event.max_participants:
+        raise AdmissionQueueRequired()
+
+
+def register_for_event(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
+    """Регистрация пользователя на мероприятие
+
+    Место занимается одним условным UPDATE, поэтому параллельные регистрации
+    не превышают max_participants и не теряют приращения счетчика, а
+    повторную регистрацию отсекает первичный ключ event_participants.
+    Для мероприятий с очередью допуска поднимается AdmissionQueueRequired,
+    при отсутствии мест пользователь встаёт в лист ожидания.
+    """
+    seat = db.execute(
+        update(Event).where(
+            Event.id == event_id,
+            Event.status == EventStatus.REGISTRATION,
+            Event.current_participants < Event.max_participants,
+            Event.admission_control.is_(False)
+        ).values(
+            current_participants=Event.current_participants + 1
+        ).returning(Event.name).execution_options(synchronize_session=False)
+    ).first()
+
+    if seat is None:
+        db.rollback()
+        _raise_registration_rejected(db, event_id)
+        return join_waitlist(db, event_id, user_id)
+
+    try:
+        db.execute(event_participants.insert().values(event_id=event_id, user_id=user_id))
+        record_event_changes(db, ChangeOperation.UPDATE, [event_id], ("current_participants",))
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         raise HTTPException(
             status_code=400,
-            detail="Мероприятие уже заполнено"
+            detail=ALREADY_REGISTERED
         )
 
-    # Проверяем, не зарегистрирован ли уже пользователь
-    is_registered = db.query(event_participants).filter(
-        event_participants.c.event_id == event_id,
-        event_participants.c.user_id == user_id
-    ).first()
+    invalidate_event(event_id, ("current_participants",))
+    live_updates.publish(event_id, ("current_participants",))
+
+    return {
+        "success": True,
+        "message": "Вы успешно зарегистрированы на мероприятие",
+        "event_id": event_id,
+        "event_name": seat.name
+    }
+
+
+def register_users_batch(db: Session, event_id: str, user_ids: List[str]) -> Dict[str, Optional[str]]:
+    """Зарегистрировать пачку пользователей в рамках текущей транзакции
+
+    Уже зарегистрированные отсекаются одним IN-запросом, свободные места
+    занимаются одним условным UPDATE на всю пачку, участники вставляются
+    одним executemany. Возвращает для каждого пользователя None при успехе
+    или причину отказа. Фиксирует транзакцию вызывающий код.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    event = db.query(
+        Event.status,
+        Event.current_participants,
+        Event.max_participants
+    ).filter(Event.id == event_id).with_for_update().first()
 
-    if is_registered:
+    if event is None:
+        return {user_id: "Мероприятие не найдено" for user_id in user_ids}
+    if event.status != EventStatus.REGISTRATION:
+        return {user_id: "Регистрация на это мероприятие закрыта" for user_id in user_ids}
+
+    registered = {
+        row[0] for row in db.query(event_participants.c.user_id).filter(
+            event_participants.c.event_id == event_id,
+            event_participants.c.user_id.in_(user_ids)
+        )
+    }
+    fresh = [user_id for user_id in user_ids if user_id not in registered]
+    accepted = fresh[:max(event.max_participants - event.current_participants, 0)]
+
+    if accepted:
+        seats = db.execute(
+            update(Event).where(
+                Event.id == event_id,
+                Event.status == EventStatus.REGISTRATION,
+                Event.current_participants + len(accepted) <= Event.max_participants
+            ).values(
+                current_participants=Event.current_participants + len(accepted)
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        if not seats:
+            # Мероприятие изменилось между чтением и записью — пачку нужно повторить
+            raise HTTPException(
+                status_code=409,
+                detail="Состояние мероприятия изменилось, повторите регистрацию"
+            )
+        db.execute(event_participants.insert(), [
+            {"event_id": event_id, "user_id": user_id} for user_id in accepted
+        ])
+        record_event_changes(db, ChangeOperation.UPDATE, [event_id], ("current_participants",))
+
+    outcome: Dict[str, Optional[str]] = {user_id: ALREADY_REGISTERED for user_id in registered}
+    outcome.update({user_id: EVENT_FULL for user_id in fresh})
+    outcome.update({user_id: None for user_id in accepted})
+    return outcome
+
+
+def register_roster(db: Session, event_id: str, user_ids: List[str], emails: List[str]) -> Dict[str, Any]:
+    """Регистрация команды региона одним запросом
+
+    Пользователи находятся одним IN-запросом по id и email, дальше вся
+    команда проходит через register_users_batch одной транзакцией, так что
+    очередь допуска для такой заявки не нужна. Не хватившие мест встают в
+    лист ожидания. Возвращает итог по каждому переданному идентификатору.
+    """
+    user_ids, emails = list(dict.fromkeys(user_ids)), list(dict.fromkeys(emails))
+    identifiers = user_ids + emails
+    if not identifiers:
         raise HTTPException(
             status_code=400,
-            detail="Вы уже зарегистрированы на это мероприятие"
+            detail="Укажите хотя бы одного участника"
         )
+    if len(identifiers) > settings.ROSTER_MAX_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"За один запрос можно зарегистрировать не больше {settings.ROSTER_MAX_SIZE} участников"
+        )
+
+    get_event(db, event_id)
 
-    # Регистрируем пользователя
-    event.participants.append(user)
-    event.current_participants += 1
+    users = db.query(User.id, User.email, User.role).filter(
+        or_(User.id.in_(user_ids), User.email.in_(emails))
+    ).all()
+    by_id = {user.id: user for user in users}
+    by_email = {user.email: user for user in users}
 
+    resolved = {key: by_id[key] for key in user_ids if key in by_id}
+    resolved.update({key: by_email[key] for key in emails if key in by_email})
+
+    sportsmen = [user.id for user in resolved.values() if user.role == UserRole.SPORTSMAN]
+    outcome = register_users_batch(db, event_id, sportsmen) if sportsmen else {}
+    add_to_waitlist(db, event_id, [user_id for user_id in dict.fromkeys(sportsmen) if outcome[user_id] == EVENT_FULL])
     db.commit()
-    db.refresh(event)
+
+    results = []
+    for identifier in identifiers:
+        user = resolved.get(identifier)
+        if user is None:
+            entry_status, detail = TicketStatus.REJECTED, "Пользователь не найден"
+        elif user.role != UserRole.SPORTSMAN:
+            entry_status, detail = TicketStatus.REJECTED, "Регистрироваться на мероприятия могут только спортсмены"
+        elif outcome[user.id] is None:
+            entry_status, detail = TicketStatus.REGISTERED, None
+        elif outcome[user.id] == EVENT_FULL:
+            entry_status, detail = TicketStatus.WAITLISTED, "Мест нет, участник добавлен в лист ожидания"
+        elif outcome[user.id] == ALREADY_REGISTERED:
+            entry_status, detail = TicketStatus.REJECTED, "Участник уже зарегистрирован на это мероприятие"
+        else:
+            entry_status, detail = TicketStatus.REJECTED, outcome[user.id]
+        results.append({
+            "user": identifier,
+            "user_id": user.id if user is not None else None,
+            "status": entry_status,
+            "detail": detail
+        })
+
+    if any(reason is None for reason in outcome.values()):
+        invalidate_event(event_id, ("current_participants",))
+        live_updates.publish(event_id, ("current_participants",))
+
+    counts = {value: 0 for value in (TicketStatus.REGISTERED, TicketStatus.WAITLISTED, TicketStatus.REJECTED)}
+    for result in results:
+        counts[result["status"]] += 1
 
     return {
-        "success": True,
-        "message": "Вы успешно зарегистрированы на мероприятие",
         "event_id": event_id,
-        "event_name": event.name
+        "registered": counts[TicketStatus.REGISTERED],
+        "waitlisted": counts[TicketStatus.WAITLISTED],
+        "rejected": counts[TicketStatus.REJECTED],
+        "results": results
     }
 
 
-def unregister_from_event(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
-    """Отмена регистрации пользователя на мероприятие"""
-    event = get_event(db, event_id)
+def _waitlist_position(db: Session, event_id: str, entry_id: int) -> int:
+    return db.query(func.count(event_waitlist.c.id)).filter(
+        event_waitlist.c.event_id == event_id,
+        event_waitlist.c.id <= entry_id
+    ).scalar()
+
 
-    # Проверяем регистрацию
-    is_registered = db.query(event_participants).filter(
+def join_waitlist(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
+    """Поставить пользователя в лист ожидания мероприятия"""
+    registered = db.query(event_participants.c.user_id).filter(
         event_participants.c.event_id == event_id,
         event_participants.c.user_id == user_id
     ).first()
+    if registered:
+        raise HTTPException(
+            status_code=400,
+            detail=ALREADY_REGISTERED
+        )
+
+    add_to_waitlist(db, event_id, [user_id])
+    db.commit()
+
+    entry_id = db.query(event_waitlist.c.id).filter(
+        event_waitlist.c.event_id == event_id,
+        event_waitlist.c.user_id == user_id
+    ).scalar()
+
+    return {
+        "success": True,
+        "waitlisted": True,
+        "message": "Мест нет, вы добавлены в лист ожидания",
+        "event_id": event_id,
+        "position": _waitlist_position(db, event_id, entry_id)
+    }
+
+
+def add_to_waitlist(db: Session, event_id: str, user_ids: List[str]) -> None:
+    """Добавить пользователей в конец листа ожидания в рамках текущей транзакции"""
+    if user_ids:
+        db.execute(
+            insert_ignoring_conflicts(db, event_waitlist),
+            [{"event_id": event_id, "user_id": user_id} for user_id in user_ids]
+        )
+
+
+def get_waitlist_position(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
+    """Место пользователя в листе ожидания"""
+    entry_id = db.query(event_waitlist.c.id).filter(
+        event_waitlist.c.event_id == event_id,
+        event_waitlist.c.user_id == user_id
+    ).scalar()
+
+    if entry_id is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Вы не в листе ожидания этого мероприятия"
+        )
+
+    return {"event_id": event_id, "position": _waitlist_position(db, event_id, entry_id)}
+
+
+def promote_from_waitlist(db: Session, event_id: str, limit: int) -> List[str]:
+    """Перевести первых из листа ожидания в участники в рамках текущей транзакции
+
+    Берётся не больше limit записей и не больше свободных мест; регистрация
+    идёт через register_users_batch. Возвращает зарегистрированных.
+    """
+    event = db.query(Event.status, Event.current_participants, Event.max_participants).filter(
+        Event.id == event_id
+    ).first()
+    if event is None or event.status != EventStatus.REGISTRATION:
+        return []
+
+    free = min(event.max_participants - event.current_participants, limit)
+    if free <= 0:
+        return []
+
+    entries = db.query(event_waitlist.c.id, event_waitlist.c.user_id).filter(
+        event_waitlist.c.event_id == event_id
+    ).order_by(event_waitlist.c.id).limit(free).all()
+    if not entries:
+        return []
+
+    outcome = register_users_batch(db, event_id, [entry.user_id for entry in entries])
+
+    # Из листа уходят зарегистрированные сейчас и уже бывшие участниками
+    done = [entry.id for entry in entries if outcome[entry.user_id] in (None, ALREADY_REGISTERED)]
+    if done:
+        db.execute(event_waitlist.delete().where(event_waitlist.c.id.in_(done)))
 
-    if not is_registered:
+    return [user_id for user_id, reason in outcome.items() if reason is None]
+
+
+def fill_from_waitlist(db: Session, event_id: str) -> int:
+    """Занять все свободные места из листа ожидания, по транзакции на пачку"""
+    promoted = 0
+    while True:
+        batch = promote_from_waitlist(db, event_id, settings.WAITLIST_BATCH_SIZE)
+        db.commit()
+        if not batch:
+            break
+        promoted += len(batch)
+
+    if promoted:
+        invalidate_event(event_id, ("current_participants",))
+        live_updates.publish(event_id, ("current_participants",))
+    return promoted
+
+
+def unregister_from_event(db: Session, event_id: str, user_id: str) -> Dict[str, Any]:
+    """Отмена регистрации пользователя на мероприятие"""
+    # Удаляем регистрацию
+    removed = db.execute(
+        event_participants.delete().where(
+            event_participants.c.event_id == event_id,
+            event_participants.c.user_id == user_id
+        )
+    ).rowcount
+
+    if not removed:
+        # Пользователь мог стоять в листе ожидания — тогда просто выходит из него
+        left = db.execute(
+            event_waitlist.delete().where(
+                event_waitlist.c.event_id == event_id,
+                event_waitlist.c.user_id == user_id
+            )
+        ).rowcount
+        if left:
+            db.commit()
+            return {
+                "success": True,
+                "message": "Вы удалены из листа ожидания",
+                "event_id": event_id
+            }
+
+        db.rollback()
+        get_event(db, event_id)
         raise HTTPException(
             status_code=400,
             detail="Вы не зарегистрированы на это мероприятие"
         )
 
-    # Если мероприятие уже активно или завершено
-    if event.status not in [EventStatus.REGISTRATION, EventStatus.ACTIVE]:
+    # Уменьшаем счетчик, если мероприятие еще не завершено
+    released = db.execute(
+        update(Event).where(
+            Event.id == event_id,
+            Event.status.in_([EventStatus.REGISTRATION, EventStatus.ACTIVE])
+        ).values(
+            current_participants=Event.current_participants - 1
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    if not released:
+        db.rollback()
         raise HTTPException(
             status_code=400,
             detail="Нельзя отменить регистрацию на завершенное мероприятие"
         )
 
-    # Удаляем регистрацию
-    stmt = event_participants.delete().where(
-        event_participants.c.event_id == event_id,
-        event_participants.c.user_id == user_id
-    )
-    db.execute(stmt)
-
-    # Уменьшаем счетчик
-    event.current_participants -= 1
+    # Освободившееся место сразу, в той же транзакции, занимает первый из листа ожидания
+    promote_from_waitlist(db, event_id, 1)
+    record_event_changes(db, ChangeOperation.UPDATE, [event_id], ("current_participants",))
 
     db.commit()
+    invalidate_event(event_id, ("current_participants",))
+    live_updates.publish(event_id, ("current_participants",))
 
     return {
         "success": True,
@@ -299,57 +715,142 @@ def get_event_participants(db: Session, event_id: str, skip: int = 0, limit: int
     return participants
 
 
-def get_user_events(db: Session, user_id: str, skip: int = 0, limit: int = 20):
+EXPORT_FIELDS = ("user_id", "full_name", "email", "registered_at", "status")
+EXPORT_CHUNK_SIZE = 1000
+
+
+def _export_rows(db: Session, event_id: str) -> Iterator[Dict[str, Any]]:
+    query = db.query(
+        User.id,
+        User.full_name,
+        User.email,
+        event_participants.c.registered_at,
+        event_participants.c.status
+    ).join(
+        event_participants,
+        event_participants.c.user_id == User.id
+    ).filter(
+        event_participants.c.event_id == event_id
+    ).order_by(event_participants.c.registered_at, User.id)
+
+    # Серверный курсор: в памяти одновременно не больше EXPORT_CHUNK_SIZE строк
+    for row in query.yield_per(EXPORT_CHUNK_SIZE):
+        yield {
+            "user_id": row.id,
+            "full_name": row.full_name,
+            "email": row.email,
+            "registered_at": row.registered_at.isoformat() if row.registered_at else None,
+            "status": row.status,
+        }
+
+
+def export_event_participants(event_id: str, export_format: str) -> Iterator[str]:
+    """Выгрузка участников мероприятия частями в CSV или NDJSON
+
+    Генератор работает в собственной сессии, так как читает данные уже после
+    выхода из обработчика запроса, и отдаёт текст пачками по EXPORT_CHUNK_SIZE строк.
+    """
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        if export_format == "csv":
+            # BOM нужен, чтобы Excel правильно открыл кириллицу
+            buffer.write("\ufeff")
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS)
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(row):
+                buffer.write(json.dumps(row, ensure_ascii=False))
+                buffer.write("\n")
+
+        for count, row in enumerate(_export_rows(db, event_id), start=1):
+            write(row)
+            if count % EXPORT_CHUNK_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
+def get_user_events(db: Session, user_id: str, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
     """Получить мероприятия, на которые зарегистрирован пользователь"""
-    events = db.query(Event).join(
+    query = db.query(Event).options(*LIST_LOAD_OPTIONS).join(
         event_participants,
         event_participants.c.event_id == Event.id
     ).filter(
         event_participants.c.user_id == user_id
-    ).order_by(Event.date).offset(skip).limit(limit).all()
-
+    ).order_by(Event.date, Event.id)
+
+    if cursor:
+        date, event_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Event.date > date,
+            and_(Event.date == date, Event.id > event_id)
+        ))
+    else:
+        query = query.offset(skip)
+
+    events = query.limit(limit).all()
     return events
 
 
-def get_events_stats(db: Session) -> Dict[str, Any]:
-    """Получить статистику по мероприятиям"""
-    # Общее количество мероприятий
-    total_events = db.query(func.count(Event.id)).scalar()
-
-    # Активные мероприятия
-    active_events = db.query(func.count(Event.id)).filter(
-        Event.status == EventStatus.ACTIVE
-    ).scalar()
+def get_event_changes(db: Session, since: int, limit: int) -> Dict[str, Any]:
+    """Изменения мероприятий после номера since для инкрементальной синхронизации
+
+    Берётся не больше limit записей журнала; несколько изменений одного
+    мероприятия схлопываются в одно с объединённым списком полей и текущим
+    состоянием мероприятия, которое загружается одним IN-запросом. Если
+    мероприятия уже нет, изменение отдаётся как удаление.
+    """
+    rows = visible_changes(db, since).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    collapsed: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        entry = collapsed.pop(row.event_id, None) or {"operation": row.operation, "fields": set()}
+        # Создание или удаление важнее последующих обновлений
+        if row.operation != ChangeOperation.UPDATE:
+            entry["operation"] = row.operation
+        if row.fields:
+            entry["fields"].update(row.fields.split(","))
+        entry.update(seq=row.seq, event_id=row.event_id)
+        # Мероприятие переезжает в конец: порядок ответа — по последнему изменению
+        collapsed[row.event_id] = entry
+
+    events = {
+        event.id: event
+        for event in db.query(Event).options(*LIST_LOAD_OPTIONS).filter(Event.id.in_(collapsed.keys()))
+    }
 
-    # Предстоящие мероприятия
-    upcoming_events = db.query(func.count(Event.id)).filter(
-        Event.date > datetime.now(),
-        Event.status.in_([EventStatus.REGISTRATION, EventStatus.ACTIVE])
-    ).scalar()
+    changes = []
+    for entry in collapsed.values():
+        event = events.get(entry["event_id"])
+        operation = ChangeOperation.DELETE if event is None else entry["operation"]
+        changes.append({
+            "seq": entry["seq"],
+            "event_id": entry["event_id"],
+            "operation": operation,
+            "fields": sorted(entry["fields"]) if operation == ChangeOperation.UPDATE else [],
+            "event": event
+        })
 
-    # Популярные теги
-    popular_tags_query = db.query(
-        Tag.name,
-        func.count(event_tags.c.event_id).label('event_count')
-    ).join(
-        Tag.events
-    ).group_by(
-        Tag.name
-    ).order_by(
-        desc('event_count')
-    ).limit(5)
+    return {
+        "changes": changes,
+        "next_since": rows[-1].seq if rows else since,
+        "has_more": has_more
+    }
 
-    popular_tags = [{"name": tag[0], "count": tag[1]} for tag in popular_tags_query]
 
-    # Недавние мероприятия
-    recent_events = db.query(Event).order_by(
-        desc(Event.created_at)
-    ).limit(5).all()
+def get_events_stats(db: Session) -> Dict[str, Any]:
+    """Получить статистику по мероприятиям
 
-    return {
-        "total_events": total_events,
-        "active_events": active_events,
-        "upcoming_events": upcoming_events,
-        "popular_tags": popular_tags,
-        "recent_events": recent_events
-    }
\ No newline at end of file
+    Счётчики и популярные теги читаются из предрасчитанных таблиц, которые
+    обновляются вместе с мероприятиями и периодически сверяются.
+    """
+    return read_event_stats(db)
@@ -0,0 +1,66 @@
+import uuid
+from typing import Any, Iterable, Optional
+
+from app.config import settings
+from app.utils.cache import create_cache, make_key
+
+# Кэш публичных ответов по мероприятиям: списки, карточки и статистика.
+# Хранятся уже сериализованные ответы, поэтому их можно отдавать из общего кэша.
+events_cache = create_cache("events", settings.EVENTS_CACHE_MAXSIZE, settings.EVENTS_CACHE_TTL)
+
+LIST_PREFIX = "list"
+DETAIL_PREFIX = "detail"
+STATS_PREFIX = "stats"
+
+# Ключи ответов содержат версию: списков и статистики — общую, карточки — свою
+# у каждого мероприятия. Запись меняет версию, и старые ответы просто перестают
+# читаться, доживая свой TTL. Версия живёт дольше ответов, а читается перед
+# каждым из них, поэтому вытесняется раньше них только вместе с ними.
+LISTS_VERSION_KEY = "version:lists"
+VERSION_TTL = 24 * 3600
+
+# Поля, от которых зависит только счётчик участников. Их изменение не сбрасывает
+# списки: числа участников в списках и статистике отстают не больше чем на EVENTS_CACHE_TTL
+PARTICIPANT_FIELDS = frozenset({"current_participants"})
+
+
+def _version(key: str) -> str:
+    # Отсутствующую версию читатели не создают: иначе читатель мог бы затереть
+    # версию, только что сменённую записью, и сохранить под ней старый ответ
+    return events_cache.get(key) or "0"
+
+
+def _bump_version(key: str) -> None:
+    events_cache.set(key, uuid.uuid4().hex, ttl=VERSION_TTL)
+
+
+def _detail_version_key(event_id: str) -> str:
+    return f"version:{DETAIL_PREFIX}:{event_id}"
+
+
+def list_key(**filters: Any) -> str:
+    return make_key(LIST_PREFIX, version=_version(LISTS_VERSION_KEY), **filters)
+
+
+def stats_key() -> str:
+    return f"{STATS_PREFIX}:{_version(LISTS_VERSION_KEY)}"
+
+
+def detail_key(event_id: str) -> str:
+    return f"{DETAIL_PREFIX}:{event_id}:{_version(_detail_version_key(event_id))}"
+
+
+def invalidate_event(event_id: Optional[str] = None, fields: Optional[Iterable[str]] = None) -> None:
+    """Сменить версии ответов, которые могли измениться после записи мероприятия
+
+    Вызывается после фиксации транзакции. Карточка меняется только у
+    изменённого мероприятия. Списки и статистика меняются при создании,
+    удалении и любом изменении, кроме одного лишь числа участников
+    (fields из PARTICIPANT_FIELDS): регистрации частые, а мероприятие может
+    входить в любой список.
+    """
+    if event_id:
+        _bump_version(_detail_version_key(event_id))
+    fields = set(fields or ())
+    if not fields or not fields <= PARTICIPANT_FIELDS:
+        _bump_version(LISTS_VERSION_KEY)
@@ -0,0 +1,155 @@
+import asyncio
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.profile import SportsmanProfile
+from app.models.user import User
+from app.utils.concurrency import run_sync
+
+
+class Leaderboard:
+    """Рейтинговая таблица в памяти процесса
+
+    Ключи (-rating, user_id) хранятся в отсортированном списке, поэтому место
+    спортсмена находится бинарным поиском. Место считается «спортивным»:
+    спортсмены с одинаковым рейтингом делят его, следующий получает место
+    с учётом всех, кто выше. В таблицу попадают только спортсмены,
+    завершившие хотя бы одно мероприятие.
+    """
+
+    def __init__(self):
+        self._keys: List[Tuple[int, str]] = []
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(entry: Dict[str, Any]) -> Tuple[int, str]:
+        return -entry["rating"], entry["user_id"]
+
+    def _rank(self, rating: int) -> int:
+        # (-rating,) меньше любого ключа с тем же рейтингом
+        return bisect_left(self._keys, (-rating,)) + 1
+
+    def _with_rank(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        return {"rank": self._rank(entry["rating"]), **entry}
+
+    def _discard(self, user_id: str) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is not None:
+            del self._keys[bisect_left(self._keys, self._key(entry))]
+
+    def load(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Заменить содержимое таблицы целиком"""
+        entries = {entry["user_id"]: entry for entry in entries if entry["completed_events"]}
+        keys = sorted(self._key(entry) for entry in entries.values())
+        with self._lock:
+            self._entries, self._keys = entries, keys
+
+    def upsert(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Обновить записи отдельных спортсменов"""
+        with self._lock:
+            for entry in entries:
+                self._discard(entry["user_id"])
+                if entry["completed_events"]:
+                    self._entries[entry["user_id"]] = entry
+                    insort(self._keys, self._key(entry))
+
+    def remove(self, user_id: str) -> None:
+        with self._lock:
+            self._discard(user_id)
+
+    def top(self, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                self._with_rank(self._entries[user_id])
+                for _, user_id in self._keys[skip:skip + limit]
+            ]
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            return self._with_rank(entry) if entry is not None else None
+
+    def around(self, user_id: str, radius: int = 5) -> List[Dict[str, Any]]:
+        """Спортсмен и по radius соседей выше и ниже него"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return []
+            position = bisect_left(self._keys, self._key(entry))
+            start = max(position - radius, 0)
+            return [
+                self._with_rank(self._entries[neighbour_id])
+                for _, neighbour_id in self._keys[start:position + radius + 1]
+            ]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+leaderboard = Leaderboard()
+
+
+def _profile_rows(db: Session, user_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    query = db.query(
+        SportsmanProfile.user_id,
+        User.full_name,
+        SportsmanProfile.rating,
+        SportsmanProfile.wins,
+        SportsmanProfile.completed_events
+    ).join(
+        User,
+        User.id == SportsmanProfile.user_id
+    )
+    if user_ids is not None:
+        query = query.filter(SportsmanProfile.user_id.in_(user_ids))
+
+    return [
+        {
+            "user_id": row.user_id,
+            "full_name": row.full_name,
+            "rating": row.rating or 0,
+            "wins": row.wins or 0,
+            "completed_events": row.completed_events or 0,
+        }
+        for row in query
+    ]
+
+
+def refresh_leaderboard(db: Session, user_ids: List[str]) -> None:
+    """Перечитать из базы записи спортсменов, чей рейтинг изменился"""
+    if user_ids:
+        leaderboard.upsert(_profile_rows(db, user_ids))
+
+
+def rebuild_leaderboard(db: Session) -> None:
+    """Построить таблицу заново по всем профилям спортсменов"""
+    leaderboard.load(_profile_rows(db))
+
+
+def run_leaderboard_rebuild() -> None:
+    """Перестроение таблицы в отдельной сессии"""
+    db = SessionLocal()
+    try:
+        rebuild_leaderboard(db)
+    finally:
+        db.close()
+
+
+async def leaderboard_rebuild_loop() -> None:
+    """Периодическое перестроение таблицы
+
+    Подхватывает изменения, сделанные другими воркерами и командами
+    app.cli, которые не видят таблицу этого процесса.
+    """
+    while True:
+        await asyncio.sleep(settings.LEADERBOARD_REBUILD_INTERVAL)
+        try:
+            await run_sync(run_leaderboard_rebuild)
+        except Exception as e:
+            print(f"Ошибка при перестроении рейтинговой таблицы: {e}")
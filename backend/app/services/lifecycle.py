@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.changes import ChangeOperation
+from app.models.event import Event, EventStatus
+from app.services.changes import record_event_changes
+from app.services.event_cache import invalidate_event
+from app.services.live import live_updates
+from app.services.stats import OPEN_STATUSES, refresh_status_counters
+from app.utils.concurrency import run_sync
+from app.utils.dates import to_utc, utc_now
+
+
+def event_deadlines(status: EventStatus, date: datetime,
+                    registration_deadline: Optional[datetime]) -> List[datetime]:
+    """Моменты, в которые у мероприятия меняется статус или счётчики статистики
+
+    Регистрация закрывается в registration_deadline, а без него — в дату
+    мероприятия; идущее мероприятие перестаёт быть предстоящим в свою дату
+    и завершается через EVENT_DURATION_HOURS после неё.
+    """
+    date = to_utc(date)
+    if status == EventStatus.REGISTRATION:
+        return [to_utc(registration_deadline) or date]
+    if status == EventStatus.ACTIVE:
+        return [date, date + timedelta(hours=settings.EVENT_DURATION_HOURS)]
+    return []
+
+
+class LifecycleScheduler:
+    """Куча ближайших сроков мероприятий
+
+    Хранит пары (момент, id мероприятия) и будит цикл к ближайшей из них.
+    Сами переходы применяются пакетными UPDATE ко всем мероприятиям, чей
+    срок наступил, поэтому устаревшая запись в куче даёт лишь лишнее
+    пробуждение, а сроки, изменённые другими процессами, подхватываются
+    полным перечитыванием раз в LIFECYCLE_RESCAN_INTERVAL.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def load(self, rows: Iterable) -> None:
+        """Заменить кучу сроками строк (id, status, date, registration_deadline)"""
+        heap = [
+            (when, row.id)
+            for row in rows
+            for when in event_deadlines(row.status, row.date, row.registration_deadline)
+        ]
+        heapq.heapify(heap)
+        with self._lock:
+            self._heap = heap
+
+    def schedule(self, event_id: str, status: EventStatus, date: datetime,
+                 registration_deadline: Optional[datetime]) -> None:
+        """Добавить сроки мероприятия; безопасно вызывать из любого потока"""
+        with self._lock:
+            earliest = self._heap[0][0] if self._heap else None
+            for when in event_deadlines(status, date, registration_deadline):
+                heapq.heappush(self._heap, (when, event_id))
+            moved = bool(self._heap) and (earliest is None or self._heap[0][0] < earliest)
+
+        if moved and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pop_due(self, now: datetime) -> List[str]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def next_at(self) -> Optional[datetime]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    async def wait(self, timeout: float) -> None:
+        """Ждать до ближайшего срока, нового более раннего срока или timeout"""
+        if self._wakeup is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+        self._wakeup.clear()
+
+        next_at = self.next_at()
+        if next_at is not None:
+            timeout = min(timeout, max((next_at - utc_now()).total_seconds(), 0))
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+
+scheduler = LifecycleScheduler()
+
+
+def _deadline_rows(db: Session, event_ids: Optional[List[str]] = None):
+    query = db.query(Event.id, Event.status, Event.date, Event.registration_deadline).filter(
+        Event.status.in_(OPEN_STATUSES)
+    )
+    if event_ids is not None:
+        query = query.filter(Event.id.in_(event_ids))
+    return query.all()
+
+
+def load_schedule() -> int:
+    """Перечитать сроки всех открытых мероприятий в отдельной сессии"""
+    db = SessionLocal()
+    try:
+        scheduler.load(_deadline_rows(db))
+    finally:
+        db.close()
+    return len(scheduler)
+
+
+def apply_lifecycle_transitions(db: Session, now: datetime) -> Dict[str, List[str]]:
+    """Перевести мероприятия, чей срок наступил, двумя пакетными UPDATE
+
+    Открытая регистрация закрывается (REGISTRATION -> ACTIVE) по
+    registration_deadline или дате мероприятия, идущие мероприятия
+    завершаются через EVENT_DURATION_HOURS после даты. Журнал изменений и
+    счётчики статистики обновляются в той же транзакции. Возвращает id по
+    переходам.
+    """
+    now = to_utc(now)
+    started = db.execute(
+        update(Event).where(
+            Event.status == EventStatus.REGISTRATION,
+            func.coalesce(Event.registration_deadline, Event.date) <= now
+        ).values(
+            status=EventStatus.ACTIVE
+        ).returning(Event.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    completed = db.execute(
+        update(Event).where(
+            Event.status == EventStatus.ACTIVE,
+            Event.date <= now - timedelta(hours=settings.EVENT_DURATION_HOURS)
+        ).values(
+            status=EventStatus.COMPLETED
+        ).returning(Event.id).execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    refresh_status_counters(db)
+    record_event_changes(db, ChangeOperation.UPDATE, started + completed, ("status",))
+    return {"started": started, "completed": completed}
+
+
+def run_lifecycle_transitions(now: Optional[datetime] = None) -> Dict[str, List[str]]:
+    """Применить наступившие сроки в отдельной сессии и разослать изменения"""
+    now = now or utc_now()
+    db = SessionLocal()
+    try:
+        changes = apply_lifecycle_transitions(db, now)
+        db.commit()
+
+        changed = list(dict.fromkeys(changes["started"] + changes["completed"]))
+        # Следующие сроки перешедших мероприятий, например завершение начавшихся
+        for row in _deadline_rows(db, changed):
+            scheduler.schedule(row.id, row.status, row.date, row.registration_deadline)
+    finally:
+        db.close()
+
+    for event_id in changed:
+        invalidate_event(event_id, ("status",))
+        live_updates.publish(event_id, ("status",))
+    # Списки и статистика сбрасываются и без переходов: могли измениться «предстоящие»
+    invalidate_event()
+    return changes
+
+
+async def lifecycle_scheduler_loop() -> None:
+    """Цикл планировщика: спит до ближайшего срока и применяет переходы
+
+    Запускается при старте приложения (LIFECYCLE_SCHEDULER_ENABLED) или
+    отдельным процессом через python -m app.cli run-scheduler. Несколько
+    запущенных планировщиков не мешают друг другу: UPDATE условные.
+    """
+    loaded_at = None
+    while True:
+        try:
+            if loaded_at is None or time.monotonic() - loaded_at > settings.LIFECYCLE_RESCAN_INTERVAL:
+                await run_sync(load_schedule)
+                loaded_at = time.monotonic()
+
+            if scheduler.pop_due(utc_now()):
+                await run_sync(run_lifecycle_transitions)
+        except Exception as e:
+            print(f"Ошибка планировщика жизненного цикла мероприятий: {e}")
+
+        await scheduler.wait(settings.LIFECYCLE_RESCAN_INTERVAL)
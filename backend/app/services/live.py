@@ -0,0 +1,132 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.event import Event
+from app.utils.concurrency import run_sync
+
+
+def load_live_state(event_id: str) -> Optional[Dict[str, Any]]:
+    """Текущее состояние мероприятия для живых подписчиков, в отдельной сессии"""
+    db = SessionLocal()
+    try:
+        row = db.query(
+            Event.id,
+            Event.name,
+            Event.status,
+            Event.date,
+            Event.registration_deadline,
+            Event.current_participants,
+            Event.max_participants
+        ).filter(Event.id == event_id).first()
+    finally:
+        db.close()
+
+    if row is None:
+        return None
+    return {
+        "event_id": row.id,
+        "name": row.name,
+        "status": row.status.value if row.status else None,
+        "date": row.date.isoformat() if row.date else None,
+        "registration_deadline": row.registration_deadline.isoformat() if row.registration_deadline else None,
+        "current_participants": row.current_participants,
+        "max_participants": row.max_participants,
+    }
+
+
+class LiveBroadcaster:
+    """Рассылка изменений мероприятий подписчикам внутри процесса
+
+    Сервисы сообщают только о факте изменения (publish можно вызывать из
+    потоков пула). Всплеск изменений одного мероприятия схлопывается:
+    не чаще раза в interval секунд состояние читается из базы одним запросом
+    и раздаётся всем подписчикам. Очередь подписчика хранит только последнее
+    состояние, поэтому медленный клиент пропускает промежуточные.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._pending: Dict[str, Set[str]] = {}
+        self._last_sent: Dict[str, float] = {}
+        self._flushing: Set[str] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def publish(self, event_id: str, changed: Iterable[str] = ()) -> None:
+        """Сообщить об изменении мероприятия; безопасно вызывать из любого потока"""
+        loop = self._loop
+        if loop is None or event_id not in self._subscribers:
+            return
+        loop.call_soon_threadsafe(self._mark, event_id, tuple(changed))
+
+    def _mark(self, event_id: str, changed: tuple) -> None:
+        pending = self._pending.get(event_id)
+        if pending is not None:
+            # Рассылка уже запланирована и заберёт это изменение
+            pending.update(changed)
+            return
+
+        self._pending[event_id] = set(changed)
+        self._schedule(event_id)
+
+    def _schedule(self, event_id: str) -> None:
+        if event_id in self._flushing:
+            # Изменение будет разослано после завершения текущей рассылки
+            return
+        delay = self._last_sent.get(event_id, 0.0) + self.interval - self._loop.time()
+        if delay > 0:
+            self._loop.call_later(delay, self._schedule, event_id)
+        else:
+            self._loop.create_task(self._flush(event_id))
+
+    async def _flush(self, event_id: str) -> None:
+        changed = self._pending.pop(event_id, set())
+        if event_id not in self._subscribers:
+            return
+        self._flushing.add(event_id)
+        try:
+            state = await run_sync(load_live_state, event_id)
+        finally:
+            self._flushing.discard(event_id)
+            self._last_sent[event_id] = self._loop.time()
+
+        if state is None:
+            state = {"event_id": event_id, "deleted": True}
+        state["changed"] = sorted(changed)
+
+        for queue in self._subscribers.get(event_id, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(state)
+
+        # Изменения, пришедшие во время чтения, уходят в следующем окне
+        if event_id in self._pending:
+            self._schedule(event_id)
+
+    @asynccontextmanager
+    async def subscribe(self, event_id: str) -> AsyncIterator[asyncio.Queue]:
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers[event_id].add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(event_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[event_id]
+                    self._last_sent.pop(event_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "events": len(self._subscribers),
+            "subscribers": sum(len(queues) for queues in self._subscribers.values()),
+        }
+
+
+live_updates = LiveBroadcaster(settings.LIVE_PUSH_INTERVAL)
@@ -1,6 +1,8 @@
 import uuid
+from typing import Any, Dict, List
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
 
 from app.models.user import User, UserRole
 from app.models.profile import SportsmanProfile, SponsorProfile, RegionProfile
@@ -9,6 +11,7 @@ from app.schemas.profile import (
     SponsorProfileCreate, SponsorProfileUpdate,
     RegionProfileCreate, RegionProfileUpdate
 )
+from app.services.profile_cache import invalidate_profiles, profile_key, profiles_cache
 
 
 # Функции для профиля спортсмена
@@ -60,6 +63,7 @@ def update_sportsman_profile(db: Session, user_id: str, profile_data: SportsmanP
         setattr(profile, key, value)
 
     db.commit()
+    invalidate_profiles([user_id])
     db.refresh(profile)
     return profile
 
@@ -113,6 +117,7 @@ def update_sponsor_profile(db: Session, user_id: str, profile_data: SponsorProfi
         setattr(profile, key, value)
 
     db.commit()
+    invalidate_profiles([user_id])
     db.refresh(profile)
     return profile
 
@@ -167,93 +172,159 @@ def update_region_profile(db: Session, user_id: str, profile_data: RegionProfile
         setattr(profile, key, value)
 
     db.commit()
+    invalidate_profiles([user_id])
     db.refresh(profile)
     return profile
 
 
-def get_user_profile(db: Session, user_id: str):
-    """Получение профиля пользователя на основе его роли"""
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="Пользователь не найден")
+def _sportsman_data(profile: SportsmanProfile) -> Dict[str, Any]:
+    return {
+        "bio": profile.bio,
+        "specialization": profile.specialization,
+        "experience_years": profile.experience_years,
+        "rating": profile.rating,
+        "completed_events": profile.completed_events,
+        "wins": profile.wins
+    }
+
+
+def _sponsor_data(profile: SponsorProfile) -> Dict[str, Any]:
+    return {
+        "organization_name": profile.organization_name,
+        "organization_description": profile.organization_description,
+        "contact_phone": profile.contact_phone,
+        "contact_email": profile.contact_email,
+        "website": profile.website,
+        "hosted_events_count": profile.hosted_events_count
+    }
 
-    profile_data = {}
-
-    if user.role == UserRole.SPORTSMAN:
-        profile = db.query(SportsmanProfile).filter(SportsmanProfile.user_id == user_id).first()
-        if profile:
-            profile_data = {
-                "bio": profile.bio,
-                "specialization": profile.specialization,
-                "experience_years": profile.experience_years,
-                "rating": profile.rating,
-                "completed_events": profile.completed_events,
-                "wins": profile.wins
-            }
-    elif user.role == UserRole.SPONSOR:
-        profile = db.query(SponsorProfile).filter(SponsorProfile.user_id == user_id).first()
-        if profile:
-            profile_data = {
-                "organization_name": profile.organization_name,
-                "organization_description": profile.organization_description,
-                "contact_phone": profile.contact_phone,
-                "contact_email": profile.contact_email,
-                "website": profile.website,
-                "hosted_events_count": profile.hosted_events_count
-            }
-
-            # Добавляем подсчет мероприятий, если используется модель Event
-            try:
-                from app.models.event import Event
-                events_count = db.query(Event).filter(Event.organizer_id == user_id).count()
-                profile_data["hosted_events_count"] = events_count
-            except Exception as e:
-                print(f"Не удалось получить количество мероприятий: {e}")
-    elif user.role == UserRole.REGION:
-        profile = db.query(RegionProfile).filter(RegionProfile.user_id == user_id).first()
-        if profile:
-            profile_data = {
-                "region_name": profile.region_name,
-                "region_code": profile.region_code,
-                "population": profile.population,
-                "team_members": profile.team_members,
-                "region_events_count": profile.region_events_count,
-                "contact_phone": profile.contact_phone,
-                "contact_email": profile.contact_email
-            }
 
+def _region_data(profile: RegionProfile) -> Dict[str, Any]:
     return {
+        "region_name": profile.region_name,
+        "region_code": profile.region_code,
+        "population": profile.population,
+        "team_members": profile.team_members,
+        "region_events_count": profile.region_events_count,
+        "contact_phone": profile.contact_phone,
+        "contact_email": profile.contact_email
+    }
+
+
+# Профиль каждой роли и его сериализация
+ROLE_PROFILES = {
+    UserRole.SPORTSMAN: (SportsmanProfile, _sportsman_data),
+    UserRole.SPONSOR: (SponsorProfile, _sponsor_data),
+    UserRole.REGION: (RegionProfile, _region_data),
+}
+
+
+def get_user_profile(db: Session, user_id: str) -> Dict[str, Any]:
+    """Получение профиля пользователя на основе его роли
+
+    Пользователь и профиль его роли читаются одним запросом с внешними
+    соединениями; число мероприятий организатора берётся из поддерживаемого
+    счётчика hosted_events_count. Ответ готов к записи в кэш профилей.
+    """
+    models = [model for model, _ in ROLE_PROFILES.values()]
+    query = db.query(User, *models)
+    for model in models:
+        query = query.outerjoin(model, model.user_id == User.id)
+    row = query.filter(User.id == user_id).first()
+
+    if not row:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+
+    user, *profiles = row
+    return _profile_response(user, dict(zip(ROLE_PROFILES, profiles)).get(user.role))
+
+
+def _profile_response(user: User, profile) -> Dict[str, Any]:
+    profile_data = ROLE_PROFILES[user.role][1](profile) if profile is not None else {}
+    return jsonable_encoder({
         "user_id": user.id,
         "full_name": user.full_name,
         "email": user.email,
         "role": user.role.value,
         "profile_data": profile_data,
         "created_at": user.created_at
+    })
+
+
+# Поля, которые видит только сам пользователь
+PRIVATE_USER_FIELDS = ("email",)
+PRIVATE_PROFILE_FIELDS = ("contact_phone", "contact_email")
+
+
+def public_profile(profile: Dict[str, Any]) -> Dict[str, Any]:
+    """Профиль без личных данных — для показа другим пользователям"""
+    result = {key: value for key, value in profile.items() if key not in PRIVATE_USER_FIELDS}
+    result["profile_data"] = {
+        key: value for key, value in profile["profile_data"].items() if key not in PRIVATE_PROFILE_FIELDS
     }
+    return result
+
+
+def profile_for_viewer(profile: Dict[str, Any], viewer_id: str) -> Dict[str, Any]:
+    """Профиль целиком для самого пользователя и без личных данных для остальных"""
+    return profile if profile["user_id"] == viewer_id else public_profile(profile)
+
+
+def get_user_profiles(db: Session, user_ids: List[str], viewer_id: str) -> List[Dict[str, Any]]:
+    """Профили пачки пользователей в порядке запроса
+
+    Найденные в кэше профили не перечитываются. Остальные загружаются одним
+    IN-запросом по пользователям и одним IN-запросом на таблицу профилей
+    каждой встретившейся роли. Личные поля остаются только в профиле самого
+    viewer_id, неизвестные id пропускаются.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    found = {}
+    for user_id in user_ids:
+        cached = profiles_cache.get(profile_key(user_id))
+        if cached is not None:
+            found[user_id] = cached
+
+    missing = [user_id for user_id in user_ids if user_id not in found]
+    if missing:
+        generation = profiles_cache.generation()
+        users = db.query(User).filter(User.id.in_(missing)).all()
+
+        by_role: Dict[UserRole, List[str]] = {}
+        for user in users:
+            if user.role in ROLE_PROFILES:
+                by_role.setdefault(user.role, []).append(user.id)
+
+        profiles = {}
+        for role, ids in by_role.items():
+            model = ROLE_PROFILES[role][0]
+            profiles.update((profile.user_id, profile) for profile in db.query(model).filter(model.user_id.in_(ids)))
+
+        for user in users:
+            found[user.id] = _profile_response(user, profiles.get(user.id))
+            profiles_cache.set(profile_key(user.id), found[user.id], generation=generation)
+
+    return [profile_for_viewer(found[user_id], viewer_id) for user_id in user_ids if user_id in found]
+
+
+# Базовые профили, которые создаются вместе с учётной записью
+DEFAULT_PROFILES = {
+    UserRole.SPORTSMAN: {"rating": 0, "completed_events": 0, "wins": 0, "experience_years": 0},
+    UserRole.SPONSOR: {
+        "organization_name": "Моя организация",
+        "organization_description": "Описание организации",
+        "hosted_events_count": 0
+    },
+    UserRole.REGION: {"region_name": "Мой регион", "team_members": 0, "region_events_count": 0},
+}
+
+
+def default_profile_values(user_id: str, role: UserRole) -> Dict[str, Any]:
+    """Строка базового профиля роли для вставки, в том числе пакетной"""
+    return {"id": str(uuid.uuid4()), "user_id": user_id, **DEFAULT_PROFILES[role]}
 
 
-def create_profile_after_registration(db: Session, user_id: str, role: UserRole):
-    """Создает базовый профиль после регистрации пользователя"""
-    try:
-        if role == UserRole.SPORTSMAN:
-            create_sportsman_profile(db, SportsmanProfileCreate(user_id=user_id))
-        elif role == UserRole.SPONSOR:
-            create_sponsor_profile(db, SponsorProfileCreate(
-                user_id=user_id,
-                organization_name="Моя организация",  # Добавляем базовое название
-                organization_description="Описание организации"  # Добавляем базовое описание
-            ))
-        elif role == UserRole.REGION:
-            # Для региона создаем базовый профиль (предварительно)
-            try:
-                create_region_profile(db, RegionProfileCreate(
-                    user_id=user_id,
-                    region_name="Мой регион"  # Добавляем базовое название региона
-                ))
-            except Exception as e:
-                print(f"Не удалось создать профиль региона: {e}")
-    except HTTPException as e:
-        # Не выбрасываем исключение, чтобы не прерывать регистрацию,
-        # если профиль не удалось создать
-        print(f"Ошибка при создании профиля: {e.detail}")
-        pass
\ No newline at end of file
+def build_default_profile(user_id: str, role: UserRole):
+    """Базовый профиль нового пользователя; добавляется в ту же транзакцию, что и сам пользователь"""
+    model = ROLE_PROFILES[role][0]
+    return model(**default_profile_values(user_id, role))
@@ -0,0 +1,18 @@
+from typing import Iterable
+
+from app.config import settings
+from app.utils.cache import create_cache
+
+# Кэш профилей пользователей: /api/profiles/me запрашивается при каждой
+# загрузке страницы. Хранятся уже сериализованные ответы.
+profiles_cache = create_cache("profiles", settings.PROFILES_CACHE_MAXSIZE, settings.PROFILES_CACHE_TTL)
+
+
+def profile_key(user_id: str) -> str:
+    return f"profile:{user_id}"
+
+
+def invalidate_profiles(user_ids: Iterable[str]) -> None:
+    """Сбросить профили пользователей после записи их данных"""
+    for user_id in user_ids:
+        profiles_cache.delete(profile_key(user_id))
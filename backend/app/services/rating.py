@@ -0,0 +1,412 @@
+import csv
+import io
+import json
+import uuid
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Set, TextIO, Tuple
+
+import numpy as np
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import and_, bindparam, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.event import Event, EventStatus, event_participants
+from app.models.profile import SportsmanProfile
+from app.models.rating import EventResult, EventResultsUpload
+from app.schemas.rating import EventResultCreate
+from app.services.event import get_event
+from app.services.leaderboard import rebuild_leaderboard, refresh_leaderboard
+from app.services.profile_cache import invalidate_profiles, profiles_cache
+
+# Ожидаемый результат считается блоками строк, чтобы промежуточная матрица
+# для крупных мероприятий оставалась ограниченной по памяти
+PAIRWISE_BLOCK_SIZE = 512
+
+# Сколько строк загружаемого файла проверяется и записывается за один раз
+RESULTS_CHUNK_SIZE = 1000
+
+RESULTS_FILE_FORMATS = (".csv", ".ndjson", ".jsonl")
+
+
+def elo_deltas(ratings: np.ndarray, places: np.ndarray, k: Optional[float] = None) -> np.ndarray:
+    """Изменения рейтинга участников одного мероприятия (многопользовательское Эло)
+
+    Каждый участник сравнивается с каждым: победа над тем, кто занял место
+    ниже, даёт 1, ничья — 0.5. Сумма отклонений от ожидаемого результата
+    нормируется на n - 1, поэтому величина изменения не растёт с размером поля.
+
+    Фактический результат считается по отсортированным местам, а ожидаемый —
+    по гистограмме рейтингов: рейтинги целые, поэтому различных значений
+    намного меньше, чем участников, и сложность падает с n*n до n*U.
+    """
+    if k is None:
+        k = settings.RATING_K
+
+    n = len(ratings)
+    if n < 2:
+        return np.zeros(n)
+
+    sorted_places = np.sort(places)
+    below = n - np.searchsorted(sorted_places, places, side="right")
+    tied = np.searchsorted(sorted_places, places, side="right") - np.searchsorted(sorted_places, places)
+    actual = below + 0.5 * (tied - 1)
+
+    levels, counts = np.unique(ratings, return_counts=True)
+    expected = np.empty(n)
+    for start in range(0, n, PAIRWISE_BLOCK_SIZE):
+        own = ratings[start:start + PAIRWISE_BLOCK_SIZE, None]
+        win_chance = 1.0 / (1.0 + 10.0 ** ((levels[None, :] - own) / 400.0))
+        expected[start:start + PAIRWISE_BLOCK_SIZE] = win_chance @ counts
+
+    # Сравнение участника с самим собой даёт в ожидании 0.5, его исключаем
+    return k * (actual - (expected - 0.5)) / (n - 1)
+
+
+def apply_event_results(db: Session, event_id: str) -> List[Dict[str, Any]]:
+    """Инкрементально обновить профили участников одного мероприятия
+
+    Затрагиваются только участники мероприятия; изменения пишутся одним
+    executemany без фиксации транзакции.
+    """
+    rows = db.query(
+        SportsmanProfile.id,
+        SportsmanProfile.user_id,
+        SportsmanProfile.rating,
+        SportsmanProfile.completed_events,
+        EventResult.place
+    ).join(
+        EventResult,
+        EventResult.user_id == SportsmanProfile.user_id
+    ).filter(
+        EventResult.event_id == event_id
+    ).all()
+
+    if not rows:
+        return []
+
+    # Спортсмены без завершённых мероприятий стартуют с начального рейтинга
+    old_ratings = np.array([
+        row.rating if row.completed_events else settings.RATING_INITIAL
+        for row in rows
+    ], dtype=float)
+    places = np.array([row.place for row in rows])
+    new_ratings = np.rint(old_ratings + elo_deltas(old_ratings, places)).astype(int)
+
+    profiles = SportsmanProfile.__table__
+    db.execute(
+        update(profiles).where(profiles.c.id == bindparam("profile_id")).values(
+            rating=bindparam("new_rating"),
+            wins=profiles.c.wins + bindparam("win"),
+            completed_events=profiles.c.completed_events + 1
+        ),
+        [
+            {"profile_id": row.id, "new_rating": int(rating), "win": int(row.place == 1)}
+            for row, rating in zip(rows, new_ratings)
+        ]
+    )
+
+    return [
+        {"user_id": row.user_id, "place": row.place, "old_rating": int(old), "new_rating": int(new)}
+        for row, old, new in zip(rows, old_ratings, new_ratings)
+    ]
+
+
+def _claim_results_upload(db: Session, event_id: str, organizer_id: str) -> Event:
+    """Проверить права и статус мероприятия и занять его загрузку результатов"""
+    event = get_event(db, event_id)
+
+    if event.organizer_id != organizer_id:
+        raise HTTPException(
+            status_code=403,
+            detail="Только организатор может загружать результаты мероприятия"
+        )
+
+    if event.status != EventStatus.COMPLETED:
+        raise HTTPException(
+            status_code=400,
+            detail="Результаты можно загрузить только для завершённого мероприятия"
+        )
+
+    # Повторную загрузку отсекает первичный ключ отметки, а не предварительная
+    # проверка: параллельная загрузка того же мероприятия упадёт на вставке
+    db.add(EventResultsUpload(event_id=event_id))
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail="Результаты этого мероприятия уже загружены"
+        )
+    return event
+
+
+def _has_later_results(db: Session, event: Event) -> bool:
+    """Учтены ли уже результаты мероприятия, которое прошло позже event"""
+    return db.query(EventResultsUpload.event_id).join(
+        Event,
+        Event.id == EventResultsUpload.event_id
+    ).filter(
+        or_(Event.date > event.date, and_(Event.date == event.date, Event.id > event.id))
+    ).first() is not None
+
+
+def _recompute_with_event(db: Session, event_id: str) -> List[Dict[str, Any]]:
+    """Полностью пересчитать рейтинг и вернуть изменения участников event_id"""
+    rows = db.query(
+        SportsmanProfile.user_id,
+        SportsmanProfile.rating,
+        SportsmanProfile.completed_events,
+        EventResult.place
+    ).join(
+        EventResult,
+        EventResult.user_id == SportsmanProfile.user_id
+    ).filter(
+        EventResult.event_id == event_id
+    ).all()
+
+    recompute_all_ratings(db)
+    new_ratings = dict(
+        db.query(SportsmanProfile.user_id, SportsmanProfile.rating).filter(
+            SportsmanProfile.user_id.in_([row.user_id for row in rows])
+        )
+    )
+
+    return [
+        {
+            "user_id": row.user_id,
+            "place": row.place,
+            "old_rating": row.rating if row.completed_events else settings.RATING_INITIAL,
+            "new_rating": new_ratings[row.user_id],
+        }
+        for row in rows
+    ]
+
+
+def _store_results_chunk(db: Session, event_id: str, chunk: List[EventResultCreate], seen: Set[str]) -> None:
+    """Проверить часть результатов одним IN-запросом и записать её одним executemany"""
+    user_ids = [result.user_id for result in chunk]
+    repeated = seen.intersection(user_ids)
+    if repeated or len(set(user_ids)) != len(user_ids):
+        raise HTTPException(
+            status_code=400,
+            detail="Участник указан в результатах несколько раз"
+        )
+    seen.update(user_ids)
+
+    registered = {
+        row[0] for row in db.query(event_participants.c.user_id).filter(
+            event_participants.c.event_id == event_id,
+            event_participants.c.user_id.in_(user_ids)
+        )
+    }
+    unknown = [user_id for user_id in user_ids if user_id not in registered]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Пользователи не зарегистрированы на мероприятие", "user_ids": unknown}
+        )
+
+    db.execute(insert(EventResult.__table__), [
+        {
+            "id": str(uuid.uuid4()),
+            "event_id": event_id,
+            "user_id": result.user_id,
+            "place": result.place,
+            "score": result.score,
+        }
+        for result in chunk
+    ])
+
+
+def import_event_results(
+        db: Session,
+        event_id: str,
+        organizer_id: str,
+        results: Iterable[EventResultCreate]
+) -> List[Dict[str, Any]]:
+    """Сохранить итоговые места мероприятия и пересчитать рейтинг его участников
+
+    Результаты принимаются потоком и обрабатываются частями по
+    RESULTS_CHUNK_SIZE, всё записывается одной транзакцией. Возвращает
+    изменения рейтинга участников.
+
+    Рейтинг зависит от порядка мероприятий. Если уже учтены результаты
+    мероприятия, прошедшего позже, инкрементальное обновление применило бы
+    это мероприятие не на своём месте, поэтому рейтинг пересчитывается по
+    всей истории, как в recompute_all_ratings.
+    """
+    event = _claim_results_upload(db, event_id, organizer_id)
+    out_of_order = _has_later_results(db, event)
+
+    seen: Set[str] = set()
+    chunk: List[EventResultCreate] = []
+    for result in results:
+        chunk.append(result)
+        if len(chunk) >= RESULTS_CHUNK_SIZE:
+            _store_results_chunk(db, event_id, chunk, seen)
+            chunk = []
+    if chunk:
+        _store_results_chunk(db, event_id, chunk, seen)
+
+    if len(seen) < 2:
+        raise HTTPException(
+            status_code=400,
+            detail="В результатах должно быть не меньше двух участников"
+        )
+
+    if out_of_order:
+        changes = _recompute_with_event(db, event_id)
+        db.commit()
+        rebuild_leaderboard(db)
+        profiles_cache.clear()
+        return changes
+
+    changes = apply_event_results(db, event_id)
+    db.commit()
+    user_ids = [change["user_id"] for change in changes]
+    refresh_leaderboard(db, user_ids)
+    invalidate_profiles(user_ids)
+    return changes
+
+
+def record_event_results(
+        db: Session,
+        event_id: str,
+        organizer_id: str,
+        results: List[EventResultCreate]
+) -> Dict[str, Any]:
+    """Результаты, переданные в теле запроса, с полным списком изменений рейтинга"""
+    changes = import_event_results(db, event_id, organizer_id, results)
+    return {
+        "event_id": event_id,
+        "participants": len(changes),
+        "rating_changes": changes
+    }
+
+
+def upload_event_results(
+        db: Session,
+        event_id: str,
+        organizer_id: str,
+        file: BinaryIO,
+        filename: str
+) -> Dict[str, Any]:
+    """Результаты из файла CSV или NDJSON с краткой сводкой"""
+    changes = import_event_results(db, event_id, organizer_id, parse_results_file(file, filename))
+
+    gains = sorted(changes, key=lambda change: change["new_rating"] - change["old_rating"], reverse=True)
+    return {
+        "event_id": event_id,
+        "participants": len(changes),
+        "winners": sum(1 for change in changes if change["place"] == 1),
+        "top_gainers": gains[:5]
+    }
+
+
+def _read_result_rows(stream: TextIO, extension: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if extension == ".csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Строка {line_number}: некорректный JSON"
+            )
+
+
+def parse_results_file(file: BinaryIO, filename: str) -> Iterator[EventResultCreate]:
+    """Построчно читать результаты из загруженного файла
+
+    CSV должен содержать заголовок с колонками user_id, place и
+    необязательной score; NDJSON — по одному объекту на строку.
+    """
+    extension = Path(filename or "").suffix.lower()
+    if extension not in RESULTS_FILE_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail="Поддерживаются файлы .csv, .ndjson и .jsonl"
+        )
+
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        for line_number, row in _read_result_rows(stream, extension):
+            try:
+                yield EventResultCreate.model_validate(row)
+            except ValidationError as e:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Строка {line_number}: {e.errors()[0]['msg']}"
+                )
+    except (csv.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=400,
+            detail="Не удалось прочитать файл результатов"
+        )
+    finally:
+        # Исходный файл закрывает FastAPI, обёртку от него отсоединяем
+        stream.detach()
+
+
+def recompute_all_ratings(db: Session) -> int:
+    """Полный пересчёт рейтинга, побед и числа мероприятий по всей истории
+
+    Мероприятия обрабатываются в хронологическом порядке над массивами NumPy,
+    профили записываются одним executemany. Возвращает число профилей.
+    """
+    profiles = db.query(SportsmanProfile.id, SportsmanProfile.user_id).all()
+    if not profiles:
+        return 0
+
+    index = {user_id: i for i, (_, user_id) in enumerate(profiles)}
+
+    history = db.query(EventResult.event_id, EventResult.user_id, EventResult.place).join(
+        Event,
+        Event.id == EventResult.event_id
+    ).order_by(Event.date, Event.id).all()
+    history = [row for row in history if row.user_id in index]
+
+    ratings = np.full(len(profiles), float(settings.RATING_INITIAL))
+    completed = np.zeros(len(profiles), dtype=int)
+    wins = np.zeros(len(profiles), dtype=int)
+
+    if history:
+        event_ids = np.array([row.event_id for row in history], dtype=object)
+        members = np.array([index[row.user_id] for row in history])
+        places = np.array([row.place for row in history])
+
+        # Границы мероприятий в отсортированной истории. Рейтинг округляется
+        # после каждого мероприятия, как и при инкрементальном обновлении
+        bounds = np.flatnonzero(event_ids[1:] != event_ids[:-1]) + 1
+        for start, stop in zip(np.r_[0, bounds], np.r_[bounds, len(history)]):
+            group = members[start:stop]
+            ratings[group] = np.rint(ratings[group] + elo_deltas(ratings[group], places[start:stop]))
+
+        completed = np.bincount(members, minlength=len(profiles))
+        wins = np.bincount(members[places == 1], minlength=len(profiles))
+
+    # Спортсмены без результатов остаются без рейтинга
+    final_ratings = np.where(completed > 0, np.rint(ratings), 0).astype(int)
+
+    db.execute(update(SportsmanProfile), [
+        {
+            "id": profile_id,
+            "rating": int(final_ratings[i]),
+            "wins": int(wins[i]),
+            "completed_events": int(completed[i]),
+        }
+        for i, (profile_id, _) in enumerate(profiles)
+    ])
+    return len(profiles)
+
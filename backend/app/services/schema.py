@@ -0,0 +1,149 @@
+from sqlalchemy import bindparam, inspect, select, text, update
+from sqlalchemy.engine import Connection, Engine
+
+from app.database import Base
+from app.models.event import Tag
+from app.services.event import tag_key
+
+# create_all создаёт только отсутствующие таблицы. Колонки и индексы, появившиеся
+# в моделях позже, добавляются в существующую базу здесь, при старте приложения.
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str) -> bool:
+    """Добавить колонку, если её ещё нет; возвращает True, если колонка добавлена"""
+    if any(info["name"] == column for info in inspect(conn).get_columns(table)):
+        return False
+    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def _merge_tag(conn: Connection, duplicate_id: str, tag_id: str) -> None:
+    """Перенести мероприятия тега-дубликата на основной тег и удалить дубликат"""
+    params = {"duplicate": duplicate_id, "tag": tag_id}
+    conn.execute(text(
+        "INSERT INTO event_tags (event_id, tag_id) "
+        "SELECT event_id, :tag FROM event_tags WHERE tag_id = :duplicate "
+        "AND event_id NOT IN (SELECT event_id FROM event_tags WHERE tag_id = :tag)"
+    ), params)
+    conn.execute(text("DELETE FROM event_tags WHERE tag_id = :duplicate"), params)
+    conn.execute(text("DELETE FROM tag_stats WHERE tag_id = :duplicate"), params)
+    conn.execute(text("DELETE FROM tags WHERE id = :duplicate"), params)
+
+
+def _ensure_tag_keys(conn: Connection) -> None:
+    """Колонка tags.key: добавить, заполнить по именам и слить теги с одинаковым ключом
+
+    Старые теги различались только без учёта регистра, поэтому «Ёлка» и
+    «елка» могли оказаться разными тегами; с уникальным ключом они
+    становятся одним тегом, которому достаются мероприятия обоих.
+    """
+    added = _add_column(conn, "tags", "key", "VARCHAR")
+
+    tags = Tag.__table__
+    if conn.execute(select(tags.c.id).where(tags.c.key.is_(None)).limit(1)).first() is None:
+        return
+
+    keys = {}
+    for tag in conn.execute(select(tags.c.id, tags.c.name, tags.c.key).order_by(tags.c.created_at, tags.c.id)):
+        key = tag.key or tag_key(tag.name)
+        if key in keys:
+            _merge_tag(conn, tag.id, keys[key][0])
+        else:
+            keys[key] = (tag.id, tag.key)
+
+    missing = [{"tag_id": tag_id, "tag_key": key} for key, (tag_id, stored) in keys.items() if stored is None]
+    if missing:
+        conn.execute(
+            update(tags).where(tags.c.id == bindparam("tag_id")).values(key=bindparam("tag_key")),
+            missing
+        )
+
+    # SQLite не умеет менять ограничения колонки после ALTER TABLE ADD COLUMN
+    if added and conn.dialect.name != "sqlite":
+        conn.execute(text("ALTER TABLE tags ALTER COLUMN key SET NOT NULL"))
+
+
+def _ensure_results_uploads(conn: Connection) -> None:
+    """Отметки о загрузке для мероприятий, результаты которых записаны до появления отметок"""
+    conn.execute(text(
+        "INSERT INTO event_results_uploads (event_id) "
+        "SELECT DISTINCT event_id FROM event_results "
+        "WHERE event_id NOT IN (SELECT event_id FROM event_results_uploads)"
+    ))
+
+
+def _ensure_submission_seq(conn: Connection) -> None:
+    """Номера посылок: старым посылкам достаются их id, которые растут внутри соревнования
+
+    Счётчики соревнований при первом обращении продолжат с максимального номера.
+    """
+    _add_column(conn, "contest_submissions", "seq", "INTEGER")
+    conn.execute(text("UPDATE contest_submissions SET seq = id WHERE seq IS NULL"))
+    # Догонялись по id, теперь по (event_id, seq)
+    conn.execute(text("DROP INDEX IF EXISTS ix_contest_submissions_event_id_id"))
+
+
+def _ensure_change_seq_default(conn: Connection) -> None:
+    """Номера журнала изменений выдаёт база, а не счётчик sequence_counters
+
+    В SQLite seq и так псевдоним rowid. В PostgreSQL колонка создавалась без
+    значения по умолчанию, ей нужна последовательность, продолжающая номера.
+    """
+    conn.execute(text("DELETE FROM sequence_counters WHERE name = 'event_changes'"))
+    if conn.dialect.name != "postgresql":
+        return
+    if conn.execute(text("SELECT pg_get_serial_sequence('event_changes', 'seq')")).scalar() is not None:
+        return
+    conn.execute(text("CREATE SEQUENCE IF NOT EXISTS event_changes_seq_seq OWNED BY event_changes.seq"))
+    conn.execute(text(
+        "SELECT setval('event_changes_seq_seq', COALESCE(MAX(seq), 0) + 1, false) FROM event_changes"
+    ))
+    conn.execute(text("ALTER TABLE event_changes ALTER COLUMN seq SET DEFAULT nextval('event_changes_seq_seq')"))
+
+
+def _drop_column(conn: Connection, table: str, column: str) -> None:
+    if any(info["name"] == column for info in inspect(conn).get_columns(table)):
+        conn.execute(text(f"ALTER TABLE {table} DROP COLUMN {column}"))
+
+
+def _normalize_event_timestamps(conn: Connection) -> None:
+    """Привести даты мероприятий в SQLite к формату с микросекундами
+
+    SQLite хранит даты текстом и сравнивает их как строки. Строки, созданные
+    значением по умолчанию CURRENT_TIMESTAMP, записаны как
+    'YYYY-MM-DD HH:MM:SS', а SQLAlchemy пишет и передаёт в курсор пагинации
+    'YYYY-MM-DD HH:MM:SS.ffffff'. Без выравнивания такая строка меньше
+    собственного курсора, и keyset-пагинация возвращает её повторно.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    for column in ("created_at", "date"):
+        conn.execute(text(
+            f"UPDATE events SET {column} = {column} || '.000000' WHERE length({column}) = 19"
+        ))
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Добавить в существующие таблицы новые колонки, заполнить их и создать индексы"""
+    with engine.begin() as conn:
+        _ensure_tag_keys(conn)
+        # Существующие мероприятия регистрируются без очереди допуска
+        _add_column(conn, "events", "admission_control", "BOOLEAN NOT NULL DEFAULT false")
+        _normalize_event_timestamps(conn)
+        _ensure_results_uploads(conn)
+        _ensure_submission_seq(conn)
+        _ensure_change_seq_default(conn)
+        # Вместо готовой таблицы сохраняются посылки, из которых она строится
+        _drop_column(conn, "scoreboard_snapshots", "standings")
+        _drop_column(conn, "scoreboard_snapshots", "version")
+        _add_column(conn, "scoreboard_snapshots", "state", "JSON")
+        _add_column(conn, "scoreboard_snapshots", "last_seq", "INTEGER NOT NULL DEFAULT 0")
+        # Индексы создаются после заполнения колонок: уникальный ключ тега
+        # требует, чтобы дубликаты были уже слиты
+        _create_missing_indexes(conn)
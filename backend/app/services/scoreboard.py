@@ -0,0 +1,244 @@
+import json
+import threading
+import time
+import uuid
+from bisect import insort
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.contest import Verdict
+from app.utils.dates import to_utc
+
+# Штраф за каждую отклонённую попытку по решённой задаче, в минутах
+PENALTY_MINUTES = 20
+
+PUBLIC = "public"
+FULL = "full"
+
+# Меняется при каждом запуске процесса, чтобы ETag не совпал с версией
+# таблицы, построенной до перезапуска
+_INSTANCE = uuid.uuid4().hex[:8]
+
+
+class ProblemCell:
+    """Посылки одного участника по одной задаче и итоги по ним для обеих версий таблицы"""
+
+    __slots__ = ("submissions", "results")
+
+    def __init__(self):
+        # (время посылки, номер посылки, вердикт) в порядке времени
+        self.submissions: List[Tuple[datetime, int, Verdict]] = []
+        # версия таблицы -> (отклонённые попытки, минута сдачи или None, скрытые посылки)
+        self.results: Dict[str, Tuple[int, Optional[int], int]] = {}
+
+    def evaluate(self, view: str, start: datetime, frozen_at: Optional[datetime]) -> None:
+        """Пересчитать итог по правилам ICPC
+
+        Посылки после первой принятой не учитываются, ошибки компиляции
+        не штрафуются, посылки после заморозки видны только как «ожидающие».
+        """
+        attempts, solved_at, pending = 0, None, 0
+        for submitted_at, _, verdict in self.submissions:
+            if frozen_at is not None and submitted_at >= frozen_at:
+                pending += 1
+            elif verdict == Verdict.ACCEPTED:
+                solved_at = max(int((submitted_at - start).total_seconds() // 60), 0)
+                break
+            elif verdict == Verdict.REJECTED:
+                attempts += 1
+        self.results[view] = (attempts, solved_at, pending)
+
+    def to_dict(self, view: str) -> Dict[str, Any]:
+        attempts, solved_at, pending = self.results[view]
+        return {"attempts": attempts, "solved_at": solved_at, "pending": pending}
+
+
+class TeamRow:
+    """Строка таблицы: ячейки по задачам и итоги для полной и публичной версий"""
+
+    __slots__ = ("user_id", "full_name", "cells", "totals")
+
+    def __init__(self, user_id: str, full_name: Optional[str]):
+        self.user_id = user_id
+        self.full_name = full_name
+        self.cells: Dict[str, ProblemCell] = {}
+        # версия таблицы -> (решено, штраф, минута последней сдачи)
+        self.totals: Dict[str, Tuple[int, int, int]] = {FULL: (0, 0, 0), PUBLIC: (0, 0, 0)}
+
+    def recount(self, view: str) -> None:
+        solved = penalty = last_solved = 0
+        for cell in self.cells.values():
+            attempts, solved_at, _ = cell.results[view]
+            if solved_at is not None:
+                solved += 1
+                penalty += solved_at + PENALTY_MINUTES * attempts
+                last_solved = max(last_solved, solved_at)
+        self.totals[view] = (solved, penalty, last_solved)
+
+
+class Scoreboard:
+    """Таблица результатов одного соревнования в памяти процесса
+
+    Посылки применяются инкрементально: пересчитывается только ячейка
+    участника по задаче и его итог. Отсортированная таблица и её JSON
+    строятся лениво — один раз на версию, — поэтому любое число зрителей
+    получает уже готовые байты. Состояние сохраняется снимком (dump) и
+    восстанавливается из него (restore), чтобы после перезапуска не
+    перечитывать все посылки соревнования.
+    """
+
+    def __init__(self, event_id: str, start: datetime, problems: List[Tuple[str, str]],
+                 frozen_at: Optional[datetime] = None):
+        self.event_id = event_id
+        self.start = to_utc(start)
+        self.problem_labels = {problem_id: label for problem_id, label in problems}
+        self.labels = [label for _, label in problems]
+        self.frozen_at = to_utc(frozen_at) if frozen_at else None
+
+        self.version = 0
+        self.last_seq = 0
+        # Номер последней посылки в сохранённом снимке
+        self.persisted_seq = 0
+        self.synced_at = 0.0
+        self.accessed_at = time.monotonic()
+
+        self._teams: Dict[str, TeamRow] = {}
+        self._rendered: Dict[str, Tuple[int, bytes]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self) -> str:
+        return f'"{_INSTANCE}-{self.event_id}-{self.version}"'
+
+    def add_teams(self, teams: Iterable[Tuple[str, Optional[str]]]) -> None:
+        with self._lock:
+            for user_id, full_name in teams:
+                if user_id not in self._teams:
+                    self._teams[user_id] = TeamRow(user_id, full_name)
+                    self.version += 1
+
+    def has_team(self, user_id: str) -> bool:
+        return user_id in self._teams
+
+    def apply(self, submissions: Iterable[Tuple[int, str, str, Verdict, datetime]]) -> int:
+        """Учесть посылки (seq, problem_id, user_id, verdict, submitted_at)
+
+        Посылки с seq не больше уже обработанного пропускаются, поэтому
+        одну и ту же выборку можно применять повторно.
+        """
+        applied = 0
+        with self._lock:
+            for seq, problem_id, user_id, verdict, submitted_at in submissions:
+                if seq <= self.last_seq:
+                    continue
+                self.last_seq = seq
+
+                label = self.problem_labels.get(problem_id)
+                if label is None:
+                    continue
+
+                team = self._teams.get(user_id)
+                if team is None:
+                    team = self._teams[user_id] = TeamRow(user_id, None)
+
+                cell = team.cells.get(label)
+                if cell is None:
+                    cell = team.cells[label] = ProblemCell()
+                insort(cell.submissions, (to_utc(submitted_at), seq, verdict))
+                for view, frozen_at in ((FULL, None), (PUBLIC, self.frozen_at)):
+                    cell.evaluate(view, self.start, frozen_at)
+                    team.recount(view)
+                applied += 1
+
+            if applied:
+                self.version += 1
+        return applied
+
+    def dump(self) -> Tuple[int, Dict[str, Any]]:
+        """Снимок для базы: номер последней учтённой посылки и посылки участников"""
+        with self._lock:
+            teams = {
+                team.user_id: {
+                    "full_name": team.full_name,
+                    "cells": {
+                        label: [[submitted_at.isoformat(), seq, verdict.value]
+                                for submitted_at, seq, verdict in cell.submissions]
+                        for label, cell in team.cells.items()
+                    },
+                }
+                for team in self._teams.values()
+            }
+            return self.last_seq, {"teams": teams}
+
+    def restore(self, last_seq: int, state: Dict[str, Any]) -> None:
+        """Восстановить таблицу из снимка dump и пересчитать итоги обеих версий"""
+        with self._lock:
+            for user_id, data in state.get("teams", {}).items():
+                team = self._teams[user_id] = TeamRow(user_id, data.get("full_name"))
+                for label, submissions in data.get("cells", {}).items():
+                    if label not in self.labels:
+                        continue
+                    cell = team.cells[label] = ProblemCell()
+                    cell.submissions = [
+                        (to_utc(datetime.fromisoformat(submitted_at)), seq, Verdict(verdict))
+                        for submitted_at, seq, verdict in submissions
+                    ]
+                    for view, frozen_at in ((FULL, None), (PUBLIC, self.frozen_at)):
+                        cell.evaluate(view, self.start, frozen_at)
+                for view in (FULL, PUBLIC):
+                    team.recount(view)
+            self.last_seq = self.persisted_seq = last_seq
+            self.version += 1
+
+    def set_freeze(self, frozen_at: Optional[datetime]) -> None:
+        """Заморозить публичную таблицу с момента frozen_at или раскрыть её (None)"""
+        with self._lock:
+            self.frozen_at = to_utc(frozen_at) if frozen_at else None
+            for team in self._teams.values():
+                for cell in team.cells.values():
+                    cell.evaluate(PUBLIC, self.start, self.frozen_at)
+                team.recount(PUBLIC)
+            self.version += 1
+
+    def _build(self, view: str) -> Dict[str, Any]:
+        teams = sorted(
+            self._teams.values(),
+            key=lambda team: (-team.totals[view][0], team.totals[view][1], team.totals[view][2],
+                              team.full_name or "", team.user_id)
+        )
+
+        rows = []
+        rank = 0
+        previous = None
+        for position, team in enumerate(teams, start=1):
+            # Участники с одинаковыми решёнными, штрафом и временем последней сдачи делят место
+            if team.totals[view] != previous:
+                rank, previous = position, team.totals[view]
+            solved, penalty, _ = team.totals[view]
+            rows.append({
+                "rank": rank,
+                "user_id": team.user_id,
+                "full_name": team.full_name,
+                "solved": solved,
+                "penalty": penalty,
+                "problems": {label: cell.to_dict(view) for label, cell in team.cells.items()},
+            })
+
+        return {
+            "event_id": self.event_id,
+            "version": self.version,
+            "frozen": view == PUBLIC and self.frozen_at is not None,
+            "frozen_at": self.frozen_at.isoformat() if self.frozen_at and view == PUBLIC else None,
+            "problems": self.labels,
+            "rows": rows,
+        }
+
+    def render(self, view: str = PUBLIC) -> bytes:
+        """JSON таблицы, строится заново только при смене версии"""
+        self.accessed_at = time.monotonic()
+        with self._lock:
+            rendered = self._rendered.get(view)
+            if rendered is None or rendered[0] != self.version:
+                body = json.dumps(self._build(view), ensure_ascii=False).encode("utf-8")
+                rendered = self._rendered[view] = (self.version, body)
+            return rendered[1]
@@ -0,0 +1,147 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import Float, String, false, text, or_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, Query
+
+from app.models.event import Event
+from app.utils.stemmer import tokenize
+
+# Полнотекстовый индекс мероприятий: SQLite FTS5 или в PostgreSQL таблица
+# с tsvector под GIN-индексом. В индекс пишутся уже приведённые к основам
+# слова, поэтому русская морфология обрабатывается стеммером одинаково для
+# обеих СУБД, а индекс отвечает за ранжирование и префиксный поиск.
+FTS_TABLE = "events_fts"
+
+# Веса колонок для bm25: event_id, name, description, tags
+RANK_EXPRESSION = f"bm25({FTS_TABLE}, 0.0, 10.0, 1.0, 5.0)"
+
+# Те же веса в терминах PostgreSQL: A — название, B — теги, D — описание.
+# Конфигурация simple не меняет слова, основы уже получены стеммером
+TSVECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple', :name), 'A') || "
+    "setweight(to_tsvector('simple', :tags), 'B') || "
+    "setweight(to_tsvector('simple', :description), 'D')"
+)
+
+SEARCH_DIALECTS = ("sqlite", "postgresql")
+
+
+def _search_dialect(bind) -> Optional[str]:
+    """СУБД с полнотекстовым индексом или None, если поиск идёт по подстроке"""
+    name = bind.dialect.name
+    return name if name in SEARCH_DIALECTS else None
+
+
+def ensure_search_index(engine: Engine) -> None:
+    """Создать таблицу индекса и заполнить её, если она отстаёт от events"""
+    dialect = _search_dialect(engine)
+    if dialect is None:
+        return
+
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            conn.execute(text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"USING fts5(event_id UNINDEXED, name, description, tags)"
+            ))
+        else:
+            conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {FTS_TABLE} "
+                f"(event_id VARCHAR PRIMARY KEY, document TSVECTOR NOT NULL)"
+            ))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_{FTS_TABLE}_document ON {FTS_TABLE} USING GIN (document)"
+            ))
+        indexed = conn.execute(text(f"SELECT count(*) FROM {FTS_TABLE}")).scalar()
+        total = conn.execute(text("SELECT count(*) FROM events")).scalar()
+
+    if indexed != total:
+        with Session(engine) as db:
+            rebuild_search_index(db)
+            db.commit()
+
+
+def _document(values: Iterable[Optional[str]]) -> str:
+    return " ".join(" ".join(tokenize(value)) for value in values if value)
+
+
+def index_event(db: Session, event: Event) -> None:
+    """Переиндексировать мероприятие в рамках текущей транзакции"""
+    dialect = _search_dialect(db.get_bind())
+    if dialect is None:
+        return
+
+    remove_event_from_index(db, event.id)
+    if dialect == "sqlite":
+        statement = f"INSERT INTO {FTS_TABLE} (event_id, name, description, tags) VALUES (:id, :name, :description, :tags)"
+    else:
+        statement = f"INSERT INTO {FTS_TABLE} (event_id, document) VALUES (:id, {TSVECTOR_EXPRESSION})"
+    db.execute(
+        text(statement),
+        {
+            "id": event.id,
+            "name": _document([event.name]),
+            "description": _document([event.description]),
+            "tags": _document(tag.name for tag in event.tags),
+        }
+    )
+
+
+def remove_event_from_index(db: Session, event_id: str) -> None:
+    """Удалить мероприятие из индекса в рамках текущей транзакции"""
+    if _search_dialect(db.get_bind()) is None:
+        return
+
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE event_id = :id"), {"id": event_id})
+
+
+def rebuild_search_index(db: Session) -> None:
+    """Полностью перестроить индекс по таблице events"""
+    if _search_dialect(db.get_bind()) is None:
+        return
+
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    for event in db.query(Event).yield_per(500):
+        index_event(db, event)
+
+
+def build_match_query(search: str, dialect: str = "sqlite") -> Optional[str]:
+    """Преобразовать пользовательский ввод в запрос FTS5 или tsquery с префиксным поиском по основам"""
+    terms = tokenize(search)
+    if not terms:
+        return None
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def apply_search(query: Query, db: Session, search: str) -> Query:
+    """Отфильтровать запрос по поисковой строке и отсортировать по релевантности
+
+    Полнотекстовый индекс есть для SQLite и PostgreSQL; для остальных СУБД
+    используется поиск подстроки по названию и описанию.
+    """
+    dialect = _search_dialect(db.get_bind())
+    if dialect is None:
+        pattern = f"%{search}%"
+        return query.filter(or_(Event.name.ilike(pattern), Event.description.ilike(pattern)))
+
+    match = build_match_query(search, dialect)
+    if match is None:
+        return query.filter(false())
+
+    if dialect == "sqlite":
+        statement = f"SELECT event_id, {RANK_EXPRESSION} AS rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match"
+    else:
+        # ts_rank тем больше, чем релевантнее, а сортировка по возрастанию, как у bm25
+        statement = (
+            f"SELECT event_id, -ts_rank(document, to_tsquery('simple', :match)) AS rank "
+            f"FROM {FTS_TABLE} WHERE document @@ to_tsquery('simple', :match)"
+        )
+    ranked = text(statement).bindparams(match=match).columns(
+        event_id=String, rank=Float
+    ).subquery("search_rank")
+
+    return query.join(ranked, ranked.c.event_id == Event.id).order_by(ranked.c.rank)
+
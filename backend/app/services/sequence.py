@@ -0,0 +1,26 @@
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.sequence import SequenceCounter
+from app.utils.sql import insert_ignoring_conflicts
+
+
+def allocate_sequence(db: Session, name: str, count: int, initial) -> int:
+    """Занять count номеров счётчика name в текущей транзакции, вернуть первый
+
+    Строка счётчика остаётся заблокированной до фиксации транзакции, так что
+    номера выдаются и становятся видны строго по возрастанию. Поэтому
+    вызывать стоит как можно ближе к commit. Отсутствующий счётчик создаётся
+    со значением initial — числом или скалярным подзапросом, например
+    максимумом уже выданных номеров.
+    """
+    counters = SequenceCounter.__table__
+    bump = update(counters).where(counters.c.name == name).values(
+        value=counters.c.value + count
+    ).returning(counters.c.value)
+
+    value = db.execute(bump).scalar()
+    if value is None:
+        db.execute(insert_ignoring_conflicts(db, counters).values(name=name, value=initial))
+        value = db.execute(bump).scalar()
+    return value - count + 1
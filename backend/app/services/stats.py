@@ -0,0 +1,236 @@
+import asyncio
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exists, func, desc, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.event import Event, EventStatus, Tag, event_tags
+from app.models.profile import SponsorProfile
+from app.models.stats import EventCounter, TagStat
+from app.services.event_cache import events_cache, stats_key
+from app.utils.concurrency import run_sync
+from app.utils.dates import to_utc, utc_now
+from app.utils.sql import insert_ignoring_conflicts
+
+TOTAL = "total_events"
+ACTIVE = "active_events"
+UPCOMING = "upcoming_events"
+COUNTERS = (TOTAL, ACTIVE, UPCOMING)
+
+OPEN_STATUSES = (EventStatus.REGISTRATION, EventStatus.ACTIVE)
+
+
+def snapshot_event(event: Event) -> Dict[str, Any]:
+    """Поля мероприятия, от которых зависит статистика"""
+    return {
+        "status": event.status,
+        "date": event.date,
+        "tags": {tag.id: tag.name for tag in event.tags},
+    }
+
+
+def _is_upcoming(snapshot: Dict[str, Any], now: datetime) -> bool:
+    # Даты хранятся и сравниваются в UTC без часового пояса
+    date = snapshot["date"]
+    return (
+        date is not None
+        and to_utc(date) > now
+        and snapshot["status"] in OPEN_STATUSES
+    )
+
+
+def _counter_values(snapshot: Optional[Dict[str, Any]], now: datetime) -> Counter:
+    if snapshot is None:
+        return Counter()
+    return Counter({
+        TOTAL: 1,
+        ACTIVE: int(snapshot["status"] == EventStatus.ACTIVE),
+        UPCOMING: int(_is_upcoming(snapshot, now)),
+    })
+
+
+def _bump_counter(db: Session, name: str, delta: int) -> None:
+    updated = db.execute(
+        update(EventCounter).where(EventCounter.name == name).values(value=EventCounter.value + delta)
+    ).rowcount
+    if not updated:
+        db.add(EventCounter(name=name, value=max(delta, 0)))
+        db.flush()
+
+
+def _bump_tags(db: Session, tags: Dict[str, str], delta: int) -> None:
+    """Изменить счётчики набора тегов тремя запросами независимо от их числа"""
+    if not tags:
+        return
+
+    existing = {row[0] for row in db.query(TagStat.tag_id).filter(TagStat.tag_id.in_(tags.keys()))}
+    if existing:
+        db.execute(
+            update(TagStat).where(TagStat.tag_id.in_(existing)).values(event_count=TagStat.event_count + delta)
+        )
+
+    missing = tags.keys() - existing
+    if missing:
+        db.execute(
+            insert_ignoring_conflicts(db, TagStat.__table__),
+            [{"tag_id": tag_id, "name": tags[tag_id], "event_count": max(delta, 0)} for tag_id in missing]
+        )
+
+
+def apply_event_change(db: Session, before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> None:
+    """Учесть изменение мероприятия в счётчиках в рамках текущей транзакции
+
+    before/after — результаты snapshot_event до и после изменения,
+    None для создаваемого или удаляемого мероприятия.
+    """
+    now = utc_now()
+    delta = _counter_values(after, now)
+    delta.subtract(_counter_values(before, now))
+    for name in COUNTERS:
+        if delta[name]:
+            _bump_counter(db, name, delta[name])
+
+    tags_before = before["tags"] if before else {}
+    tags_after = after["tags"] if after else {}
+    _bump_tags(db, {tag_id: tags_after[tag_id] for tag_id in tags_after.keys() - tags_before.keys()}, 1)
+    _bump_tags(db, {tag_id: tags_before[tag_id] for tag_id in tags_before.keys() - tags_after.keys()}, -1)
+
+
+def _counter_queries(names) -> Dict[str, Any]:
+    """Подзапросы, считающие значения счётчиков по таблице events"""
+    queries = {
+        TOTAL: select(func.count(Event.id)),
+        ACTIVE: select(func.count(Event.id)).where(Event.status == EventStatus.ACTIVE),
+        UPCOMING: select(func.count(Event.id)).where(
+            Event.date > utc_now(),
+            Event.status.in_(OPEN_STATUSES)
+        ),
+    }
+    return {name: queries[name].scalar_subquery() for name in names}
+
+
+def _recount_counters(db: Session, names) -> None:
+    """Пересчитать счётчики на месте
+
+    Каждый счётчик считается и записывается одним условным UPDATE, поэтому
+    приращения параллельных транзакций не затираются значением, прочитанным
+    до них. Недостающие строки вставляются, существующие не удаляются.
+    """
+    existing = {row[0] for row in db.query(EventCounter.name).filter(EventCounter.name.in_(names))}
+    for name, count in _counter_queries(names).items():
+        if name in existing:
+            db.execute(
+                update(EventCounter).where(
+                    EventCounter.name == name,
+                    EventCounter.value != count
+                ).values(value=count).execution_options(synchronize_session=False)
+            )
+        else:
+            db.execute(insert_ignoring_conflicts(db, EventCounter.__table__).values(name=name, value=count))
+
+
+def refresh_status_counters(db: Session) -> None:
+    """Пересчитать счётчики, зависящие от статуса и наступления даты
+
+    Вызывается планировщиком жизненного цикла, когда у мероприятий
+    наступает срок, в рамках текущей транзакции.
+    """
+    _recount_counters(db, (ACTIVE, UPCOMING))
+
+
+def _recount_tags(db: Session) -> None:
+    """Пересчитать счётчики тегов на месте, как и _recount_counters"""
+    count = select(func.count(event_tags.c.event_id)).where(
+        event_tags.c.tag_id == TagStat.tag_id
+    ).scalar_subquery()
+    db.execute(
+        update(TagStat).where(TagStat.event_count != count).values(
+            event_count=count
+        ).execution_options(synchronize_session=False)
+    )
+
+    name = select(Tag.name).where(Tag.id == TagStat.tag_id).scalar_subquery()
+    db.execute(
+        update(TagStat).where(TagStat.name != name).values(
+            name=name
+        ).execution_options(synchronize_session=False)
+    )
+
+    db.execute(
+        insert_ignoring_conflicts(db, TagStat.__table__).from_select(
+            ["tag_id", "name", "event_count"],
+            select(Tag.id, Tag.name, func.count(event_tags.c.event_id)).join(
+                event_tags,
+                event_tags.c.tag_id == Tag.id
+            ).where(
+                ~exists().where(TagStat.tag_id == Tag.id)
+            ).group_by(Tag.id, Tag.name)
+        )
+    )
+
+
+def reconcile_event_stats(db: Session) -> None:
+    """Пересчитать все счётчики по исходным таблицам
+
+    Исправляет накопившиеся расхождения, в том числе «предстоящие»
+    мероприятия, дата которых уже прошла. Строки обновляются на месте
+    условными UPDATE, без удаления и повторной вставки.
+    """
+    _recount_counters(db, COUNTERS)
+    _recount_tags(db)
+
+    # Счётчики мероприятий организаторов, которые читают профили
+    hosted = db.query(func.count(Event.id)).filter(
+        Event.organizer_id == SponsorProfile.user_id
+    ).scalar_subquery()
+    db.execute(
+        update(SponsorProfile).where(SponsorProfile.hosted_events_count != hosted).values(
+            hosted_events_count=hosted
+        ).execution_options(synchronize_session=False)
+    )
+
+
+def read_event_stats(db: Session) -> Dict[str, Any]:
+    """Статистика из предрасчитанных таблиц"""
+    counters = dict(db.query(EventCounter.name, EventCounter.value).all())
+
+    popular_tags = db.query(TagStat.name, TagStat.event_count).filter(
+        TagStat.event_count > 0
+    ).order_by(desc(TagStat.event_count), TagStat.name).limit(5).all()
+
+    recent_events = db.query(Event).options(selectinload(Event.tags)).order_by(
+        desc(Event.created_at), desc(Event.id)
+    ).limit(5).all()
+
+    return {
+        "total_events": counters.get(TOTAL, 0),
+        "active_events": counters.get(ACTIVE, 0),
+        "upcoming_events": counters.get(UPCOMING, 0),
+        "popular_tags": [{"name": name, "count": count} for name, count in popular_tags],
+        "recent_events": recent_events
+    }
+
+
+def run_stats_reconciliation() -> None:
+    """Сверка статистики в отдельной сессии"""
+    db = SessionLocal()
+    try:
+        reconcile_event_stats(db)
+        db.commit()
+    finally:
+        db.close()
+    events_cache.delete(stats_key())
+
+
+async def stats_reconciliation_loop() -> None:
+    """Периодическая сверка статистики, запускается при старте приложения"""
+    while True:
+        await asyncio.sleep(settings.STATS_RECONCILE_INTERVAL)
+        try:
+            await run_sync(run_stats_reconciliation)
+        except Exception as e:
+            print(f"Ошибка при сверке статистики мероприятий: {e}")
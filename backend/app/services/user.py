@@ -1,11 +1,24 @@
+import csv
 from datetime import datetime
 import uuid
+from typing import Any, Callable, Dict, Iterable, Iterator, List, TextIO, Tuple
 from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from app.schemas.user import UserRegistration
+from app.schemas.user import UserRegistration, UserUpdate
+from app.services.auth_cache import invalidate_user_cache
+from app.services.profile_cache import invalidate_profiles
 from app.models.user import User
 from app.utils.hashing import get_password_hash  # Импорт из нового модуля
-from app.services.profile import create_profile_after_registration
+from app.utils.sql import insert_ignoring_conflicts
+from app.services.profile import ROLE_PROFILES, build_default_profile, default_profile_values
+
+# Сколько строк файла пользователей проверяется, хешируется и записывается за раз
+IMPORT_CHUNK_SIZE = 1000
+
+EMAIL_TAKEN = "Пользователь с таким email уже существует"
 
 def get_user_by_email(db: Session, email: str) -> User | None:
     return db.query(User).filter(User.email == email).first()
@@ -13,16 +26,42 @@ def get_user_by_email(db: Session, email: str) -> User | None:
 def get_user_by_id(db: Session, user_id: str) -> User | None:
     return db.query(User).filter(User.id == user_id).first()
 
-def register_new_user(db: Session, user_data: UserRegistration) -> User:
+def _get_existing_user(db: Session, user_id: str) -> User:
+    user = get_user_by_id(db, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="Пользователь не найден")
+    return user
+
+def update_user(db: Session, user_id: str, user_data: UserUpdate) -> User:
+    """Изменить данные пользователя и сбросить его закэшированные токены"""
+    user = _get_existing_user(db, user_id)
+    for key, value in user_data.model_dump(exclude_unset=True).items():
+        setattr(user, key, value)
+    db.commit()
+    invalidate_user_cache(user_id)
+    invalidate_profiles([user_id])
+    db.refresh(user)
+    return user
+
+def deactivate_user(db: Session, user_id: str) -> None:
+    """Деактивировать учётную запись: её токены перестают приниматься сразу"""
+    user = _get_existing_user(db, user_id)
+    user.is_active = False
+    db.commit()
+    invalidate_user_cache(user_id)
+
+def register_new_user(db: Session, user_data: UserRegistration, hashed_password: str | None = None) -> User:
+    """Создать пользователя вместе с базовым профилем его роли одной транзакцией"""
     existing_user = get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=400,
-            detail="Пользователь с таким email уже существует"
+            detail=EMAIL_TAKEN
         )
 
     user_id = str(uuid.uuid4())
-    hashed_password = get_password_hash(user_data.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_data.password)
 
     db_user = User(
         id=user_id,
@@ -33,7 +72,99 @@ def register_new_user(db: Session, user_data: UserRegistration) -> User:
     )
 
     db.add(db_user)
-    db.commit()
+    db.add(build_default_profile(user_id, user_data.role))
+    try:
+        db.commit()
+    except IntegrityError:
+        # Тот же email успели зарегистрировать параллельно
+        db.rollback()
+        raise HTTPException(
+            status_code=400,
+            detail=EMAIL_TAKEN
+        )
     db.refresh(db_user)
-    create_profile_after_registration(db, db_user.id, db_user.role)
-    return db_user
\ No newline at end of file
+    return db_user
+
+def read_users_csv(stream: TextIO) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Строки CSV с колонками full_name, email, password и role вместе с номерами строк"""
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, {key: value.strip() for key, value in row.items() if key and value}
+
+def _import_users_chunk(
+        db: Session,
+        chunk: List[UserRegistration],
+        hash_passwords: Callable[[List[str]], List[str]]
+) -> int:
+    """Записать пачку новых пользователей и их профилей одной транзакцией"""
+    unique = {}
+    for user_data in chunk:
+        unique.setdefault(user_data.email, user_data)
+
+    existing = {
+        row[0] for row in db.query(User.email).filter(User.email.in_(unique.keys()))
+    }
+    fresh = [user_data for email, user_data in unique.items() if email not in existing]
+    if not fresh:
+        return 0
+
+    hashes = hash_passwords([user_data.password for user_data in fresh])
+    users = [
+        {
+            "id": str(uuid.uuid4()),
+            "full_name": user_data.full_name,
+            "email": user_data.email,
+            "hashed_password": hashed_password,
+            "role": user_data.role,
+            "is_active": True,
+        }
+        for user_data, hashed_password in zip(fresh, hashes)
+    ]
+    # Email могли занять между проверкой и вставкой: такие строки пропускаются,
+    # а профили создаются только для действительно вставленных пользователей
+    db.execute(insert_ignoring_conflicts(db, User.__table__), users)
+    inserted = {
+        row[0] for row in db.query(User.id).filter(User.id.in_([user["id"] for user in users]))
+    }
+    created = [user for user in users if user["id"] in inserted]
+
+    for role, (model, _) in ROLE_PROFILES.items():
+        profiles = [default_profile_values(user["id"], role) for user in created if user["role"] == role]
+        if profiles:
+            db.execute(insert(model.__table__), profiles)
+
+    db.commit()
+    return len(created)
+
+def import_users(
+        db: Session,
+        rows: Iterable[Tuple[int, Dict[str, Any]]],
+        hash_passwords: Callable[[List[str]], List[str]],
+        chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Dict[str, Any]:
+    """Массовая регистрация пользователей из потока строк
+
+    Строки проверяются теми же правилами, что и при регистрации, и
+    обрабатываются пачками по chunk_size: существующие email отсекаются
+    одним IN-запросом, пароли хешируются пачкой через hash_passwords
+    (обычно в пуле процессов), пользователи и профили вставляются
+    executemany. Каждая пачка фиксируется отдельной транзакцией, так что
+    пользователь без профиля не появится. Повторы email пропускаются.
+    """
+    summary: Dict[str, Any] = {"read": 0, "created": 0, "errors": []}
+    chunk: List[UserRegistration] = []
+    for line_number, row in rows:
+        summary["read"] += 1
+        try:
+            chunk.append(UserRegistration.model_validate(row))
+        except ValidationError as e:
+            summary["errors"].append(f"Строка {line_number}: {e.errors()[0]['msg']}")
+            continue
+        if len(chunk) >= chunk_size:
+            summary["created"] += _import_users_chunk(db, chunk, hash_passwords)
+            chunk = []
+    if chunk:
+        summary["created"] += _import_users_chunk(db, chunk, hash_passwords)
+
+    summary["skipped"] = summary["read"] - summary["created"] - len(summary["errors"])
+    return summary
@@ -1,13 +1,40 @@
+import time
 from datetime import datetime, timedelta
+from typing import Optional
 from jose import jwt, JWTError
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import get_db
+from app.schemas.user import CurrentUser
+from app.services.auth_cache import auth_cache, auth_key
+from app.services.user import get_user_by_id
+from app.utils.concurrency import run_sync
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/token")
 
+def _load_current_user(db: Session, user_id: str) -> Optional[CurrentUser]:
+    """Снимок пользователя из базы; соединение сразу возвращается в пул
+
+    Без этого запрос держал бы соединение, пока ждёт места в пуле потоков
+    для следующего run_sync, и при занятом пуле соединения кончались бы у
+    тех, кто это место уже получил.
+    """
+    user = get_user_by_id(db, user_id=user_id)
+    current_user = None
+    if user is not None:
+        current_user = CurrentUser(
+            id=user.id,
+            full_name=user.full_name,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active
+        )
+    # Изменений ещё нет, откат только завершает транзакцию чтения
+    db.rollback()
+    return current_user
+
 
 def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
     to_encode = data.copy()
@@ -22,7 +49,7 @@ def create_access_token(data: dict, expires_delta: timedelta = None) -> str:
 async def get_current_user(
         token: str = Depends(oauth2_scheme),
         db: Session = Depends(get_db)
-):
+) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -36,8 +63,28 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    from app.services.user import get_user_by_id  # Ленивый импорт
-    user = get_user_by_id(db, user_id=user_id)
-    if user is None:
-        raise credentials_exception
-    return user
\ No newline at end of file
+    key = auth_key(user_id, token)
+    current_user = auth_cache.get(key)
+    if current_user is None:
+        # Поколение берётся до чтения: если пользователя изменят, пока он
+        # загружается, устаревший снимок не попадёт в кэш
+        generation = auth_cache.generation()
+        current_user = await run_sync(_load_current_user, db, user_id)
+        if current_user is None:
+            raise credentials_exception
+
+        # Запись не должна пережить сам токен
+        ttl = settings.AUTH_CACHE_TTL
+        if payload.get("exp"):
+            ttl = min(ttl, payload["exp"] - time.time())
+        if ttl > 0:
+            auth_cache.set(key, current_user, ttl=ttl, generation=generation)
+
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Учётная запись деактивирована",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return current_user
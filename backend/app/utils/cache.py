@@ -0,0 +1,204 @@
+import hashlib
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config import settings
+
+try:
+    import redis
+except ImportError:  # redis нужен только при заданном CACHE_URL
+    redis = None
+
+
+class CacheBackend(ABC):
+    """Общий интерфейс кэша; значения должны сериализоваться в JSON
+
+    Каждый сброс (delete, delete_prefix) увеличивает поколение кэша. Чтение
+    с загрузкой берёт generation() до обращения к базе и передаёт его в
+    set: если за время загрузки что-то сбросили, устаревшее значение не
+    записывается.
+    """
+
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None) -> None:
+        """Записать значение; с generation — только если поколение с тех пор не менялось"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> None:
+        ...
+
+    @abstractmethod
+    def generation(self) -> int:
+        """Текущее поколение кэша, растёт при каждом сбросе"""
+
+    def clear(self) -> None:
+        self.delete_prefix("")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """LRU-кэш с ограничением по размеру и времени жизни записей"""
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        super().__init__(namespace)
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            self._generation += 1
+            for key in [key for key in self._data if key.startswith(prefix)]:
+                del self._data[key]
+
+    def generation(self) -> int:
+        return self._generation
+
+    def stats(self) -> Dict[str, Any]:
+        result = super().stats()
+        result.update({"size": len(self._data), "maxsize": self.maxsize})
+        return result
+
+
+# Запись только при неизменном поколении, атомарно на стороне Redis
+_SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[1]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'PX', ARGV[3])
+return 1
+"""
+
+
+class RedisCache(CacheBackend):
+    """Кэш, общий для всех воркеров, поверх Redis
+
+    Поколение хранится в Redis и общее для всех воркеров. Вытеснения
+    считает сам Redis по всему серверу (evicted_keys из INFO stats).
+    """
+
+    def __init__(self, namespace: str, url: str, ttl: float):
+        super().__init__(namespace)
+        if redis is None:
+            raise RuntimeError("Для CACHE_URL требуется установленный пакет redis")
+        self.ttl = ttl
+        self._client = redis.Redis.from_url(url)
+        self._set_if_generation = self._client.register_script(_SET_IF_GENERATION)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.namespace}#generation"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self._client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, generation: Optional[int] = None) -> None:
+        expire_ms = int((self.ttl if ttl is None else ttl) * 1000)
+        if generation is None:
+            self._client.set(self._key(key), json.dumps(value), px=expire_ms)
+        else:
+            self._set_if_generation(
+                keys=[self._generation_key, self._key(key)],
+                args=[generation, json.dumps(value), expire_ms]
+            )
+
+    # Поколение растёт до удаления: запись, успевшая проскочить со старым
+    # поколением, будет удалена следующей же командой
+    def delete(self, key: str) -> None:
+        self._client.incr(self._generation_key)
+        self._client.delete(self._key(key))
+
+    def delete_prefix(self, prefix: str) -> None:
+        self._client.incr(self._generation_key)
+        keys = list(self._client.scan_iter(match=self._key(prefix) + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+    def generation(self) -> int:
+        return int(self._client.get(self._generation_key) or 0)
+
+    def stats(self) -> Dict[str, Any]:
+        result = super().stats()
+        result["evictions"] = self._client.info("stats").get("evicted_keys", 0)
+        return result
+
+
+def create_cache(namespace: str, maxsize: int, ttl: float) -> CacheBackend:
+    """Кэш в памяти процесса или в Redis, если задан settings.CACHE_URL"""
+    if settings.CACHE_URL:
+        return RedisCache(namespace, settings.CACHE_URL, ttl)
+    return MemoryCache(namespace, maxsize, ttl)
+
+
+def make_key(prefix: str, **params: Any) -> str:
+    """Ключ кэша из префикса и набора параметров запроса"""
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return f"{prefix}:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
@@ -0,0 +1,27 @@
+import functools
+from typing import Any, Callable, Optional, TypeVar
+
+import anyio
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Ограничитель пула потоков для синхронных сервисов: блокирующие обращения к БД
+# выполняются вне цикла событий, но одновременно их не больше DB_THREADPOOL_SIZE
+_db_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def get_db_limiter() -> anyio.CapacityLimiter:
+    global _db_limiter
+    if _db_limiter is None:
+        _db_limiter = anyio.CapacityLimiter(settings.DB_THREADPOOL_SIZE)
+    return _db_limiter
+
+
+async def run_sync(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Выполнить синхронную функцию в ограниченном пуле потоков"""
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=get_db_limiter()
+    )
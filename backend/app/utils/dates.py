@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def to_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Наивное время в UTC: так даты хранятся в базе (SQLite отбрасывает пояс)
+
+    Время с часовым поясом переводится в UTC, время без пояса считается
+    уже заданным в UTC.
+    """
+    if value is not None and value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def utc_now() -> datetime:
+    """Текущее время в UTC без часового пояса, для сравнения с датами из базы"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
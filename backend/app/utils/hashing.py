@@ -1,9 +1,72 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
 from passlib.context import CryptContext
 
+from app.config import settings
+
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+# bcrypt занимает процессор на сотни миллисекунд, поэтому в async-обработчиках
+# хеширование выполняется в отдельном ограниченном пуле, а не в цикле событий
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def get_hashing_executor() -> Executor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if settings.HASHING_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(max_workers=settings.HASHING_POOL_SIZE)
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.HASHING_POOL_SIZE,
+                    thread_name_prefix="hashing"
+                )
+        return _executor
+
+
+def _change_pending(delta: int) -> None:
+    global _pending
+    with _pending_lock:
+        _pending += delta
+
+
+async def _run_hashing(func: Callable[..., Any], *args: Any) -> Any:
+    _change_pending(1)
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hashing_executor(), func, *args)
+    finally:
+        _change_pending(-1)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hashing(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+
+def hashing_stats() -> Dict[str, Any]:
+    """Размер пула и глубина очереди хеширования"""
+    pending = _pending
+    return {
+        "executor": settings.HASHING_EXECUTOR,
+        "pool_size": settings.HASHING_POOL_SIZE,
+        "in_flight": min(pending, settings.HASHING_POOL_SIZE),
+        "queued": max(pending - settings.HASHING_POOL_SIZE, 0),
+    }
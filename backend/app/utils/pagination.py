@@ -0,0 +1,33 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+
+
+def encode_cursor(value: datetime, item_id: str) -> str:
+    """Упаковать ключ последней записи страницы в непрозрачный курсор"""
+    raw = json.dumps({"v": value.isoformat(), "id": item_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Распаковать курсор в пару (значение ключа сортировки, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["v"]), str(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Некорректный курсор пагинации"
+        )
+
+
+def next_cursor(items: list, limit: int, field: str) -> Optional[str]:
+    """Курсор следующей страницы или None, если страница последняя"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(getattr(last, field), last.id)
@@ -0,0 +1,52 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryCounter:
+    """Счётчик SQL-запросов, выполненных в пределах одного контекста"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements: List[str] = []
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.statements.append(statement)
+
+
+# Счётчик хранится в contextvar: он копируется в потоки пула вместе с контекстом
+# запроса, а мутация объекта видна исходному контексту
+_current_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.record(statement)
+
+
+def install_query_counter(engine: Engine) -> None:
+    """Подписать счётчик на выполнение запросов движком"""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Посчитать запросы внутри блока with
+
+    Пример:
+        with count_queries() as counter:
+            get_events(db, limit=100)
+        assert counter.count == 2
+    """
+    counter = QueryCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
@@ -0,0 +1,126 @@
+import re
+from typing import List
+
+# Русский стеммер по алгоритму Snowball (Портер)
+# https://snowballstem.org/algorithms/russian/stemmer.html
+
+VOWELS = "аеиоуыэюя"
+
+PERFECTIVE_GERUND_1 = ("в", "вши", "вшись")
+PERFECTIVE_GERUND_2 = ("ив", "ивши", "ившись", "ыв", "ывши", "ывшись")
+ADJECTIVE = (
+    "ее", "ие", "ые", "ое", "ими", "ыми", "ей", "ий", "ый", "ой", "ем", "им", "ым",
+    "ом", "его", "ого", "ему", "ому", "их", "ых", "ую", "юю", "ая", "яя", "ою", "ею",
+)
+PARTICIPLE_1 = ("ем", "нн", "вш", "ющ", "щ")
+PARTICIPLE_2 = ("ивш", "ывш", "ующ")
+REFLEXIVE = ("ся", "сь")
+VERB_1 = ("ла", "на", "ете", "йте", "ли", "й", "л", "ем", "н", "ло", "но", "ет", "ют", "ны", "ть", "ешь", "нно")
+VERB_2 = (
+    "ила", "ыла", "ена", "ейте", "уйте", "ите", "или", "ыли", "ей", "уй", "ил", "ыл",
+    "им", "ым", "ен", "ило", "ыло", "ено", "ят", "ует", "уют", "ит", "ыт", "ены",
+    "ить", "ыть", "ишь", "ую", "ю",
+)
+NOUN = (
+    "а", "ев", "ов", "ие", "ье", "е", "иями", "ями", "ами", "еи", "ии", "и", "ией",
+    "ей", "ой", "ий", "й", "иям", "ям", "ием", "ем", "ам", "ом", "о", "у", "ах",
+    "иях", "ях", "ы", "ь", "ию", "ью", "ю", "ия", "ья", "я",
+)
+SUPERLATIVE = ("ейше", "ейш")
+DERIVATIONAL = ("ость", "ост")
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def _by_length(endings, guarded=()):
+    """Окончания от самых длинных к коротким с признаком «должно следовать за а/я»"""
+    tagged = [(ending, False) for ending in endings] + [(ending, True) for ending in guarded]
+    return sorted(tagged, key=lambda item: len(item[0]), reverse=True)
+
+
+_PERFECTIVE_GERUND = _by_length(PERFECTIVE_GERUND_2, guarded=PERFECTIVE_GERUND_1)
+_ADJECTIVE = _by_length(ADJECTIVE)
+_PARTICIPLE = _by_length(PARTICIPLE_2, guarded=PARTICIPLE_1)
+_REFLEXIVE = _by_length(REFLEXIVE)
+_VERB = _by_length(VERB_2, guarded=VERB_1)
+_NOUN = _by_length(NOUN)
+_SUPERLATIVE = _by_length(SUPERLATIVE)
+
+
+def _remove_ending(rv: str, endings) -> str:
+    """Удалить из RV самое длинное подходящее окончание"""
+    for ending, guarded in endings:
+        if not rv.endswith(ending):
+            continue
+        rest = rv[:-len(ending)]
+        if guarded and not rest.endswith(("а", "я")):
+            continue
+        return rest
+    return rv
+
+
+def _region_start(word: str, start: int = 0) -> int:
+    """Начало области после первой согласной, следующей за гласной"""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def normalize(text: str) -> str:
+    """Привести текст к нижнему регистру и заменить «ё» на «е»"""
+    return text.lower().replace("ё", "е")
+
+
+def stem(word: str) -> str:
+    """Основа слова; нерусские слова возвращаются нормализованными"""
+    word = normalize(word)
+
+    rv_start = next((i + 1 for i, ch in enumerate(word) if ch in VOWELS), len(word))
+    if rv_start >= len(word):
+        return word
+
+    r2_start = _region_start(word, _region_start(word) - 1)
+    prefix, rv = word[:rv_start], word[rv_start:]
+
+    # Шаг 1
+    stripped = _remove_ending(rv, _PERFECTIVE_GERUND)
+    if stripped == rv:
+        rv = _remove_ending(rv, _REFLEXIVE)
+        stripped = _remove_ending(rv, _ADJECTIVE)
+        if stripped != rv:
+            stripped = _remove_ending(stripped, _PARTICIPLE)
+        else:
+            stripped = _remove_ending(rv, _VERB)
+            if stripped == rv:
+                stripped = _remove_ending(rv, _NOUN)
+    rv = stripped
+
+    # Шаг 2
+    if rv.endswith("и"):
+        rv = rv[:-1]
+
+    # Шаг 3: словообразовательный суффикс должен лежать в R2
+    for ending in DERIVATIONAL:
+        if rv.endswith(ending) and rv_start + len(rv) - len(ending) >= r2_start:
+            rv = rv[:-len(ending)]
+            break
+
+    # Шаг 4
+    if rv.endswith("нн"):
+        rv = rv[:-1]
+    else:
+        stripped = _remove_ending(rv, _SUPERLATIVE)
+        if stripped != rv:
+            rv = stripped[:-1] if stripped.endswith("нн") else stripped
+        elif rv.endswith("ь"):
+            rv = rv[:-1]
+
+    return prefix + rv
+
+
+def tokenize(text: str) -> List[str]:
+    """Разбить текст на слова и привести их к основам"""
+    if not text:
+        return []
+    return [stem(token) for token in TOKEN_RE.findall(text)]
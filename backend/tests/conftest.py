@@ -0,0 +1,98 @@
+"""Общие фикстуры тестов: временная база SQLite, клиент приложения и тестовые данные"""
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+# Настройки читаются, а каталог uploads и таблицы создаются при импорте
+# приложения, поэтому база и рабочий каталог подменяются до импорта app
+_workdir = tempfile.mkdtemp(prefix="russiancup-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'app.db')}"
+os.chdir(_workdir)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.profile import SponsorProfile, SportsmanProfile
+from app.models.user import User, UserRole
+from app.utils.auth import create_access_token
+from app.utils.hashing import get_password_hash
+
+PASSWORD = "Passw0rdX"
+
+# Профили, которые создаются вместе с тестовыми пользователями
+PROFILE_MODELS = {
+    UserRole.SPORTSMAN: SportsmanProfile,
+    UserRole.SPONSOR: SponsorProfile,
+}
+
+Headers = Dict[str, str]
+
+
+@pytest.fixture(scope="session")
+def client() -> TestClient:
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def password_hash() -> str:
+    """Один хеш на все тесты: bcrypt слишком медленный, чтобы считать его на каждого пользователя"""
+    return get_password_hash(PASSWORD)
+
+
+@pytest.fixture
+def make_users(client, password_hash) -> Callable[[UserRole, int], List[Tuple[Headers, str]]]:
+    """Создать пользователей с профилями напрямую в базе; возвращает пары (заголовки, id)"""
+    def make(role: UserRole, count: int) -> List[Tuple[Headers, str]]:
+        users = [
+            {
+                "id": str(uuid.uuid4()),
+                "full_name": f"Тестовый пользователь {i}",
+                "email": f"{uuid.uuid4().hex}@example.com",
+                "hashed_password": password_hash,
+                "role": role,
+                "is_active": True,
+            }
+            for i in range(count)
+        ]
+        db = SessionLocal()
+        try:
+            db.execute(insert(User.__table__), users)
+            db.execute(
+                insert(PROFILE_MODELS[role].__table__),
+                [{"id": str(uuid.uuid4()), "user_id": user["id"]} for user in users]
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        return [
+            (
+                {"Authorization": "Bearer " + create_access_token(
+                    data={"sub": user["id"], "role": role.value},
+                    expires_delta=timedelta(hours=1)
+                )},
+                user["id"]
+            )
+            for user in users
+        ]
+
+    return make
+
+
+@pytest.fixture
+def make_event(client) -> Callable[..., dict]:
+    """Создать мероприятие через API от имени организатора"""
+    def make(headers: Headers, **fields) -> dict:
+        data = {"name": "Тестовое мероприятие", "date": "2030-01-01T10:00:00", **fields}
+        response = client.post("/api/events", data=data, headers=headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return make
@@ -0,0 +1,36 @@
+"""Закэшированный токен перестаёт приниматься сразу после изменения пользователя"""
+from app.database import SessionLocal
+from app.models.user import UserRole
+from app.services.user import deactivate_user
+
+from conftest import PASSWORD
+
+
+def test_deactivated_user_cached_token_is_rejected(client, make_users):
+    (headers, _), (other_headers, other_id) = make_users(UserRole.SPORTSMAN, 2)
+    email = client.get("/api/users/me", headers=headers).json()["email"]
+    # Второй запрос отвечает из кэша токенов
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    assert client.get("/api/users/me", headers=other_headers).status_code == 200
+
+    assert client.delete("/api/users/me", headers=headers).status_code == 200
+    assert client.get("/api/users/me", headers=headers).status_code == 401
+    response = client.post("/api/token", data={"username": email, "password": PASSWORD})
+    assert response.status_code == 401
+
+    # Деактивация в обход API тоже сбрасывает кэш
+    db = SessionLocal()
+    try:
+        deactivate_user(db, other_id)
+    finally:
+        db.close()
+    assert client.get("/api/users/me", headers=other_headers).status_code == 401
+
+
+def test_user_update_is_visible_through_cached_token(client, make_users):
+    [(headers, _)] = make_users(UserRole.SPONSOR, 1)
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+
+    response = client.put("/api/users/me", json={"full_name": "Новое Имя"}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/users/me", headers=headers).json()["full_name"] == "Новое Имя"
@@ -0,0 +1,73 @@
+"""Таблица результатов, восстановленная из снимка, совпадает с построенной из всех посылок"""
+from sqlalchemy import insert, update
+
+from app.database import SessionLocal
+from app.models.contest import ScoreboardSnapshot
+from app.models.event import event_participants
+from app.models.user import UserRole
+from app.services import contest
+
+
+def _register(event_id: str, user_ids: list) -> None:
+    db = SessionLocal()
+    try:
+        db.execute(insert(event_participants), [{"event_id": event_id, "user_id": user_id} for user_id in user_ids])
+        db.commit()
+    finally:
+        db.close()
+
+
+def _submit(client, headers, event_id: str, submissions: list) -> None:
+    response = client.post(f"/api/contests/{event_id}/submissions", json={"submissions": [
+        {"user_id": user_id, "problem": problem, "verdict": verdict, "submitted_at": f"2030-01-01T{time}"}
+        for user_id, problem, verdict, time in submissions
+    ]}, headers=headers)
+    assert response.status_code == 200, response.text
+
+
+def _standings(client, headers, event_id: str) -> tuple:
+    full = client.get(f"/api/contests/{event_id}/standings/full", headers=headers).json()
+    public = client.get(f"/api/contests/{event_id}/standings").json()
+    return full["rows"], public["rows"]
+
+
+def test_scoreboard_restored_from_snapshot_matches_rebuild(client, make_users, make_event):
+    [(organizer, _)] = make_users(UserRole.SPONSOR, 1)
+    first, second, third = [user_id for _, user_id in make_users(UserRole.SPORTSMAN, 3)]
+    event_id = make_event(organizer, event_type="competition", date="2030-01-01T10:00:00")["id"]
+    _register(event_id, [first, second, third])
+    response = client.put(f"/api/contests/{event_id}/problems", json={"problems": [{"label": "A"}, {"label": "B"}]},
+                          headers=organizer)
+    assert response.status_code == 200, response.text
+
+    _submit(client, organizer, event_id, [
+        (first, "A", "rejected", "10:20:00"),
+        (first, "A", "accepted", "10:30:00"),
+        (second, "B", "compilation_error", "10:40:00"),
+        (second, "B", "accepted", "11:05:00"),
+    ])
+    response = client.post(f"/api/contests/{event_id}/freeze", json={"frozen_at": "2030-01-01T12:00:00"},
+                           headers=organizer)
+    assert response.status_code == 200, response.text
+    contest.persist_scoreboards()
+
+    # Перезапуск: таблица восстанавливается из снимка и догоняет новые посылки
+    contest.drop_scoreboard(event_id)
+    _submit(client, organizer, event_id, [
+        (third, "A", "accepted", "11:50:00"),
+        (second, "A", "accepted", "12:10:00"),
+    ])
+    assert contest._scoreboards[event_id].persisted_seq == 4
+    restored = _standings(client, organizer, event_id)
+
+    db = SessionLocal()
+    try:
+        db.execute(update(ScoreboardSnapshot).where(ScoreboardSnapshot.event_id == event_id).values(state=None))
+        db.commit()
+    finally:
+        db.close()
+    contest.drop_scoreboard(event_id)
+    assert _standings(client, organizer, event_id) == restored
+    # Посылка после заморозки видна только в полной таблице
+    full, public = restored
+    assert [row["solved"] for row in full] != [row["solved"] for row in public]
@@ -0,0 +1,23 @@
+"""Регистрации сбрасывают только карточку мероприятия, правки — и списки"""
+from app.models.user import UserRole
+from app.services.event_cache import detail_key, list_key
+
+
+def test_registration_keeps_cached_lists(client, make_users, make_event):
+    [(organizer, _)] = make_users(UserRole.SPONSOR, 1)
+    [(sportsman, _)] = make_users(UserRole.SPORTSMAN, 1)
+    event = make_event(organizer)
+    other = make_event(organizer)
+
+    lists, detail, other_detail = list_key(limit=10), detail_key(event["id"]), detail_key(other["id"])
+    assert client.get(f"/api/events/{event['id']}").json()["current_participants"] == 0
+
+    assert client.post(f"/api/events/{event['id']}/register", headers=sportsman).status_code == 200
+    assert list_key(limit=10) == lists
+    assert detail_key(other["id"]) == other_detail
+    assert detail_key(event["id"]) != detail
+    assert client.get(f"/api/events/{event['id']}").json()["current_participants"] == 1
+
+    response = client.put(f"/api/events/{event['id']}", json={"name": "Новое название"}, headers=organizer)
+    assert response.status_code == 200, response.text
+    assert list_key(limit=10) != lists
@@ -0,0 +1,45 @@
+"""Проверка пароля при входе не занимает цикл событий"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.models.user import UserRole
+from app.utils import hashing
+
+from conftest import PASSWORD
+
+
+def _wait_in_flight(timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if hashing.hashing_stats()["in_flight"]:
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_event_loop_serves_requests_while_password_is_verified(client, make_users, monkeypatch):
+    [(headers, _)] = make_users(UserRole.SPORTSMAN, 1)
+    email = client.get("/api/users/me", headers=headers).json()["email"]
+
+    # Проверка пароля блокируется, пока тест её не отпустит: если бы она
+    # выполнялась в цикле событий, другие запросы не получили бы ответа
+    release = threading.Event()
+    verify = hashing.verify_password
+
+    def blocked_verify(plain_password: str, hashed_password: str) -> bool:
+        release.wait(30)
+        return verify(plain_password, hashed_password)
+
+    monkeypatch.setattr(hashing, "verify_password", blocked_verify)
+
+    with ThreadPoolExecutor(2) as pool:
+        login = pool.submit(client.post, "/api/token", data={"username": email, "password": PASSWORD})
+        try:
+            assert _wait_in_flight(10), "вход не дошёл до пула хеширования"
+            probe = pool.submit(client.get, "/api/events?limit=5")
+            assert probe.result(timeout=10).status_code == 200
+            assert not login.done()
+        finally:
+            release.set()
+        assert login.result(timeout=30).status_code == 200
@@ -0,0 +1,60 @@
+"""Бенчмарк: поток входов с bcrypt не замедляет остальные запросы воркера
+
+Зависит от скорости машины, поэтому по умолчанию не запускается:
+python -m pytest -m benchmark
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.config import settings
+from app.models.user import UserRole
+from app.utils.hashing import get_password_hash
+
+from conftest import PASSWORD
+
+LOGINS = 4 * settings.HASHING_POOL_SIZE
+
+
+def _latencies(client, path: str, stop: threading.Event, minimum: int = 0) -> list:
+    latencies = []
+    while not stop.is_set() or len(latencies) < minimum:
+        started = time.perf_counter()
+        assert client.get(path).status_code == 200
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+@pytest.mark.benchmark
+def test_unrelated_endpoints_keep_latency_during_login_burst(client, make_users):
+    users = make_users(UserRole.SPORTSMAN, LOGINS)
+    emails = [client.get("/api/users/me", headers=headers).json()["email"] for headers, _ in users]
+
+    started = time.perf_counter()
+    get_password_hash(PASSWORD)
+    hash_time = time.perf_counter() - started
+
+    # Список мероприятий отдаётся из кэша и на пустом воркере отвечает за миллисекунды
+    stop = threading.Event()
+    stop.set()
+    idle = _latencies(client, "/api/events?limit=50", stop, minimum=50)
+
+    def login(email):
+        response = client.post("/api/token", data={"username": email, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+
+    stop.clear()
+    with ThreadPoolExecutor(2) as pool:
+        probe = pool.submit(_latencies, client, "/api/events?limit=50", stop, 20)
+        with ThreadPoolExecutor(LOGINS) as logins:
+            list(logins.map(login, emails))
+        stop.set()
+        busy = probe.result()
+
+    # Если бы bcrypt выполнялся в цикле событий, запросы, пришедшие во время
+    # входов, ждали бы нескольких хеширований подряд
+    assert statistics.median(busy) < hash_time / 4
+    assert max(busy) < hash_time
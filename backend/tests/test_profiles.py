@@ -0,0 +1,22 @@
+"""Личные данные профиля видит только сам пользователь"""
+from app.models.user import UserRole
+
+CONTACTS = {"contact_phone": "+7 900 000-00-00", "contact_email": "contact@example.com"}
+
+
+def test_other_users_do_not_see_private_fields(client, make_users):
+    (owner, owner_id), (viewer, _) = make_users(UserRole.SPONSOR, 2)
+    assert client.put("/api/profiles/sponsor", json=CONTACTS, headers=owner).status_code == 200
+
+    own = client.get(f"/api/profiles/{owner_id}", headers=owner).json()
+    assert own["email"]
+    assert own["profile_data"]["contact_phone"] == CONTACTS["contact_phone"]
+
+    for profile in (
+        client.get(f"/api/profiles/{owner_id}", headers=viewer).json(),
+        client.post("/api/profiles/batch", json={"user_ids": [owner_id]}, headers=viewer).json()[0],
+    ):
+        assert profile["user_id"] == owner_id
+        assert "email" not in profile
+        assert not CONTACTS.keys() & profile["profile_data"].keys()
+        assert profile["profile_data"]["organization_name"] == own["profile_data"]["organization_name"]
@@ -0,0 +1,63 @@
+"""Число SQL-запросов на список и карточку мероприятий не зависит от их размера"""
+from datetime import datetime, timedelta
+
+from app.database import SessionLocal
+from app.models.user import UserRole
+from app.schemas.event import EventCreate
+from app.services.event import create_event, get_events
+from app.services.event_cache import invalidate_event
+from app.utils.query_counter import count_queries
+
+
+def _create_events(organizer_id: str, count: int, tags_per_event: int) -> list:
+    db = SessionLocal()
+    try:
+        return [
+            create_event(db, EventCreate(
+                name=f"Мероприятие {i}",
+                date=datetime(2030, 1, 1) + timedelta(days=i),
+                tags=[f"тег {i}-{t}" for t in range(tags_per_event)]
+            ), organizer_id).id
+            for i in range(count)
+        ]
+    finally:
+        db.close()
+
+
+def _query_count(client, path: str) -> int:
+    # Кэш ответов сбрасывается, чтобы запрос дошёл до базы
+    invalidate_event()
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    return int(response.headers["X-Query-Count"])
+
+
+def test_event_list_query_count_is_constant(client, make_users):
+    (_, small_id), (_, large_id) = make_users(UserRole.SPONSOR, 2)
+    _create_events(small_id, 1, 1)
+    _create_events(large_id, 100, 3)
+
+    small = _query_count(client, f"/api/events?organizer_id={small_id}&limit=100")
+    large = _query_count(client, f"/api/events?organizer_id={large_id}&limit=100")
+
+    assert large == small
+    assert len(client.get(f"/api/events?organizer_id={large_id}&limit=100").json()) == 100
+
+    db = SessionLocal()
+    try:
+        with count_queries() as counter:
+            events = get_events(db, limit=100, organizer_id=large_id)
+            for event in events:
+                [tag.name for tag in event.tags]
+        # Мероприятия и их теги — двумя запросами, без догрузки по одному
+        assert counter.count == 2
+    finally:
+        db.close()
+
+
+def test_event_detail_query_count_is_constant(client, make_users):
+    (_, organizer_id), = make_users(UserRole.SPONSOR, 1)
+    plain, = _create_events(organizer_id, 1, 0)
+    tagged, = _create_events(organizer_id, 1, 10)
+
+    assert _query_count(client, f"/api/events/{tagged}") == _query_count(client, f"/api/events/{plain}")
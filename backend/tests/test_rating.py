@@ -0,0 +1,92 @@
+"""Расчёт рейтинга: гистограмма против попарного сравнения, загрузка против полного пересчёта"""
+from datetime import datetime
+
+import numpy as np
+import pytest
+from sqlalchemy import insert, update
+
+from app.database import SessionLocal
+from app.models.event import Event, EventStatus, event_participants
+from app.models.profile import SportsmanProfile
+from app.models.user import UserRole
+from app.schemas.event import EventCreate
+from app.services.event import create_event
+from app.services.rating import PAIRWISE_BLOCK_SIZE, elo_deltas, recompute_all_ratings
+
+K = 32
+
+
+def pairwise_elo_deltas(ratings: np.ndarray, places: np.ndarray, k: float) -> np.ndarray:
+    """Эталон: прямое сравнение каждой пары участников за n*n"""
+    n = len(ratings)
+    actual = (places[:, None] < places[None, :]) + 0.5 * (places[:, None] == places[None, :])
+    expected = 1.0 / (1.0 + 10.0 ** ((ratings[None, :] - ratings[:, None]) / 400.0))
+    np.fill_diagonal(actual, 0.0)
+    np.fill_diagonal(expected, 0.0)
+    return k * (actual.sum(axis=1) - expected.sum(axis=1)) / (n - 1)
+
+
+@pytest.mark.parametrize("n", [2, 3, 17, PAIRWISE_BLOCK_SIZE + 1, 3 * PAIRWISE_BLOCK_SIZE - 7])
+def test_elo_deltas_match_pairwise_reference(n):
+    rng = np.random.default_rng(n)
+    ratings = rng.integers(900, 2600, n).astype(float)
+    # Мест меньше, чем участников, чтобы были ничьи
+    places = rng.integers(1, max(n // 2, 2) + 1, n)
+
+    deltas = elo_deltas(ratings, places, K)
+
+    np.testing.assert_allclose(deltas, pairwise_elo_deltas(ratings, places, K), rtol=0, atol=1e-9)
+    # Эло — игра с нулевой суммой
+    assert abs(deltas.sum()) < 1e-9
+
+
+def test_elo_deltas_single_participant():
+    assert elo_deltas(np.array([1500.0]), np.array([1]), K).tolist() == [0.0]
+
+
+def _completed_event(organizer_id: str, date: datetime, user_ids: list) -> str:
+    """Завершённое мероприятие с зарегистрированными участниками"""
+    db = SessionLocal()
+    try:
+        event_id = create_event(db, EventCreate(name=f"Этап {date:%d.%m}", date=date), organizer_id).id
+        db.execute(update(Event).where(Event.id == event_id).values(status=EventStatus.COMPLETED))
+        db.execute(insert(event_participants), [{"event_id": event_id, "user_id": user_id} for user_id in user_ids])
+        db.commit()
+        return event_id
+    finally:
+        db.close()
+
+
+def _ratings(user_ids: list) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(db.query(SportsmanProfile.user_id, SportsmanProfile.rating).filter(
+            SportsmanProfile.user_id.in_(user_ids)
+        ))
+    finally:
+        db.close()
+
+
+def test_results_uploaded_out_of_order_match_full_recompute(client, make_users):
+    [(organizer, organizer_id)] = make_users(UserRole.SPONSOR, 1)
+    user_ids = [user_id for _, user_id in make_users(UserRole.SPORTSMAN, 3)]
+    early = _completed_event(organizer_id, datetime(2030, 1, 1), user_ids)
+    late = _completed_event(organizer_id, datetime(2030, 2, 1), user_ids)
+
+    # Позднее мероприятие загружено первым, раннее — после него
+    for event_id, order in ((late, user_ids), (early, user_ids[::-1])):
+        results = [{"user_id": user_id, "place": place} for place, user_id in enumerate(order, 1)]
+        response = client.post(f"/api/ratings/events/{event_id}/results", json={"results": results}, headers=organizer)
+        assert response.status_code == 200, response.text
+
+    uploaded = _ratings(user_ids)
+    changes = {change["user_id"]: change["new_rating"] for change in response.json()["rating_changes"]}
+    assert changes == uploaded
+
+    db = SessionLocal()
+    try:
+        recompute_all_ratings(db)
+        db.commit()
+    finally:
+        db.close()
+    assert _ratings(user_ids) == uploaded
@@ -0,0 +1,52 @@
+"""Нагрузочная проверка регистрации: параллельные заявки не превышают число мест"""
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.event import Event, event_participants, event_waitlist
+from app.models.user import UserRole
+
+ATTEMPTS = 2000
+CAPACITY = 500
+WORKERS = 50
+
+
+def _participants(event_id: str):
+    db = SessionLocal()
+    try:
+        counter = db.query(Event.current_participants).filter(Event.id == event_id).scalar()
+        registered = db.query(func.count()).select_from(event_participants).filter(
+            event_participants.c.event_id == event_id
+        ).scalar()
+        waitlisted = db.query(func.count()).select_from(event_waitlist).filter(
+            event_waitlist.c.event_id == event_id
+        ).scalar()
+    finally:
+        db.close()
+    return counter, registered, waitlisted
+
+
+def test_concurrent_registrations_fill_event_exactly(client, make_users, make_event):
+    (organizer, _), = make_users(UserRole.SPONSOR, 1)
+    event = make_event(organizer, max_participants=CAPACITY)
+    sportsmen = [headers for headers, _ in make_users(UserRole.SPORTSMAN, ATTEMPTS)]
+
+    def register(headers):
+        return client.post(f"/api/events/{event['id']}/register", headers=headers).status_code
+
+    with ThreadPoolExecutor(WORKERS) as pool:
+        statuses = list(pool.map(register, sportsmen))
+
+    # Занятые места — 200, остальные заявки уходят в лист ожидания — 202
+    assert statuses.count(200) == CAPACITY
+    assert statuses.count(202) == ATTEMPTS - CAPACITY
+    assert _participants(event["id"]) == (CAPACITY, CAPACITY, ATTEMPTS - CAPACITY)
+
+    # Повторные заявки уже зарегистрированных отклоняются и не трогают счётчик
+    with ThreadPoolExecutor(WORKERS) as pool:
+        repeated = list(pool.map(register, sportsmen[:WORKERS * 2]))
+
+    assert set(repeated) == {400}
+    assert _participants(event["id"]) == (CAPACITY, CAPACITY, ATTEMPTS - CAPACITY)
+    assert client.get(f"/api/events/{event['id']}").json()["current_participants"] == CAPACITY